@@ -0,0 +1,175 @@
+"""
+Admission control for the gateway.
+
+Requests are sorted into priority lanes (public verification, reads, writes
+and bulk/export). Every lane has its own per-client token buckets and a
+bounded number of requests it may run at once; a request that would exceed
+either is shed with 429 and a Retry-After hint instead of queueing behind
+everyone else.
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict
+
+from prometheus_client import Counter, Gauge
+
+ADMISSION_DECISIONS = Counter(
+    'admission_decisions_total',
+    'Admission decisions by lane and outcome',
+    ['lane', 'outcome']
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    'admission_in_flight',
+    'Requests running per admission lane',
+    ['lane'],
+    multiprocess_mode='livesum'
+)
+
+
+class LaneConfig:
+    """Budget of one priority lane"""
+
+    def __init__(self, concurrency: int, rate: float, burst: float, queue_size: int, queue_timeout: float):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+
+
+class Rejected(Exception):
+    """The request was shed; retry_after is a hint in seconds"""
+
+    def __init__(self, lane: str, reason: str, retry_after: float):
+        super().__init__(f"{lane} lane {reason}")
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token; returns 0 on success or the seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class Lane:
+    """Concurrency slots of one lane with a short, bounded wait queue"""
+
+    def __init__(self, name: str, config: LaneConfig, max_clients: int):
+        self.name = name
+        self.config = config
+        self.max_clients = max_clients
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def check_rate(self, client: str) -> float:
+        if self.config.rate <= 0:
+            return 0.0
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.config.rate, self.config.burst)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket.take()
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.config.concurrency and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.config.queue_size or self.config.queue_timeout <= 0:
+            raise Rejected(self.name, "is at capacity", self._retry_hint())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.config.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait timed out
+                return
+            waiter.cancel()
+            raise Rejected(self.name, "is at capacity", self._retry_hint())
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            waiter.cancel()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self) -> None:
+        # Hand the slot straight to the oldest waiter so it cannot be overtaken
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _retry_hint(self) -> float:
+        return max(1.0, self.config.queue_timeout)
+
+
+class AdmissionController:
+    """Admits requests per lane and client, or raises Rejected"""
+
+    def __init__(self, lanes: Dict[str, LaneConfig], max_clients: int = 10000):
+        self.lanes = {name: Lane(name, config, max_clients) for name, config in lanes.items()}
+
+    async def admit(self, lane_name: str, client: str) -> Lane:
+        """Reserve a slot in the lane; the caller must release() it when done"""
+        lane = self.lanes[lane_name]
+        wait = lane.check_rate(client)
+        if wait > 0:
+            ADMISSION_DECISIONS.labels(lane_name, "rate_limited").inc()
+            raise Rejected(lane_name, "rate limit exceeded", wait)
+        try:
+            await lane.acquire()
+        except Rejected:
+            ADMISSION_DECISIONS.labels(lane_name, "shed").inc()
+            raise
+        ADMISSION_DECISIONS.labels(lane_name, "admitted").inc()
+        ADMISSION_IN_FLIGHT.labels(lane_name).inc()
+        return lane
+
+    def release(self, lane: Lane) -> None:
+        lane.release()
+        ADMISSION_IN_FLIGHT.labels(lane.name).dec()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {
+                "in_flight": lane.in_flight,
+                "waiting": len(lane._waiters),
+                "concurrency": lane.config.concurrency,
+                "rate": lane.config.rate,
+                "clients": len(lane._buckets)
+            }
+            for name, lane in self.lanes.items()
+        }
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
@@ -0,0 +1,382 @@
+"""
+In-process stand-ins for the gateway's upstreams, for offline benchmarks.
+
+FakeNode answers the Tendermint RPC and Cosmos REST calls the gateway makes
+as an httpx.MockTransport handler, and routes smart queries and executes to
+the contract simulators in contract_simulator.py by contract address.
+InMemoryObjectStore implements the part of the MinIO client API the gateway
+uses. Both can add a configurable latency to every call, so a benchmark sees
+realistic waiting without any network.
+
+main.py also imports the models.did_models and routes.did_routes packages,
+which are not part of this tree; install_gateway_stand_ins() registers
+minimal versions of them (the request models and enums the gateway uses, and
+an empty DID router) wherever the real packages cannot be imported.
+"""
+
+import asyncio
+import base64
+import hashlib
+import importlib.util
+import json
+import random
+import sys
+import threading
+import time
+from enum import Enum
+from types import ModuleType, SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs
+
+import httpx
+from fastapi import APIRouter
+from minio.error import S3Error
+from pydantic import BaseModel
+
+from contract_simulator import ChainClock, ContractError, DIDRegistry
+
+
+class Latency:
+    """Delay added to each call: a mean with uniform jitter, in milliseconds"""
+
+    def __init__(self, mean_ms: float = 0.0, jitter_ms: float = 0.0):
+        self.mean_ms = mean_ms
+        self.jitter_ms = jitter_ms
+
+    def sample(self) -> float:
+        if self.mean_ms <= 0 and self.jitter_ms <= 0:
+            return 0.0
+        return max(0.0, self.mean_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    @classmethod
+    def parse(cls, value: str) -> "Latency":
+        """Parse "5" or "5+-2" (mean plus or minus jitter)"""
+        mean, _, jitter = value.partition("+-")
+        return cls(float(mean or 0), float(jitter or 0))
+
+
+def _no_such_key(object_name: str) -> S3Error:
+    # Keyword arguments: the positional order changed between minio releases
+    return S3Error(
+        response=None, code="NoSuchKey", message="Object does not exist", resource=object_name,
+        request_id="bench", host_id="bench", object_name=object_name
+    )
+
+
+class _ObjectResponse:
+    def __init__(self, body: bytes, etag: str):
+        self._body = body
+        self.headers = {"ETag": f'"{etag}"'}
+
+    def read(self) -> bytes:
+        return self._body
+
+    def close(self) -> None:
+        pass
+
+    def release_conn(self) -> None:
+        pass
+
+
+class InMemoryObjectStore:
+    """Enough of the MinIO client API for the entity and relationship stores"""
+
+    def __init__(self, latency: Optional[Latency] = None):
+        self.latency = latency or Latency()
+        self.objects: Dict[str, tuple] = {}
+        self._buckets = set()
+        self._lock = threading.Lock()
+
+    def _wait(self) -> None:
+        # The gateway calls MinIO synchronously, so the delay blocks like the real client does
+        delay = self.latency.sample()
+        if delay:
+            time.sleep(delay)
+
+    def bucket_exists(self, bucket_name: str) -> bool:
+        return bucket_name in self._buckets
+
+    def make_bucket(self, bucket_name: str) -> None:
+        self._buckets.add(bucket_name)
+
+    def put_object(self, bucket_name: str, object_name: str, data, length: int, content_type: Optional[str] = None, **kwargs):
+        self._wait()
+        body = data.read()
+        etag = hashlib.md5(body).hexdigest()
+        with self._lock:
+            self.objects[object_name] = (body, etag)
+        return SimpleNamespace(bucket_name=bucket_name, object_name=object_name, etag=etag)
+
+    def get_object(self, bucket_name: str, object_name: str, **kwargs) -> _ObjectResponse:
+        self._wait()
+        stored = self.objects.get(object_name)
+        if stored is None:
+            raise _no_such_key(object_name)
+        return _ObjectResponse(*stored)
+
+    def stat_object(self, bucket_name: str, object_name: str, **kwargs):
+        self._wait()
+        stored = self.objects.get(object_name)
+        if stored is None:
+            raise _no_such_key(object_name)
+        return SimpleNamespace(object_name=object_name, etag=stored[1], size=len(stored[0]))
+
+    def remove_object(self, bucket_name: str, object_name: str) -> None:
+        self._wait()
+        with self._lock:
+            self.objects.pop(object_name, None)
+
+    def list_objects(self, bucket_name: str, prefix: str = "", recursive: bool = False, start_after: Optional[str] = None) -> Iterator:
+        self._wait()
+        with self._lock:
+            names = sorted(name for name in self.objects if name.startswith(prefix))
+        for name in names:
+            if start_after is None or name > start_after:
+                yield SimpleNamespace(object_name=name, size=len(self.objects.get(name, (b"",))[0]))
+
+    def put_json(self, object_name: str, document: Dict[str, Any]) -> None:
+        """Store a document without the injected latency, for seeding"""
+        body = json.dumps(document).encode("utf-8")
+        self.objects[object_name] = (body, hashlib.md5(body).hexdigest())
+
+
+class FakeNode:
+    """
+    Tendermint RPC and Cosmos REST answers for the gateway's node calls.
+
+    Blocks are produced every block_time seconds from creation, so chain-keyed
+    caches see the height advance as they would against a real node. Contract
+    calls go to contracts[address], or to `contract` for any other address.
+    """
+
+    def __init__(self, contract: Optional[Any] = None, block_time: float = 5.0,
+                 rpc_latency: Optional[Latency] = None, rest_latency: Optional[Latency] = None,
+                 chain_id: str = "educhain", contracts: Optional[Dict[str, Any]] = None,
+                 clock: Optional[ChainClock] = None):
+        self.clock = clock or getattr(contract, "clock", None) or ChainClock(block_time)
+        self.contract = contract or DIDRegistry(self.clock)
+        self.contracts = contracts or {}
+        self.rpc_latency = rpc_latency or Latency()
+        self.rest_latency = rest_latency or Latency()
+        self.chain_id = chain_id
+        self.requests = 0
+
+    @property
+    def block_time(self) -> float:
+        return self.clock.block_time
+
+    @property
+    def height(self) -> int:
+        return self.clock.height
+
+    def block_time_at(self, height: int) -> str:
+        return self.clock.block_time_at(height)
+
+    def _contract(self, path: str) -> Any:
+        address = path.split("/contract/", 1)[1].split("/", 1)[0] if "/contract/" in path else ""
+        return self.contracts.get(address, self.contract)
+
+    def _block(self, height: int) -> Dict[str, Any]:
+        return {
+            "block_id": {"hash": hashlib.sha256(str(height).encode()).hexdigest().upper()},
+            "block": {
+                "header": {"chain_id": self.chain_id, "height": str(height), "time": self.block_time_at(height)},
+                "data": {"txs": []}
+            }
+        }
+
+    def _tx_result(self) -> Dict[str, Any]:
+        txhash = hashlib.sha256(f"{time.time()}{random.random()}".encode()).hexdigest().upper()
+        return {"txhash": txhash, "height": str(self.height), "code": 0}
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        """httpx.MockTransport handler"""
+        self.requests += 1
+        path = request.url.path
+        rpc = not path.startswith(("/cosmos", "/cosmwasm", "/node_info"))
+        delay = (self.rpc_latency if rpc else self.rest_latency).sample()
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            body = self._rpc(request) if rpc else self._rest(request)
+        except ContractError as e:
+            # wasmd reports contract errors as an internal error of the call
+            action = "execute" if request.method == "POST" else "query"
+            return httpx.Response(500, json={"code": 2, "message": f"{e}: {action} wasm contract failed"})
+        except KeyError as e:
+            return httpx.Response(404, json={"code": 5, "message": f"not found: {e}"})
+        except ValueError as e:
+            return httpx.Response(400, json={"code": 3, "message": str(e)})
+        return httpx.Response(200, json=body)
+
+    def _rpc(self, request: httpx.Request) -> Dict[str, Any]:
+        path = request.url.path
+        params = parse_qs(request.url.query.decode())
+        height = self.height
+        if path == "/health":
+            return {"result": {}}
+        if path == "/status":
+            return {"result": {
+                "node_info": {"id": "benchnode", "network": self.chain_id, "moniker": "bench", "version": "0.37.0"},
+                "sync_info": {
+                    "latest_block_height": str(height),
+                    "latest_block_time": self.block_time_at(height),
+                    "catching_up": False
+                },
+                "validator_info": {"address": "BENCHVALIDATOR", "voting_power": "10"}
+            }}
+        if path == "/net_info":
+            return {"result": {"listening": True, "n_peers": "0", "peers": []}}
+        if path == "/block":
+            requested = int(params.get("height", [height])[0])
+            if requested > height:
+                raise ValueError(f"height {requested} must be less than or equal to the current blockchain height")
+            return {"result": self._block(requested)}
+        if path == "/validators":
+            return {"result": {
+                "block_height": str(height),
+                "validators": [{"address": "BENCHVALIDATOR", "voting_power": "10", "proposer_priority": "0"}],
+                "count": "1",
+                "total": "1"
+            }}
+        if path == "/tx":
+            return {"result": {"hash": params.get("hash", [""])[0], "height": str(height), "tx_result": {"code": 0}}}
+        raise KeyError(path)
+
+    def _rest(self, request: httpx.Request) -> Dict[str, Any]:
+        path = request.url.path
+        if path == "/node_info":
+            return {"node_info": {"network": self.chain_id, "moniker": "bench"}, "application_version": {"name": "educhain"}}
+        if path == "/cosmos/base/tendermint/v1beta1/blocks/latest":
+            return self._block(self.height)
+        if "/smart/" in path:
+            message = json.loads(base64.b64decode(path.rsplit("/smart/", 1)[1]))
+            return {"data": self._contract(path).query(message)}
+        if path.endswith("/execute"):
+            payload = json.loads(request.content)
+            self._contract(path).execute(payload.get("sender", ""), payload["msg"])
+            return self._tx_result()
+        if path == "/cosmos/tx/v1beta1/txs":
+            return {"tx_response": self._tx_result()}
+        if path == "/cosmos/tx/v1beta1/simulate":
+            return {"gas_info": {"gas_used": "120000", "gas_wanted": "200000"}}
+        if path.startswith("/cosmos/auth/v1beta1/accounts/"):
+            return {"account": {"address": path.rsplit("/", 1)[1], "account_number": "1", "sequence": "0"}}
+        raise KeyError(path)
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+
+# Stand-ins for the gateway's models and routes packages
+
+
+class EntityType(str, Enum):
+    PERSON = "Person"
+    ORGANIZATION = "Organization"
+    CREDENTIAL = "Credential"
+
+
+class EntitySubtype(str, Enum):
+    STUDENT = "student"
+
+
+class DIDStatus(str, Enum):
+    ACTIVE = "active"
+    REVOKED = "revoked"
+
+
+class RelationshipType(str, Enum):
+    ENROLLED_AT = "enrolled_at"
+    EMPLOYED_BY = "employed_by"
+    ISSUED_BY = "issued_by"
+    ISSUED_TO = "issued_to"
+    CREATED_BY = "created_by"
+    OWNS = "owns"
+    HAS_DEPARTMENT = "has_department"
+    BELONGS_TO = "belongs_to"
+
+
+class PaginatedResponse(BaseModel):
+    items: List[Any]
+    total: int
+    page: int
+    limit: int
+    has_next: bool
+
+
+class CreateDIDRequest(BaseModel):
+    method: str = "eduid"
+    entity_type: str = "Person"
+    entity_subtype: Optional[str] = None
+    controller: str
+    public_key: str
+    services: Optional[List[Dict[str, Any]]] = None
+    entity_data: Optional[Dict[str, Any]] = None
+
+
+class UpdateDIDRequest(BaseModel):
+    did: str
+    controller: Optional[str] = None
+    add_verification_method: Optional[Any] = None
+    remove_verification_method: Optional[Any] = None
+    add_service: Optional[Any] = None
+    remove_service: Optional[Any] = None
+    add_authentication: Optional[Any] = None
+    remove_authentication: Optional[Any] = None
+    entity_data: Optional[Dict[str, Any]] = None
+
+
+class RevokeDIDRequest(BaseModel):
+    did: str
+    reason: Optional[str] = None
+
+
+class TransferDIDRequest(BaseModel):
+    did: str
+    new_controller: str
+    new_public_key: Optional[str] = None
+
+
+class LinkDIDsRequest(BaseModel):
+    source_did: str
+    target_did: str
+    relationship: RelationshipType
+
+
+_STAND_INS = {
+    "models.did_models": {
+        cls.__name__: cls for cls in (
+            EntityType, EntitySubtype, DIDStatus, RelationshipType, PaginatedResponse, CreateDIDRequest,
+            UpdateDIDRequest, RevokeDIDRequest, TransferDIDRequest, LinkDIDsRequest
+        )
+    },
+    "routes.did_routes": {"router": APIRouter()}
+}
+
+
+def _importable(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:
+        return False
+
+
+def install_gateway_stand_ins() -> List[str]:
+    """Register stand-ins for the gateway modules that cannot be imported; returns their names"""
+    installed = []
+    for name, attributes in _STAND_INS.items():
+        if name in sys.modules or _importable(name):
+            continue
+        package_name, _, module_name = name.partition(".")
+        package = sys.modules.get(package_name)
+        if package is None:
+            package = sys.modules[package_name] = ModuleType(package_name)
+            package.__path__ = []
+        module = ModuleType(name)
+        module.__dict__.update(attributes)
+        module.__all__ = list(attributes)
+        sys.modules[name] = module
+        setattr(package, module_name, module)
+        installed.append(name)
+    return installed
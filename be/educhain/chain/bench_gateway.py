@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Offline throughput and latency benchmark of the gateway.
+
+The node and MinIO are replaced by the in-process fakes from bench_fakes.py
+(with injectable latency), with contract state held by the eduid and educert
+simulators from contract_simulator.py. A few thousand DIDs and credentials
+are seeded with matching off-chain documents, optionally next to millions of
+chain-only DIDs and credentials (--chain-dids, --chain-credentials) so the
+contract state is production-sized, and each scenario runs a fixed number
+of operations at a fixed concurrency.
+The DID scenarios call the workflow functions the DID routes use (resolve,
+verify, list, create); the block scenarios go through the full middleware
+stack over ASGI. Results are compared with a stored baseline, and the run
+exits non-zero when a scenario's p99 or throughput regressed by more than
+the tolerance, or when any operation failed.
+
+main.py imports the gateway's models and routes packages, which are not part
+of this tree; where they cannot be imported, the stand-ins from bench_fakes.py
+are used instead and the run says so.
+
+    python bench_gateway.py --update-baseline        # record a baseline
+    python bench_gateway.py --concurrency 32 --rpc-latency 5+-2
+    python bench_gateway.py --chain-dids 2000000 --chain-credentials 2000000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+from bench_fakes import FakeNode, InMemoryObjectStore, Latency, install_gateway_stand_ins
+from contract_simulator import ChainClock, CredentialRegistry, DIDRegistry, synthetic_dids
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+CONTRACT_ADDRESS = "edu1benchcontract"
+CERT_CONTRACT_ADDRESS = "edu1benchcert"
+SENDER = "edu1benchsender"
+SCENARIOS = ("resolve", "verify", "list", "list_by_type", "create", "blocks_latest", "block_by_height")
+
+
+def import_gateway(state_dir: str, admission: bool):
+    """Import main with settings that keep it off the network and quiet"""
+    os.environ.setdefault("EDUID_CONTRACT_ADDRESS", CONTRACT_ADDRESS)
+    os.environ.setdefault("LOG_FILE", os.path.join(state_dir, "gateway.log"))
+    os.environ.setdefault("GATEWAY_STATE_DIR", state_dir)
+    os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(state_dir, "jobs.db"))
+    os.environ.setdefault("TRACE_EXPORTER", "none")
+    os.environ.setdefault("ADMISSION_ENABLED", "true" if admission else "false")
+    stand_ins = install_gateway_stand_ins()
+    if stand_ins:
+        print(f"Using stand-ins for {', '.join(stand_ins)}", file=sys.stderr)
+    import main
+    logging.getLogger().setLevel(logging.WARNING)
+    return main
+
+
+def entity_folder(main, kind: str) -> Any:
+    """The EntityType member whose name mentions kind, else the first one"""
+    members = list(main.EntityType)
+    return next((member for member in members if kind in member.name.lower()), members[0])
+
+
+def seed(main, node: FakeNode, store: InMemoryObjectStore, count: int) -> Dict[str, List[str]]:
+    """Register people and credentials on the fake chain with matching off-chain documents"""
+    person_type = entity_folder(main, "person")
+    credential_type = entity_folder(main, "credential")
+    certificates = node.contracts[CERT_CONTRACT_ADDRESS]
+    people, credentials = [], []
+
+    def register(did: str, entity_type, document: Dict[str, Any]) -> None:
+        data_hash = main.calculate_hash(document)
+        document.setdefault("metadata", {})["hash"] = data_hash
+        store.put_json(f"{entity_type.lower()}/{did}.json", document)
+        node.contract.execute(SENDER, {"register_did": {
+            "did": did,
+            "controller": SENDER,
+            "verification_method": {"id": f"{did}#key-1"},
+            "authentication": [f"{did}#key-1"],
+            "services": [],
+            "metadata": {"entity_type": entity_type, "status": "active", "hash": data_hash}
+        }})
+        return data_hash
+
+    for n in range(count):
+        did = f"did:eduid:person-{n:08d}"
+        register(did, person_type, {"did": did, "type": person_type, "name": f"Person {n}"})
+        people.append(did)
+    for n in range(count):
+        did = f"did:eduid:credential-{n:08d}"
+        issuer = people[n % len(people)]
+        data_hash = register(did, credential_type, {
+            "did": did,
+            "type": credential_type,
+            "credential_info": {
+                "issuer_did": issuer,
+                "holder_did": people[(n * 7 + 1) % len(people)],
+                "expiration_date": "2999-01-01T00:00:00"
+            }
+        })
+        certificates.execute(SENDER, {"IssueVC": {
+            "hash": data_hash, "metadata": did, "issuer": issuer, "signature": "bench"
+        }})
+        credentials.append(did)
+    return {"people": people, "credentials": credentials}
+
+
+async def start_gateway(main, node: FakeNode, store: InMemoryObjectStore) -> httpx.AsyncClient:
+    """Wire the fakes in place of the upstream clients, without the startup hooks"""
+    from relationship_store import RelationshipStore
+
+    upstream_client = httpx.AsyncClient(transport=node.transport())
+    for pool in main.upstream_pools:
+        await pool.start(upstream_client)
+    main.minio_client = store
+    main.relationship_store = RelationshipStore(store, main.MINIO_BUCKET, instrument=main.minio_call)
+    main.dependency_status.update({name: True for name in main.dependency_status})
+    main.app.state.startup_time = main.datetime.now()
+    main.app.state.http_client = upstream_client
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://gateway")
+
+
+def seed_chain_only(node: FakeNode, person_type: str, dids: int, credentials: int) -> None:
+    """Bulk-load DIDs and credentials that have no off-chain documents"""
+    started = time.perf_counter()
+    node.contract.bulk_register(synthetic_dids(dids, SENDER, entity_type=person_type), sender=SENDER)
+    node.contracts[CERT_CONTRACT_ADDRESS].bulk_issue(
+        {"hash": f"{n:064x}", "metadata": "", "issuer": SENDER, "signature": "bench"} for n in range(credentials)
+    )
+    if dids or credentials:
+        print(f"Seeded {dids} chain-only DIDs and {credentials} credentials in {time.perf_counter() - started:.1f}s")
+
+
+def build_scenarios(main, node: FakeNode, client: httpx.AsyncClient, seeded: Dict[str, List[str]]) -> Dict[str, Callable[[], Awaitable[Any]]]:
+    people, credentials = seeded["people"], seeded["credentials"]
+    person_type = entity_folder(main, "person")
+
+    async def resolve():
+        await main.resolve_did(random.choice(people))
+
+    async def verify():
+        result = await main.verify_credential(random.choice(credentials))
+        if not result["verified"]:
+            raise RuntimeError(result.get("reason"))
+
+    async def list_page():
+        await main.list_dids_on_chain(page=random.randint(1, max(1, len(node.contract) // 20)), limit=20)
+
+    async def list_by_type():
+        await main.list_dids_on_chain(entity_type=person_type, status="active",
+                                      start_after=random.choice(people), limit=20)
+
+    async def create():
+        request = main.CreateDIDRequest(
+            entity_type=person_type,
+            controller=SENDER,
+            public_key="zBenchPublicKey",
+            entity_data={"name": "Benchmark Person"}
+        )
+        await main.create_did_on_chain(request, SENDER)
+
+    async def get(path: str):
+        response = await client.get(path)
+        if response.status_code >= 400:
+            raise RuntimeError(f"GET {path} returned {response.status_code}")
+
+    return {
+        "resolve": resolve,
+        "verify": verify,
+        "list": list_page,
+        "list_by_type": list_by_type,
+        "create": create,
+        "blocks_latest": lambda: get("/api/v1/blocks/latest"),
+        "block_by_height": lambda: get(f"/api/v1/blocks/{random.randint(1, node.height)}")
+    }
+
+
+async def run_scenario(operation: Callable[[], Awaitable[Any]], requests: int, concurrency: int, warmup: int) -> Dict[str, float]:
+    for _ in range(warmup):
+        try:
+            await operation()
+        except Exception:
+            pass
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                await operation()
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "rps": len(latencies) / elapsed
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """Describe every scenario that failed or regressed against the baseline"""
+    problems = []
+    for name, result in results.items():
+        if result["errors"]:
+            problems.append(f"{name}: {result['errors']} of {result['requests']} operations failed")
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if result["p99_ms"] > previous["p99_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p99 {result['p99_ms']:.1f}ms vs baseline {previous['p99_ms']:.1f}ms")
+        if result["rps"] < previous["rps"] * (1 - tolerance):
+            problems.append(f"{name}: {result['rps']:.0f} req/s vs baseline {previous['rps']:.0f} req/s")
+    return problems
+
+
+def report(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]]) -> None:
+    print(f"{'scenario':<16} {'requests':>8} {'errors':>6} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8} {'vs baseline':>12}")
+    for name, result in results.items():
+        previous = baseline.get(name)
+        change = f"{(result['rps'] / previous['rps'] - 1) * 100:+.1f}%" if previous else "-"
+        print(f"{name:<16} {result['requests']:>8} {result['errors']:>6} {result['p50_ms']:>8.2f} "
+              f"{result['p99_ms']:>8.2f} {result['rps']:>8.0f} {change:>12}")
+
+
+async def benchmark(args, main) -> Dict[str, Dict[str, float]]:
+    clock = ChainClock(args.block_time)
+    node = FakeNode(
+        contract=DIDRegistry(clock),
+        contracts={CERT_CONTRACT_ADDRESS: CredentialRegistry(clock)},
+        clock=clock,
+        rpc_latency=Latency.parse(args.rpc_latency),
+        rest_latency=Latency.parse(args.rest_latency)
+    )
+    store = InMemoryObjectStore(Latency.parse(args.minio_latency))
+    seeded = seed(main, node, store, args.dids)
+    seed_chain_only(node, entity_folder(main, "person"), args.chain_dids, args.chain_credentials)
+    client = await start_gateway(main, node, store)
+    scenarios = build_scenarios(main, node, client, seeded)
+    try:
+        return {
+            name: await run_scenario(scenarios[name], args.requests, args.concurrency, args.warmup)
+            for name in args.scenarios
+        }
+    finally:
+        await client.aclose()
+        for pool in main.upstream_pools:
+            await pool.stop()
+        await main.app.state.http_client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS),
+                        help=f"comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=500, help="operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured operations before each scenario")
+    parser.add_argument("--dids", type=int, default=2000, help="people and credentials seeded on the fake chain")
+    parser.add_argument("--chain-dids", type=int, default=0, help="extra DIDs bulk-loaded on chain only")
+    parser.add_argument("--chain-credentials", type=int, default=0, help="extra credentials bulk-loaded on chain only")
+    parser.add_argument("--rpc-latency", default="2", help="Tendermint RPC latency in ms, as MEAN or MEAN+-JITTER")
+    parser.add_argument("--rest-latency", default="3", help="Cosmos REST and contract latency in ms")
+    parser.add_argument("--minio-latency", default="1", help="MinIO latency in ms")
+    parser.add_argument("--block-time", type=float, default=5.0, help="seconds between fake blocks")
+    parser.add_argument("--admission", action="store_true", help="keep admission control enabled")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p99/throughput regression (0.25 = 25%%)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        gateway = import_gateway(state_dir, args.admission)
+        results = asyncio.run(benchmark(args, gateway))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["scenarios"]
+    report(results, baseline)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"config": {
+                "requests": args.requests, "concurrency": args.concurrency, "dids": args.dids,
+                "chain_dids": args.chain_dids, "chain_credentials": args.chain_credentials,
+                "rpc_latency": args.rpc_latency, "rest_latency": args.rest_latency, "minio_latency": args.minio_latency
+            }, "scenarios": {**baseline, **results}}, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+    if not baseline:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
+
+    problems = compare(results, baseline, args.tolerance)
+    for problem in problems:
+        print(f"REGRESSION {problem}", file=sys.stderr)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
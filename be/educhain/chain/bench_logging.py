@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Measure the logging cost paid on the request path.
+
+Compares the previous setup (StreamHandler and RotatingFileHandler called
+synchronously) with the queue pipeline from log_pipeline.py, with and
+without sampling. Each simulated request logs the same three INFO records
+an entity read does, and the report shows the time the calling thread spent
+per request. Console output goes to /dev/null so only handler cost is
+measured.
+
+    python bench_logging.py --requests 20000
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+
+from log_pipeline import TEXT_FORMAT, configure_logging
+
+
+def simulate_requests(count: int) -> list:
+    logger = logging.getLogger("educhain-api")
+    entity_logger = logging.getLogger("educhain-api.entities")
+    http_logger = logging.getLogger("httpx")
+    timings = []
+    for n in range(count):
+        did = f"did:eduid:{n}"
+        start = time.perf_counter()
+        http_logger.info('HTTP Request: %s %s "%s"', "GET", f"http://localhost:1317/{did}", "HTTP/1.1 200 OK")
+        entity_logger.info("Entity data for %s retrieved successfully", did)
+        logger.info("Resolved %s in %.1fms", did, 1.5)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def synchronous(log_file: str, count: int) -> list:
+    reset_root()
+    formatter = logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler(open(os.devnull, "w")), RotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024, backupCount=5)]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        logging.getLogger().addHandler(handler)
+    logging.getLogger().setLevel(logging.INFO)
+    return simulate_requests(count)
+
+
+def pipelined(log_file: str, count: int, sample_rates: dict) -> list:
+    reset_root()
+    stderr, sys.stderr = sys.stderr, open(os.devnull, "w")
+    try:
+        pipeline = configure_logging(log_file, 10 * 1024 * 1024, 5, json_format=True,
+                                     sample_rates=sample_rates, queue_size=1000000)
+        pipeline.start()
+        timings = simulate_requests(count)
+        pipeline.stop()
+    finally:
+        sys.stderr = stderr
+    return timings
+
+
+def report(name: str, timings: list) -> None:
+    timings = sorted(timings)
+    mean = statistics.mean(timings) * 1e6
+    p50 = timings[len(timings) // 2] * 1e6
+    p99 = timings[int(len(timings) * 0.99)] * 1e6
+    worst = timings[-1] * 1e6
+    print(f"{name:<28} mean {mean:7.1f}us  p50 {p50:7.1f}us  p99 {p99:7.1f}us  max {worst:9.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Logging cost per simulated request ({args.requests} requests, 3 records each)")
+        report("synchronous handlers", synchronous(os.path.join(directory, "sync.log"), args.requests))
+        report("queue pipeline", pipelined(os.path.join(directory, "queue.log"), args.requests, {}))
+        report("queue pipeline + sampling", pipelined(
+            os.path.join(directory, "sampled.log"), args.requests,
+            {"educhain-api.entities": 0.1, "httpx": 0.1}
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Measure how long the gateway takes to import and to start serving.
+
+Each run starts a fresh interpreter, imports main, enters the app's lifespan
+through TestClient and waits for the first /api/v1/live response. By default
+MinIO and the node point at a non-routable address, so a blocking dependency
+call during import or startup shows up as a multi-second result.
+
+    python bench_startup.py --runs 5 --max-ms 1000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+UNREACHABLE = "10.255.255.1"
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    started = time.perf_counter()
+    assert client.get("/api/v1/live").status_code == 200
+    live = time.perf_counter()
+    ready = client.get("/api/v1/ready").status_code
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (started - imported) * 1000,
+    "first_response_ms": (live - start) * 1000,
+    "ready_status": ready
+}))
+"""
+
+
+def run_once(env):
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if the median first response is slower")
+    parser.add_argument("--real-dependencies", action="store_true", help="keep MinIO and node URLs from the environment")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("LOG_FILE", os.devnull)
+    env.setdefault("JOB_QUEUE_PATH", os.path.join(os.environ.get("TMPDIR", "/tmp"), "educhain-bench-jobs.db"))
+    if not args.real_dependencies:
+        env["MINIO_ENDPOINT"] = f"{UNREACHABLE}:9000"
+        env["TENDERMINT_RPC_URL"] = f"http://{UNREACHABLE}:26657"
+        env["COSMOS_REST_URL"] = f"http://{UNREACHABLE}:1317"
+
+    results = [run_once(env) for _ in range(args.runs)]
+    for key in ("import_ms", "startup_ms", "first_response_ms"):
+        values = [result[key] for result in results]
+        print(f"{key:>18}: median {statistics.median(values):8.1f}  min {min(values):8.1f}  max {max(values):8.1f}")
+
+    median = statistics.median(result["first_response_ms"] for result in results)
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"FAIL: median first response {median:.1f}ms exceeds {args.max_ms:.1f}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+State shared between the worker processes of one gateway host.
+
+When the gateway runs under gunicorn/uvicorn with several workers, each
+worker is a separate process with its own caches. GATEWAY_STATE_DIR points
+all of them at a common directory holding:
+
+- health.bin: an mmap'd timestamp of the last successful health check,
+  so every worker reports the same health history;
+- bus/<pid>.sock: one unix datagram socket per worker, used to broadcast
+  small invalidation messages (entity writes, new links) to the others;
+- locks/<name>/<stripe>.lock: flock'd files giving per-key mutual
+  exclusion across workers, e.g. for conditional entity writes.
+
+Without a state directory all of them fall back to plain in-process behaviour.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import mmap
+import os
+import socket
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger("educhain-api.cluster")
+
+_TIMESTAMP = struct.Struct("d")
+MAX_MESSAGE_SIZE = 8192
+
+
+class SharedHealthState:
+    """Last successful health check time, shared through an mmap'd file"""
+
+    def __init__(self, state_dir: Optional[str] = None):
+        self._local: Optional[datetime] = None
+        self._map: Optional[mmap.mmap] = None
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+            path = os.path.join(state_dir, "health.bin")
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if os.fstat(fd).st_size < _TIMESTAMP.size:
+                    os.ftruncate(fd, _TIMESTAMP.size)
+                self._map = mmap.mmap(fd, _TIMESTAMP.size)
+            finally:
+                os.close(fd)
+
+    def get(self) -> Optional[datetime]:
+        if self._map is None:
+            return self._local
+        (timestamp,) = _TIMESTAMP.unpack_from(self._map, 0)
+        return datetime.fromtimestamp(timestamp) if timestamp else None
+
+    def set(self, value: datetime) -> None:
+        if self._map is None:
+            self._local = value
+            return
+        # An aligned 8-byte store, so readers never see a torn value
+        _TIMESTAMP.pack_into(self._map, 0, value.timestamp())
+
+
+class WorkerBus:
+    """Best-effort broadcast of small JSON messages to the other workers"""
+
+    def __init__(self, state_dir: Optional[str] = None):
+        self.directory = os.path.join(state_dir, "bus") if state_dir else None
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+        self._sock: Optional[socket.socket] = None
+        self._path: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._sock is not None
+
+    def subscribe(self, message_type: str, handler: Callable[[Dict[str, Any]], None]) -> None:
+        self._handlers[message_type] = handler
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Bind this worker's socket and dispatch incoming messages on the loop"""
+        if not self.directory or self._sock is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._path = os.path.join(self.directory, f"{os.getpid()}.sock")
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(self._path)
+        sock.setblocking(False)
+        self._sock = sock
+        (loop or asyncio.get_running_loop()).add_reader(sock.fileno(), self._receive)
+
+    def stop(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        if self._sock is None:
+            return
+        try:
+            (loop or asyncio.get_running_loop()).remove_reader(self._sock.fileno())
+        except RuntimeError:
+            pass
+        self._sock.close()
+        self._sock = None
+        if self._path and os.path.exists(self._path):
+            os.unlink(self._path)
+
+    def publish(self, message_type: str, **fields: Any) -> None:
+        """Send a message to every other live worker; never raises"""
+        if self._sock is None:
+            return
+        payload = json.dumps({"type": message_type, **fields}).encode("utf-8")
+        if len(payload) > MAX_MESSAGE_SIZE:
+            logger.warning("Dropping oversized %s bus message", message_type)
+            return
+        try:
+            peers = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in peers:
+            path = os.path.join(self.directory, name)
+            if path == self._path or not name.endswith(".sock"):
+                continue
+            try:
+                self._sock.sendto(payload, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # The worker behind this socket is gone
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except BlockingIOError:
+                logger.warning("Worker bus queue of %s is full, dropping %s", name, message_type)
+            except OSError as e:
+                logger.warning("Failed to publish %s to %s: %s", message_type, name, e)
+
+    def _receive(self) -> None:
+        while True:
+            try:
+                payload = self._sock.recv(MAX_MESSAGE_SIZE)
+            except OSError:
+                return
+            try:
+                message = json.loads(payload)
+                handler = self._handlers.get(message.get("type"))
+                if handler is not None:
+                    handler(message)
+            except Exception as e:
+                logger.warning("Failed to handle worker bus message: %s", e)
+
+
+class StripedLock:
+    """
+    Blocking per-key lock shared by the workers of a host.
+
+    Keys hash onto a fixed number of stripes, so the lock files do not grow
+    with the number of keys. Each acquisition opens its own file description,
+    so flock also excludes other threads of the same process. Without a state
+    directory, threading locks cover this process only. Call hold() from a
+    worker thread, never on the event loop.
+    """
+
+    def __init__(self, state_dir: Optional[str], name: str, stripes: int = 256):
+        self.stripes = stripes
+        self.directory = os.path.join(state_dir, "locks", name) if state_dir else None
+        self._thread_locks = None if self.directory else [threading.Lock() for _ in range(stripes)]
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def _stripe(self, key: str) -> int:
+        return zlib.crc32(key.encode("utf-8")) % self.stripes
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        stripe = self._stripe(key)
+        if self._thread_locks is not None:
+            with self._thread_locks[stripe]:
+                yield
+            return
+        fd = os.open(os.path.join(self.directory, f"{stripe}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(fd)
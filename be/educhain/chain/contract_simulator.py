@@ -0,0 +1,394 @@
+"""
+In-memory simulation of the eduid and educert contracts.
+
+DIDRegistry answers the smart queries and executes the gateway sends to the
+eduid contract; CredentialRegistry implements the educert IssueVC, RevokeVC,
+IsRevoked and GetCredential messages, keyed by credential hash. DID state is
+indexed the way the list queries need it: DIDs are kept sorted for offset and
+start_after paging, and every controller, entity type and status has its own
+sorted DID list, as does every combination of them, so any filtered page
+costs a bisect and a slice rather than a scan. bulk_register and bulk_issue
+load millions of records without per-insert index upkeep.
+
+Writes are stamped with the height of a ChainClock, which produces a block
+every block_time seconds; FakeNode shares the clock, so the heights in
+contract state match the ones the node reports.
+"""
+
+import itertools
+import sys
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+
+class ContractError(Exception):
+    """A message the contract rejects; the node answers it like a failed wasm call"""
+
+
+class ChainClock:
+    """Block heights advancing every block_time seconds from creation"""
+
+    def __init__(self, block_time: float = 5.0):
+        self.block_time = block_time
+        self.genesis_time = time.time()
+
+    @property
+    def height(self) -> int:
+        return 1 + int((time.time() - self.genesis_time) / self.block_time)
+
+    def block_time_at(self, height: int) -> str:
+        moment = datetime.fromtimestamp(self.genesis_time + (height - 1) * self.block_time, timezone.utc)
+        return moment.strftime("%Y-%m-%dT%H:%M:%S.%f000Z")
+
+
+_FILTERS = ("controller", "entity_type", "status")
+_FILTER_MASKS = [mask for mask in itertools.product((True, False), repeat=len(_FILTERS)) if any(mask)]
+
+
+class _SortedIndex:
+    """Sorted DID lists per key"""
+
+    def __init__(self):
+        self.keys: Dict[str, List[str]] = {}
+
+    def add(self, key: tuple, did: str) -> None:
+        insort(self.keys.setdefault(key, []), did)
+
+    def append(self, key: tuple, did: str) -> None:
+        """Unsorted add for bulk loads; call sort() afterwards"""
+        self.keys.setdefault(key, []).append(did)
+
+    def sort(self) -> None:
+        for dids in self.keys.values():
+            dids.sort()
+
+    def remove(self, key: tuple, did: str) -> None:
+        dids = self.keys.get(key)
+        if not dids:
+            return
+        position = bisect_left(dids, did)
+        if position < len(dids) and dids[position] == did:
+            del dids[position]
+        if not dids:
+            del self.keys[key]
+
+    def get(self, key: tuple) -> List[str]:
+        return self.keys.get(key, [])
+
+
+class _DIDRecord:
+    __slots__ = ("did", "controller", "verification_method", "authentication", "service", "metadata", "height")
+
+    def __init__(self, did: str, controller: str, verification_method: List[Any], authentication: List[Any],
+                 service: List[Any], metadata: Dict[str, Any], height: int):
+        self.did = did
+        self.controller = controller
+        self.verification_method = verification_method
+        self.authentication = authentication
+        self.service = service
+        self.metadata = metadata
+        self.height = height
+
+    def document(self) -> Dict[str, Any]:
+        return {
+            "id": self.did,
+            "controller": self.controller,
+            "verification_method": list(self.verification_method),
+            "authentication": list(self.authentication),
+            "service": list(self.service),
+            "metadata": dict(self.metadata),
+            "height": self.height
+        }
+
+
+def _message(message: Dict[str, Any]) -> tuple:
+    if not isinstance(message, dict) or len(message) != 1:
+        raise ContractError("Message must have exactly one variant")
+    (name, args), = message.items()
+    return name, args or {}
+
+
+class DIDRegistry:
+    """The eduid contract messages the gateway uses, over indexed in-memory state"""
+
+    def __init__(self, clock: Optional[ChainClock] = None, check_controller: bool = False):
+        self.clock = clock or ChainClock()
+        # The gateway signs with one backend wallet, so ownership is only enforced on request
+        self.check_controller = check_controller
+        self.records: Dict[str, _DIDRecord] = {}
+        self.links: Dict[str, List[Dict[str, Any]]] = {}
+        self._order: List[str] = []
+        # One sorted list per filter combination: (controller, None, "active") and so on
+        self._filtered = _SortedIndex()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    # Queries
+
+    def query(self, message: Dict[str, Any]) -> Any:
+        name, args = _message(message)
+        if name == "get_did_document":
+            return self._record(args.get("did")).document()
+        if name == "list_dids":
+            return self._list(args)
+        raise ContractError(f"Unknown query {name}")
+
+    def _record(self, did: Optional[str]) -> _DIDRecord:
+        record = self.records.get(did)
+        if record is None:
+            raise ContractError(f"DID not found: {did}")
+        return record
+
+    def _list(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        pagination = args.get("pagination") or {}
+        limit = max(0, int(pagination.get("limit", 10)))
+        key = tuple(args.get(name) for name in _FILTERS)
+        dids = self._filtered.get(key) if any(value is not None for value in key) else self._order
+        if pagination.get("start_after"):
+            start = bisect_right(dids, pagination["start_after"])
+        else:
+            start = max(0, int(pagination.get("offset", 0)))
+        page = dids[start:start + limit]
+        return {"dids": [self.records[did].document() for did in page], "total": len(dids)}
+
+    # Executes
+
+    def execute(self, sender: str, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply an execute message and return the events of the transaction"""
+        name, args = _message(message)
+        handler = getattr(self, f"_execute_{name}", None)
+        if handler is None:
+            raise ContractError(f"Unknown execute message {name}")
+        attributes = handler(sender, args) or {}
+        return {"action": name, "height": self.clock.height, **attributes}
+
+    def _authorize(self, sender: str, record: _DIDRecord) -> None:
+        if self.check_controller and sender != record.controller:
+            raise ContractError(f"Unauthorized: {sender} does not control {record.did}")
+
+    def _execute_register_did(self, sender: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        did = args.get("did")
+        if not did:
+            raise ContractError("Missing did")
+        if did in self.records:
+            raise ContractError(f"DID already registered: {did}")
+        record = self._new_record(sender, args)
+        self.records[did] = record
+        insort(self._order, did)
+        self._index(record, self._filtered.add)
+        return {"did": did}
+
+    def _execute_update_did_metadata(self, sender: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        record = self._record(args.get("did"))
+        self._authorize(sender, record)
+        self._reindex(record, lambda: record.metadata.update(args.get("metadata") or {}))
+        return {"did": record.did}
+
+    def _execute_update_did(self, sender: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        record = self._record(args.get("did"))
+        self._authorize(sender, record)
+
+        def apply():
+            if args.get("new_controller"):
+                record.controller = args["new_controller"]
+            for field, attribute in (("verification_method", "verification_method"),
+                                     ("service", "service"),
+                                     ("authentication", "authentication")):
+                current = getattr(record, attribute)
+                removed = set(args.get(f"remove_{field}") or [])
+                if removed:
+                    current = [entry for entry in current if _entry_id(entry) not in removed]
+                setattr(record, attribute, current + list(args.get(f"add_{field}") or []))
+
+        self._reindex(record, apply)
+        return {"did": record.did}
+
+    def _execute_revoke_did(self, sender: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        record = self._record(args.get("did"))
+        self._authorize(sender, record)
+        if record.metadata.get("status") == "revoked":
+            raise ContractError(f"DID already revoked: {record.did}")
+
+        def apply():
+            record.metadata["status"] = "revoked"
+            record.metadata["revocation_reason"] = args.get("reason")
+
+        self._reindex(record, apply)
+        return {"did": record.did}
+
+    def _execute_transfer_did(self, sender: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        record = self._record(args.get("did"))
+        self._authorize(sender, record)
+        if not args.get("new_controller"):
+            raise ContractError("Missing new_controller")
+
+        def apply():
+            record.controller = args["new_controller"]
+            if args.get("new_public_key"):
+                record.verification_method = [{
+                    "id": f"{record.did}#key-1",
+                    "type": "EcdsaSecp256k1VerificationKey2019",
+                    "controller": record.controller,
+                    "publicKeyMultibase": args["new_public_key"]
+                }]
+
+        self._reindex(record, apply)
+        return {"did": record.did, "new_controller": record.controller}
+
+    def _execute_link_dids(self, sender: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        source = self._record(args.get("source_did"))
+        target = self._record(args.get("target_did"))
+        self._authorize(sender, source)
+        link = {"target_did": target.did, "relationship": args.get("relationship"), "height": self.clock.height}
+        links = self.links.setdefault(source.did, [])
+        if any(existing["target_did"] == target.did and existing["relationship"] == link["relationship"]
+               for existing in links):
+            raise ContractError(f"Link already exists: {source.did} -> {target.did}")
+        links.append(link)
+        return {"source_did": source.did, "target_did": target.did}
+
+    # Indexing
+
+    def _new_record(self, sender: str, args: Dict[str, Any]) -> _DIDRecord:
+        verification_method = args.get("verification_method")
+        metadata = dict(args.get("metadata") or {})
+        for key in ("entity_type", "status"):
+            if key in metadata:
+                metadata[key] = _intern(metadata[key])
+        return _DIDRecord(
+            did=args["did"],
+            controller=_intern(args.get("controller") or sender),
+            verification_method=[verification_method] if verification_method else [],
+            authentication=list(args.get("authentication") or []),
+            service=list(args.get("services") or []),
+            metadata=metadata,
+            height=self.clock.height
+        )
+
+    def _index(self, record: _DIDRecord, update) -> None:
+        values = (record.controller, record.metadata.get("entity_type"), record.metadata.get("status"))
+        for mask in _FILTER_MASKS:
+            # Combinations naming a field the record lacks would repeat a smaller one
+            if all(value is not None for value, used in zip(values, mask) if used):
+                update(tuple(value if used else None for value, used in zip(values, mask)), record.did)
+
+    def _reindex(self, record: _DIDRecord, apply) -> None:
+        self._index(record, self._filtered.remove)
+        try:
+            apply()
+        finally:
+            self._index(record, self._filtered.add)
+
+    def bulk_register(self, messages: Iterable[Dict[str, Any]], sender: str = "") -> int:
+        """
+        Load register_did arguments without per-insert index upkeep.
+
+        The sorted lists are rebuilt once at the end, so seeding millions of
+        DIDs costs one sort per index instead of an insort per DID. A
+        duplicate DID stops the load with the DIDs before it registered,
+        the same as sending them one by one.
+        """
+        added = 0
+        try:
+            for args in messages:
+                if args["did"] in self.records:
+                    raise ContractError(f"DID already registered: {args['did']}")
+                record = self._new_record(sender, args)
+                self.records[record.did] = record
+                self._order.append(record.did)
+                self._index(record, self._filtered.append)
+                added += 1
+        finally:
+            # Even a failed load must leave the lists sorted for bisect
+            self._order.sort()
+            self._filtered.sort()
+        return added
+
+
+def _intern(value: Any) -> Any:
+    # Millions of records share a handful of controllers, types and statuses
+    return sys.intern(value) if type(value) is str else value
+
+
+def _entry_id(entry: Any) -> Any:
+    return entry.get("id") if isinstance(entry, dict) else entry
+
+
+def synthetic_dids(count: int, controller: str, entity_type: str = "person", prefix: str = "sim",
+                   start: int = 0) -> Iterator[Dict[str, Any]]:
+    """register_did arguments for count generated DIDs, for bulk_register"""
+    for n in range(start, start + count):
+        did = f"did:eduid:{prefix}-{n:010d}"
+        yield {
+            "did": did,
+            "controller": controller,
+            "verification_method": {"id": f"{did}#key-1"},
+            "authentication": [f"{did}#key-1"],
+            "metadata": {"entity_type": entity_type, "status": "active"}
+        }
+
+
+class CredentialRegistry:
+    """The educert credential messages: IssueVC, RevokeVC, IsRevoked and GetCredential"""
+
+    def __init__(self, clock: Optional[ChainClock] = None):
+        self.clock = clock or ChainClock()
+        self.credentials: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.credentials)
+
+    def query(self, message: Dict[str, Any]) -> Any:
+        name, args = _message(message)
+        if name == "IsRevoked":
+            # Unknown hashes are not revoked, as in the contract
+            credential = self.credentials.get(args.get("hash"))
+            return bool(credential and credential["revoked"])
+        if name == "GetCredential":
+            credential = self.credentials.get(args.get("hash"))
+            if credential is None:
+                raise ContractError("Credential not found")
+            return dict(credential)
+        raise ContractError(f"Unknown query {name}")
+
+    def execute(self, sender: str, message: Dict[str, Any]) -> Dict[str, Any]:
+        name, args = _message(message)
+        if name == "IssueVC":
+            credential = self._credential(args)
+            # Issuing an existing hash overwrites it, as the contract's storage.set does
+            self.credentials[credential["hash"]] = credential
+            return {"action": "issue_vc", "issuer": sender, "height": self.clock.height}
+        if name == "RevokeVC":
+            credential = self.credentials.get(args.get("hash"))
+            if credential is None:
+                raise ContractError("Credential not found")
+            credential["revoked"] = True
+            return {"action": "revoke_vc", "hash": credential["hash"], "height": self.clock.height}
+        raise ContractError(f"Unknown execute message {name}")
+
+    def _credential(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        if not args.get("hash"):
+            raise ContractError("Missing hash")
+        return {
+            "hash": args["hash"],
+            "metadata": args.get("metadata", ""),
+            "issuer": _intern(args.get("issuer", "")),
+            "signature": args.get("signature", ""),
+            "revoked": False,
+            "nft_token_id": None,
+            "height": self.clock.height
+        }
+
+    def bulk_issue(self, messages: Iterable[Dict[str, Any]]) -> int:
+        """Load IssueVC arguments, refusing hashes that are already issued"""
+        added = 0
+        for args in messages:
+            credential = self._credential(args)
+            if credential["hash"] in self.credentials:
+                raise ContractError(f"Credential already issued: {credential['hash']}")
+            self.credentials[credential["hash"]] = credential
+            added += 1
+        return added
@@ -0,0 +1,95 @@
+"""
+Client-side metrics for the services the gateway depends on.
+
+Every call to Tendermint RPC, Cosmos REST, the DID contract or MinIO is timed
+and counted by dependency and operation (`get_did_document`, `broadcast`,
+`put_object`, ...), retries are counted separately from first attempts, and
+the connections in use are compared with the size of the pool they come
+from, so a dashboard can tell which upstream limits throughput.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+DEPENDENCY_LATENCY = Histogram(
+    'dependency_request_duration_seconds',
+    'Latency of calls to upstream dependencies',
+    ['dependency', 'operation'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+DEPENDENCY_REQUESTS = Counter(
+    'dependency_requests_total',
+    'Calls to upstream dependencies by outcome',
+    ['dependency', 'operation', 'outcome']
+)
+DEPENDENCY_RETRIES = Counter(
+    'dependency_retries_total',
+    'Repeated calls to upstream dependencies by reason',
+    ['dependency', 'operation', 'reason']
+)
+CONNECTION_POOL_IN_USE = Gauge(
+    'connection_pool_in_use',
+    'Requests holding a connection of the pool',
+    ['pool'],
+    multiprocess_mode='livesum'
+)
+CONNECTION_POOL_SIZE = Gauge(
+    'connection_pool_size',
+    'Maximum connections of the pool',
+    ['pool'],
+    multiprocess_mode='livesum'
+)
+
+
+def status_outcome(status_code: int) -> str:
+    if status_code >= 500:
+        return "server_error"
+    if status_code == 404:
+        return "not_found"
+    if status_code >= 400:
+        return "client_error"
+    return "success"
+
+
+class DependencyCall:
+    """Outcome of one tracked call; the caller may refine it before the call ends"""
+
+    __slots__ = ("outcome",)
+
+    def __init__(self):
+        self.outcome = "success"
+
+
+@contextmanager
+def track_dependency(dependency: str, operation: str, pool: Optional[str] = None) -> Iterator[DependencyCall]:
+    """Time a dependency call and count it by outcome; exceptions count as errors"""
+    call = DependencyCall()
+    if pool:
+        CONNECTION_POOL_IN_USE.labels(pool).inc()
+    start = time.perf_counter()
+    try:
+        yield call
+    except asyncio.CancelledError:
+        call.outcome = "cancelled"
+        raise
+    except BaseException:
+        if call.outcome == "success":
+            call.outcome = "error"
+        raise
+    finally:
+        DEPENDENCY_LATENCY.labels(dependency, operation).observe(time.perf_counter() - start)
+        DEPENDENCY_REQUESTS.labels(dependency, operation, call.outcome).inc()
+        if pool:
+            CONNECTION_POOL_IN_USE.labels(pool).dec()
+
+
+def record_retry(dependency: str, operation: str, reason: str) -> None:
+    DEPENDENCY_RETRIES.labels(dependency, operation, reason).inc()
+
+
+def set_pool_size(pool: str, size: int) -> None:
+    CONNECTION_POOL_SIZE.labels(pool).set(size)
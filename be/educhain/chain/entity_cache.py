@@ -0,0 +1,136 @@
+"""
+In-process read-through cache for off-chain entity data stored in MinIO.
+
+Entries hold the decoded entity document together with the object name and
+ETag it was read from, so a cached DID can be revalidated with a single
+stat_object call instead of probing every entity folder and downloading the
+whole object again.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from prometheus_client import Counter, Gauge
+
+ENTITY_CACHE_REQUESTS = Counter(
+    'entity_cache_requests_total',
+    'Entity cache lookups by result',
+    ['result']
+)
+ENTITY_CACHE_REVALIDATIONS = Counter(
+    'entity_cache_revalidations_total',
+    'Entity cache ETag revalidations by outcome',
+    ['outcome']
+)
+ENTITY_CACHE_EVICTIONS = Counter('entity_cache_evictions_total', 'Entries evicted from the entity cache')
+ENTITY_CACHE_BYTES = Gauge('entity_cache_bytes', 'Approximate bytes held by the entity cache', multiprocess_mode='livesum')
+ENTITY_CACHE_ENTRIES = Gauge('entity_cache_entries', 'Number of entries held by the entity cache', multiprocess_mode='livesum')
+
+
+class CacheEntry:
+    """A cached entity document and the storage version it was decoded from"""
+
+    __slots__ = ("data", "object_name", "etag", "size", "stored_at")
+
+    def __init__(self, data: Dict[str, Any], object_name: str, etag: Optional[str], size: int):
+        self.data = data
+        self.object_name = object_name
+        self.etag = etag
+        self.size = size
+        self.stored_at = time.monotonic()
+
+
+class EntityCache:
+    """
+    LRU cache of decoded entity documents bounded by a byte budget.
+
+    With ttl_seconds > 0 an entry younger than the TTL is trusted without
+    contacting MinIO; otherwise the caller revalidates it against the
+    object's current ETag before use.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float = 0.0):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def lookup(self, did: str) -> Optional[CacheEntry]:
+        """Return the entry for a DID without counting it as a hit or miss"""
+        with self._lock:
+            entry = self._entries.get(did)
+            if entry is not None:
+                self._entries.move_to_end(did)
+            return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Whether the entry may be served without revalidation"""
+        return self.ttl_seconds > 0 and time.monotonic() - entry.stored_at < self.ttl_seconds
+
+    def put(self, did: str, data: Dict[str, Any], object_name: str, etag: Optional[str], size: int) -> None:
+        """Insert or replace the cached document for a DID"""
+        if not self.enabled or size > self.max_bytes:
+            self.invalidate(did)
+            return
+
+        entry = CacheEntry(copy.deepcopy(data), object_name, etag, size)
+        with self._lock:
+            previous = self._entries.pop(did, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[did] = entry
+            self._bytes += size
+
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                ENTITY_CACHE_EVICTIONS.inc()
+            self._update_gauges()
+
+    def touch(self, did: str) -> None:
+        """Restart the TTL window of an entry after a successful revalidation"""
+        with self._lock:
+            entry = self._entries.get(did)
+            if entry is not None:
+                entry.stored_at = time.monotonic()
+
+    def invalidate(self, did: str) -> None:
+        """Drop the cached document for a DID, if any"""
+        with self._lock:
+            entry = self._entries.pop(did, None)
+            if entry is not None:
+                self._bytes -= entry.size
+                self._update_gauges()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._update_gauges()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+    def _update_gauges(self) -> None:
+        ENTITY_CACHE_BYTES.set(self._bytes)
+        ENTITY_CACHE_ENTRIES.set(len(self._entries))
@@ -0,0 +1,50 @@
+"""
+Gunicorn settings for running the gateway with several uvicorn workers.
+
+    PROMETHEUS_MULTIPROC_DIR=/run/educhain/metrics \
+    GATEWAY_STATE_DIR=/run/educhain/state \
+    gunicorn -c gunicorn.conf.py main:app
+
+Each worker does its own setup (log writer, HTTP clients, job workers, worker
+bus) in the FastAPI startup hook, so the app can also be preloaded in the
+master.
+
+Workers share health, cache invalidations and Idempotency-Key responses
+through GATEWAY_STATE_DIR, so it is required for more than one worker.
+"""
+
+import glob
+import multiprocessing
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '1318')}"
+workers = int(os.environ.get("GATEWAY_WORKERS", multiprocessing.cpu_count()))
+if workers > 1 and not os.environ.get("GATEWAY_STATE_DIR"):
+    # A retried write reaching another worker would otherwise run again
+    raise RuntimeError("GATEWAY_STATE_DIR must be set to run more than one worker (or set GATEWAY_WORKERS=1)")
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.environ.get("GATEWAY_WORKER_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+preload_app = os.environ.get("GATEWAY_PRELOAD", "false").lower() == "true"
+
+
+def on_starting(server):
+    """Clear metric files and worker sockets left behind by a previous run"""
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(multiproc_dir, "*.db")):
+            os.unlink(path)
+
+    state_dir = os.environ.get("GATEWAY_STATE_DIR")
+    if state_dir:
+        shutil.rmtree(os.path.join(state_dir, "bus"), ignore_errors=True)
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
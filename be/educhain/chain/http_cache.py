@@ -0,0 +1,160 @@
+"""
+HTTP caching support for GET endpoints.
+
+Chain-derived responses (validators, node metrics, DID documents) only change
+when a new block is committed, so their validator is the current block
+height: a conditional request can be answered with 304 after a single,
+briefly cached height lookup instead of the full upstream round trip.
+Responses built from stored entities are validated by a hash of their body.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from prometheus_client import Counter
+
+RESPONSE_CACHE_RESULTS = Counter(
+    'response_cache_results_total',
+    'GET responses by cache policy and result',
+    ['policy', 'result']
+)
+
+
+def height_etag(height: int) -> str:
+    return f'W/"h{height}"'
+
+
+def content_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def http_date(block_time: Optional[str]) -> Optional[str]:
+    """Format an RFC 3339 block time (nanosecond precision) as an HTTP date"""
+    if not block_time:
+        return None
+    try:
+        seconds = block_time.rstrip("Z").split(".")[0]
+        value = datetime.strptime(seconds, "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    return format_datetime(value, usegmt=True)
+
+
+class ChainHead:
+    """Latest block height and time, refreshed at most once per ttl_seconds"""
+
+    def __init__(self, fetch: Callable[[], Awaitable[Tuple[int, str]]], ttl_seconds: float = 1.0):
+        self._fetch = fetch
+        self.ttl_seconds = ttl_seconds
+        self.height: Optional[int] = None
+        self.block_time: Optional[str] = None
+        self._fetched_at = 0.0
+        self._pending: Optional[asyncio.Future] = None
+
+    async def current(self) -> Tuple[int, str]:
+        """Return (height, block time), sharing one upstream call between concurrent callers"""
+        if self.height is not None and time.monotonic() - self._fetched_at < self.ttl_seconds:
+            return self.height, self.block_time
+        if self._pending is None:
+            self._pending = asyncio.ensure_future(self._refresh())
+        pending = self._pending
+        try:
+            return await asyncio.shield(pending)
+        finally:
+            if pending.done() and self._pending is pending:
+                self._pending = None
+
+    async def _refresh(self) -> Tuple[int, str]:
+        height, block_time = await self._fetch()
+        self.height, self.block_time = height, block_time
+        self._fetched_at = time.monotonic()
+        return height, block_time
+
+
+class CachedResponse:
+    """A stored 200 response and the block height it was produced at"""
+
+    __slots__ = ("body", "headers", "height", "stored_at")
+
+    def __init__(self, body: bytes, headers: Dict[str, str], height: int):
+        self.body = body
+        self.headers = headers
+        self.height = height
+        self.stored_at = time.monotonic()
+
+
+class ResponseCache:
+    """LRU of chain-derived responses keyed by URL"""
+
+    def __init__(self, max_entries: int = 1000, stale_while_revalidate: float = 0.0):
+        self.max_entries = max_entries
+        self.stale_while_revalidate = stale_while_revalidate
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: str, height: int) -> Tuple[Optional[CachedResponse], bool]:
+        """
+        Return (entry, stale) for a URL at the given height.
+
+        A fresh entry was produced at the current height; a stale one at an
+        older height, still within the stale-while-revalidate window.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, False
+        self._entries.move_to_end(key)
+        if entry.height >= height:
+            return entry, False
+        if self.stale_while_revalidate > 0 and time.monotonic() - entry.stored_at < self.stale_while_revalidate:
+            return entry, True
+        return None, False
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        previous = self._entries.get(key)
+        if previous is not None and previous.height > entry.height:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def refresh(self, key: str, load: Callable[[], Awaitable[Any]]) -> None:
+        """Run load() in the background unless a refresh of this key is already running"""
+        if key in self._refreshing:
+            return
+        task = asyncio.ensure_future(load())
+        self._refreshing[key] = task
+        task.add_done_callback(lambda done: self._finish_refresh(key, done))
+
+    def _finish_refresh(self, key: str, task: asyncio.Task) -> None:
+        self._refreshing.pop(key, None)
+        if not task.cancelled():
+            # Failures were logged by the request path; keep them off the loop's handler
+            task.exception()
+
+    def clear(self) -> None:
+        self._entries.clear()
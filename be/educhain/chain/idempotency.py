@@ -0,0 +1,330 @@
+"""
+Idempotency-Key support for write endpoints.
+
+Final responses are remembered per key in a bounded, TTL-limited store so a
+client retrying a request gets the original response back instead of running
+the chain write again. Callers pass keys already scoped to the client, method
+and path, since clients choose their keys freely. Concurrent requests with the same key wait for the
+first one to finish and then share its response.
+
+IdempotencyStore keeps responses in process memory. SharedIdempotencyStore
+keeps them in a SQLite file under GATEWAY_STATE_DIR, so the guarantee holds
+across the gateway's worker processes.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from prometheus_client import Counter
+
+IDEMPOTENCY_REQUESTS = Counter(
+    'idempotency_requests_total',
+    'Requests carrying an Idempotency-Key by outcome',
+    ['outcome']
+)
+
+
+class StoredResponse:
+    """Status, headers and body of a completed request"""
+
+    __slots__ = ("fingerprint", "status_code", "headers", "body", "stored_at")
+
+    def __init__(self, fingerprint: str, status_code: int, headers: Dict[str, str], body: bytes):
+        self.fingerprint = fingerprint
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.stored_at = time.monotonic()
+
+
+class IdempotencyKeyReused(Exception):
+    """The key was already used with a different request body"""
+
+
+class IdempotencyStore:
+    """Bounded LRU of final responses keyed by idempotency key"""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._responses: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._inflight: Dict[str, Tuple[str, asyncio.Future]] = {}
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def close(self) -> None:
+        pass
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        stored = self._responses.get(key)
+        if stored is None:
+            return None
+        if time.monotonic() - stored.stored_at > self.ttl_seconds:
+            del self._responses[key]
+            return None
+        self._responses.move_to_end(key)
+        return stored
+
+    def put(self, key: str, response: StoredResponse) -> None:
+        self._responses[key] = response
+        self._responses.move_to_end(key)
+        while len(self._responses) > self.max_entries:
+            self._responses.popitem(last=False)
+
+    async def execute(
+        self,
+        key: str,
+        fingerprint: str,
+        run: Callable[[], Awaitable[StoredResponse]],
+        cacheable: Callable[[StoredResponse], bool] = lambda response: response.status_code < 500 and response.status_code != 429
+    ) -> Tuple[StoredResponse, bool]:
+        """
+        Run a request at most once per key.
+
+        Returns the response and whether it was replayed rather than executed
+        by this call. Raises IdempotencyKeyReused if the key was first used
+        with a different fingerprint.
+        """
+        stored = self.get(key)
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                IDEMPOTENCY_REQUESTS.labels("mismatch").inc()
+                raise IdempotencyKeyReused(key)
+            IDEMPOTENCY_REQUESTS.labels("replayed").inc()
+            return stored, True
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            inflight_fingerprint, future = inflight
+            if inflight_fingerprint != fingerprint:
+                IDEMPOTENCY_REQUESTS.labels("mismatch").inc()
+                raise IdempotencyKeyReused(key)
+            IDEMPOTENCY_REQUESTS.labels("collapsed").inc()
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (fingerprint, future)
+        try:
+            response, replayed = await self._run_once(key, fingerprint, run, cacheable)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; mark the exception as retrieved
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        future.set_result(response)
+        return response, replayed
+
+    async def _run_once(
+        self,
+        key: str,
+        fingerprint: str,
+        run: Callable[[], Awaitable[StoredResponse]],
+        cacheable: Callable[[StoredResponse], bool]
+    ) -> Tuple[StoredResponse, bool]:
+        """Run the request this process is the only one running for the key"""
+        response = await run()
+        if cacheable(response):
+            self.put(key, response)
+        IDEMPOTENCY_REQUESTS.labels("executed").inc()
+        return response, False
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS idempotency (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    status_code INTEGER,
+    headers TEXT,
+    body BLOB,
+    owner INTEGER,
+    stored_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idempotency_age ON idempotency (stored_at);
+"""
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedIdempotencyStore(IdempotencyStore):
+    """
+    Idempotency store shared by the worker processes of one host.
+
+    A key is claimed in the database (a row without a status code) before
+    its request runs. A retry that reaches another worker meanwhile polls
+    until the response is stored and then replays it. Claims of a process
+    that died, or older than claim_timeout, are taken over.
+    """
+
+    # Completed rows beyond max_entries are pruned every this many puts
+    PRUNE_EVERY = 100
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 10000,
+        ttl_seconds: float = 24 * 3600,
+        poll_interval: float = 0.05,
+        claim_timeout: float = 300.0
+    ):
+        super().__init__(max_entries, ttl_seconds)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.poll_interval = poll_interval
+        self.claim_timeout = claim_timeout
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._puts = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # A connection must not cross a fork, e.g. of a preloaded gunicorn master
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.executescript(_SCHEMA)
+            self._pid = os.getpid()
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM idempotency WHERE status_code IS NOT NULL"
+            ).fetchone()[0]
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT fingerprint, status_code, headers, body, stored_at FROM idempotency "
+                "WHERE key = ? AND status_code IS NOT NULL", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[4] > self.ttl_seconds:
+            return None
+        return StoredResponse(row[0], row[1], json.loads(row[2]), row[3])
+
+    def put(self, key: str, response: StoredResponse) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO idempotency (key, fingerprint, status_code, headers, body, owner, stored_at) "
+                "VALUES (?, ?, ?, ?, ?, NULL, ?)",
+                (key, response.fingerprint, response.status_code, json.dumps(response.headers), response.body, time.time())
+            )
+            self._puts += 1
+            if self._puts % self.PRUNE_EVERY == 0:
+                self._prune(conn)
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM idempotency WHERE stored_at < ?", (time.time() - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM idempotency WHERE key IN (SELECT key FROM idempotency WHERE status_code IS NOT NULL "
+            "ORDER BY stored_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,)
+        )
+
+    def _claim(self, key: str, fingerprint: str) -> Union[bool, StoredResponse]:
+        """
+        Claim the key for this process. Returns True once claimed, False while
+        another live process holds it, or its stored response.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT fingerprint, status_code, headers, body, owner, stored_at FROM idempotency WHERE key = ?",
+                    (key,)
+                ).fetchone()
+                stale = row is not None and (
+                    now - row[5] > (self.ttl_seconds if row[1] is not None else self.claim_timeout)
+                    # Only one request per key runs in this process, so an own claim is left over
+                    or (row[1] is None and (row[4] == os.getpid() or not _process_alive(row[4])))
+                )
+                if row is not None and not stale:
+                    conn.execute("COMMIT")
+                    if row[0] != fingerprint:
+                        raise IdempotencyKeyReused(key)
+                    if row[1] is None:
+                        return False
+                    return StoredResponse(row[0], row[1], json.loads(row[2]), row[3])
+                conn.execute(
+                    "INSERT OR REPLACE INTO idempotency (key, fingerprint, owner, stored_at) VALUES (?, ?, ?, ?)",
+                    (key, fingerprint, os.getpid(), now)
+                )
+                conn.execute("COMMIT")
+            except IdempotencyKeyReused:
+                raise
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def _release(self, key: str) -> None:
+        """Drop this process's claim without storing a response"""
+        with self._lock:
+            self._connection().execute(
+                "DELETE FROM idempotency WHERE key = ? AND status_code IS NULL AND owner = ?", (key, os.getpid())
+            )
+
+    async def _run_once(
+        self,
+        key: str,
+        fingerprint: str,
+        run: Callable[[], Awaitable[StoredResponse]],
+        cacheable: Callable[[StoredResponse], bool]
+    ) -> Tuple[StoredResponse, bool]:
+        while True:
+            try:
+                claimed = await asyncio.to_thread(self._claim, key, fingerprint)
+            except IdempotencyKeyReused:
+                IDEMPOTENCY_REQUESTS.labels("mismatch").inc()
+                raise
+            if isinstance(claimed, StoredResponse):
+                IDEMPOTENCY_REQUESTS.labels("replayed").inc()
+                return claimed, True
+            if claimed:
+                break
+            # Another worker is running the request; wait for its response
+            await asyncio.sleep(self.poll_interval)
+
+        try:
+            response = await run()
+        except BaseException:
+            await asyncio.shield(asyncio.to_thread(self._release, key))
+            raise
+        if cacheable(response):
+            await asyncio.to_thread(self.put, key, response)
+        else:
+            await asyncio.to_thread(self._release, key)
+        IDEMPOTENCY_REQUESTS.labels("executed").inc()
+        return response, False
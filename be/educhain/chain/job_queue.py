@@ -0,0 +1,317 @@
+"""
+Durable job queue for on-chain DID operations.
+
+Jobs live in a local SQLite database in WAL mode and are drained by a pool of
+asyncio workers. A job records a checkpoint after each completed step, so a
+retry (or a restart after a crash) resumes after the last finished step
+instead of repeating it - for example a DID already registered on chain is
+not registered again, only its pending hash update is retried.
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from tracing import tracer
+
+logger = logging.getLogger("educhain-api.jobs")
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    operation TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    checkpoint TEXT NOT NULL DEFAULT '{}',
+    result TEXT,
+    error TEXT,
+    locked_by TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+"""
+
+
+class Job:
+    """A claimed job and its step checkpoints"""
+
+    def __init__(self, queue: "JobQueue", row: sqlite3.Row):
+        self.queue = queue
+        self.id = row["id"]
+        self.operation = row["operation"]
+        self.payload = json.loads(row["payload"])
+        self.attempts = row["attempts"]
+        self.max_attempts = row["max_attempts"]
+        self.checkpoint: Dict[str, Any] = json.loads(row["checkpoint"])
+
+    async def step(self, name: str, fn: Callable[[], Any]) -> Any:
+        """Run a step once; later attempts return the checkpointed result"""
+        if name in self.checkpoint:
+            return self.checkpoint[name]
+        result = fn()
+        if inspect.isawaitable(result):
+            result = await result
+        self.checkpoint[name] = result
+        await asyncio.to_thread(self.queue.save_checkpoint, self.id, self.checkpoint)
+        return result
+
+
+async def run_step(job: Optional[Job], name: str, fn: Callable[[], Any]) -> Any:
+    """Run a step through the job's checkpoints, or directly outside a job"""
+    with tracer.span(f"step:{name}"):
+        if job is not None:
+            return await job.step(name, fn)
+        result = fn()
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+
+def _owner_alive(locked_by: Optional[str]) -> bool:
+    """Whether the worker process that claimed a job (locked_by "<pid>-<n>") is still running"""
+    try:
+        pid = int((locked_by or "").split("-")[0])
+    except ValueError:
+        return False
+    if pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """SQLite-backed queue of jobs with retries and checkpoints"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def enqueue(self, operation: str, payload: Dict[str, Any], max_attempts: int = 5) -> str:
+        """Persist a new job and return its id"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, operation, payload, status, max_attempts, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, operation, json.dumps(payload), PENDING, max_attempts, now, now, now)
+            )
+        return job_id
+
+    def claim(self, worker_id: str) -> Optional[Job]:
+        """Atomically take the oldest ready job, marking it running"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? AND available_at <= ? ORDER BY available_at LIMIT 1",
+                    (PENDING, now)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, locked_by = ?, updated_at = ? WHERE id = ?",
+                    (RUNNING, worker_id, now, row["id"])
+                )
+                row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return Job(self, row)
+
+    def save_checkpoint(self, job_id: str, checkpoint: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET checkpoint = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(checkpoint), time.time(), job_id)
+            )
+
+    def complete(self, job_id: str, result: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, locked_by = NULL, updated_at = ? WHERE id = ?",
+                (SUCCEEDED, json.dumps(result), time.time(), job_id)
+            )
+
+    def fail(self, job_id: str, error: str, retry_in: Optional[float]) -> None:
+        """Record a failed attempt; the job is retried after retry_in seconds, or fails for good if None"""
+        now = time.time()
+        with self._lock:
+            if retry_in is None:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, locked_by = NULL, updated_at = ? WHERE id = ?",
+                    (FAILED, error, now, job_id)
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, locked_by = NULL, available_at = ?, updated_at = ? WHERE id = ?",
+                    (PENDING, error, now + retry_in, now, job_id)
+                )
+
+    def recover(self) -> int:
+        """Return jobs left running by a process that no longer exists to the queue"""
+        with self._lock:
+            rows = self._conn.execute("SELECT id, locked_by FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+            stale = [row["id"] for row in rows if not _owner_alive(row["locked_by"])]
+            for job_id in stale:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, locked_by = NULL, updated_at = ? WHERE id = ?",
+                    (PENDING, time.time(), job_id)
+                )
+            return len(stale)
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs last updated more than older_than seconds ago"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (SUCCEEDED, FAILED, time.time() - older_than)
+            )
+            return cursor.rowcount
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "operation": row["operation"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "max_attempts": row["max_attempts"],
+            "completed_steps": list(json.loads(row["checkpoint"]).keys()),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+class JobWorkerPool:
+    """Asyncio workers draining a JobQueue with exponential retry backoff"""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Dict[str, Callable[[Job], Awaitable[Any]]],
+        workers: int = 4,
+        poll_interval: float = 1.0,
+        backoff_base: float = 1.0,
+        backoff_max: float = 300.0,
+        retention_seconds: float = 7 * 24 * 3600
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retention_seconds = retention_seconds
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks = []
+        self._stopping = False
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        recovered = await asyncio.to_thread(self.queue.recover)
+        if recovered:
+            logger.info("Requeued %d interrupted jobs", recovered)
+        purged = await asyncio.to_thread(self.queue.purge, self.retention_seconds)
+        if purged:
+            logger.info("Purged %d finished jobs", purged)
+        self._tasks = [asyncio.create_task(self._run(f"{os.getpid()}-{n}")) for n in range(self.workers)]
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake idle workers after a job was enqueued"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _retry_delay(self, attempts: int) -> float:
+        return min(self.backoff_base * (2 ** (attempts - 1)), self.backoff_max)
+
+    async def _run(self, worker_id: str) -> None:
+        while not self._stopping:
+            job = await asyncio.to_thread(self.queue.claim, worker_id)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(job)
+
+    async def _execute(self, job: Job) -> None:
+        handler = self.handlers.get(job.operation)
+        if handler is None:
+            await asyncio.to_thread(self.queue.fail, job.id, f"Unknown operation {job.operation}", None)
+            return
+
+        try:
+            with tracer.start_trace(f"job:{job.operation}", job_id=job.id, attempt=job.attempts):
+                result = await handler(job)
+        except asyncio.CancelledError:
+            # Shutdown mid-job: leave it for recover() on the next start
+            raise
+        except Exception as e:
+            error = str(getattr(e, "detail", None) or e)
+            retry_in = self._retry_delay(job.attempts) if job.attempts < job.max_attempts else None
+            if retry_in is None:
+                logger.error("Job %s (%s) failed after %d attempts: %s", job.id, job.operation, job.attempts, error)
+            else:
+                logger.warning("Job %s (%s) attempt %d failed, retrying in %.1fs: %s",
+                               job.id, job.operation, job.attempts, retry_in, error)
+            await asyncio.to_thread(self.queue.fail, job.id, error, retry_in)
+            return
+
+        await asyncio.to_thread(self.queue.complete, job.id, result)
@@ -0,0 +1,173 @@
+"""
+Non-blocking logging for the gateway.
+
+Log calls on the event loop only put the record on a bounded in-memory queue;
+a background QueueListener thread, started per process, formats it (as one JSON object per line, or
+as plain text) and writes it to the console and the rotating log file. Records
+are enqueued unformatted, so %-style arguments are only rendered by the
+writer thread. High-volume INFO messages can be sampled per logger; warnings
+and errors are always kept.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] [%(name)s] %(message)s"
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including fields passed through extra="""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of the records at INFO and below from selected loggers.
+
+    Rates apply to a logger and its children; the most specific name wins.
+    Sampling is deterministic (every n-th record) so rare messages are not
+    lost to bad luck.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def rate_for(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        rate = self.rate_for(record.name)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        every = round(1 / rate)
+        with self._lock:
+            count = self._counters.get(record.name, 0)
+            self._counters[record.name] = count + 1
+        return count % every == 0
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Enqueue records as they are, dropping them when the queue is full"""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener runs in this process, so the record needs no pickling
+        # and formatting is left to the writer thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_sample_rates(value: Optional[str]) -> Dict[str, float]:
+    """Parse "logger=rate,other.logger=rate" into a dict"""
+    rates = {}
+    for item in (value or "").split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+class LogPipeline:
+    """The queue handler installed on the root logger and its writer thread"""
+
+    def __init__(self, handlers: List[logging.Handler], sample_rates: Dict[str, float], queue_size: int):
+        self.queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size)
+        self.handler = NonBlockingQueueHandler(self.queue)
+        if sample_rates:
+            self.handler.addFilter(SamplingFilter(sample_rates))
+        self.handlers = handlers
+        self.listener: Optional[QueueListener] = None
+        self._pid: Optional[int] = None
+
+    def start(self) -> None:
+        """Start the writer thread in this process; records logged before then wait on the queue"""
+        if self.listener is not None and self._pid == os.getpid():
+            return
+        # Threads do not survive fork(), so a listener inherited from the parent is replaced
+        self.listener = QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+        self._pid = os.getpid()
+
+    def stop(self) -> None:
+        """Flush queued records and stop the writer thread"""
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+        self.listener = None
+
+
+def configure_logging(
+    log_file: Optional[str],
+    max_bytes: int,
+    backup_count: int,
+    json_format: bool = True,
+    sample_rates: Optional[Dict[str, float]] = None,
+    queue_size: int = 10000,
+    level: int = logging.INFO
+) -> LogPipeline:
+    """
+    Route all logging through a queue and return the pipeline.
+
+    The writer thread is not started here: call start() in every process that
+    logs (the gateway does it in its startup hook, so each forked worker runs
+    its own writer).
+    """
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    pipeline = LogPipeline(handlers, sample_rates or {}, queue_size)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(pipeline.handler)
+    root.setLevel(level)
+
+    atexit.register(pipeline.stop)
+    return pipeline
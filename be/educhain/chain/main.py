@@ -6,7 +6,8 @@ This replaces the Go implementation with a Python-based FastAPI version
 
 from fastapi import FastAPI, HTTPException, Request, Path, Query, Body, Depends, BackgroundTasks, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 import httpx
 import uvicorn
 import os
@@ -14,52 +15,103 @@ import sys
 import subprocess
 import json
 import hashlib
+import hmac
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Union
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple, Union
 import logging
-from logging.handlers import RotatingFileHandler
 import asyncio
 import time
 import psutil
-from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
-from pydantic import BaseModel, Field, validator, root_validator
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, REGISTRY, generate_latest, multiprocess, CONTENT_TYPE_LATEST
+from pydantic import BaseModel, Field, ValidationError, validator, root_validator
 import uuid
 from minio import Minio
 from minio.error import S3Error
+import urllib3
 import base64
 from enum import Enum
 import re
 import io
+import copy
+import contextvars
+import gc
+from contextlib import contextmanager
 
 # Thêm thư mục hiện tại vào PYTHONPATH để import được các module
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from models.did_models import *
 from routes.did_routes import router as did_router
+from entity_cache import EntityCache, ENTITY_CACHE_REQUESTS, ENTITY_CACHE_REVALIDATIONS
+from relationship_store import RelationshipStore, relationship_name
+from relationship_graph import RelationshipGraph
+from job_queue import Job, JobQueue, JobWorkerPool, run_step
+from idempotency import IdempotencyStore, IdempotencyKeyReused, SharedIdempotencyStore, StoredResponse
+from cluster_state import SharedHealthState, StripedLock, WorkerBus
+from upstream import UpstreamPool, parse_endpoints, tendermint_height, cosmos_rest_height
+from admission import AdmissionController, LaneConfig, Rejected, retry_after_header
+from projection import FieldSelection
+from log_pipeline import configure_logging, parse_sample_rates
+from tracing import InMemoryExporter, FileExporter, tracer, traced
+from dependency_metrics import record_retry, set_pool_size, track_dependency
+from profiler import dump_tasks, format_collapsed, sample_stacks
+from loop_monitor import LoopMonitor
+from memory_stats import GCMonitor, TracemallocSession, record_container_sizes
+from http_cache import (
+    ChainHead, CachedResponse, ResponseCache, RESPONSE_CACHE_RESULTS,
+    content_etag, etag_matches, height_etag, http_date
+)
 
 # Configure advanced logging
 LOG_FILE = os.getenv("LOG_FILE", "/var/log/fastapi_detailed.log")
 MAX_LOG_SIZE = 10 * 1024 * 1024  # 10 MB
 BACKUP_COUNT = 5
 
-# Set up rotating file handler
-file_handler = RotatingFileHandler(
+# "json" for one JSON object per line, "text" for the classic format
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+# Fraction of INFO records kept per logger, e.g. "educhain-api.entities=0.1,httpx=0.01"
+LOG_SAMPLE_RATES = parse_sample_rates(
+    os.getenv("LOG_SAMPLE_RATES", "educhain-api.entities=0.1,educhain-api.health=0.1,httpx=0.1")
+)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Log calls only enqueue records; a background thread, started in each worker's startup hook, writes them
+log_pipeline = configure_logging(
     LOG_FILE,
-    maxBytes=MAX_LOG_SIZE,
-    backupCount=BACKUP_COUNT
+    MAX_LOG_SIZE,
+    BACKUP_COUNT,
+    json_format=LOG_FORMAT == "json",
+    sample_rates=LOG_SAMPLE_RATES,
+    queue_size=LOG_QUEUE_SIZE
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] [%(name)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        file_handler
-    ]
+# Span tracing: "memory" keeps recent traces for /api/v1/traces, "file" appends JSON lines to TRACE_FILE
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")
+TRACE_FILE = os.getenv("TRACE_FILE", "/var/log/educhain_traces.jsonl")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+# Requests slower than this log their span breakdown; 0 disables the slow-request log
+SLOW_REQUEST_THRESHOLD_MS = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "1000"))
+SLOW_REQUEST_LOG_SAMPLE_RATE = float(os.getenv("SLOW_REQUEST_LOG_SAMPLE_RATE", "1.0"))
+# Probe and scrape traffic would only crowd out the traces worth keeping
+TRACE_EXEMPT_PATHS = {"/api/v1/live", "/api/v1/ready", "/api/v1/prometheus", "/api/v1/admin/profile"}
+
+if TRACE_EXPORTER == "memory":
+    trace_exporter = InMemoryExporter()
+elif TRACE_EXPORTER == "file":
+    trace_exporter = FileExporter(TRACE_FILE)
+else:
+    trace_exporter = None
+tracer.configure(
+    exporter=trace_exporter,
+    sample_rate=TRACE_SAMPLE_RATE,
+    slow_threshold_ms=SLOW_REQUEST_THRESHOLD_MS or None,
+    slow_log_sample_rate=SLOW_REQUEST_LOG_SAMPLE_RATE
 )
 
 logger = logging.getLogger("educhain-api")
+# High-volume success messages go to child loggers so they can be sampled
+entity_logger = logging.getLogger("educhain-api.entities")
+health_logger = logging.getLogger("educhain-api.health")
 
 # Constants
 COSMOS_REST_API = os.environ.get("COSMOS_REST_API", "http://localhost:1317")
@@ -76,35 +128,63 @@ MINIO_SECRET_KEY = os.environ.get("MINIO_SECRET_KEY", "minioadmin")
 MINIO_SECURE = os.environ.get("MINIO_SECURE", "false").lower() == "true"
 MINIO_BUCKET = os.environ.get("MINIO_BUCKET", "educhain-entities")
 
-# Initialize MinIO client
-try:
-    minio_client = Minio(
-        MINIO_ENDPOINT,
-        access_key=MINIO_ACCESS_KEY,
-        secret_key=MINIO_SECRET_KEY,
-        secure=MINIO_SECURE
-    )
-    
-    # Create bucket if it doesn't exist
-    if not minio_client.bucket_exists(MINIO_BUCKET):
-        minio_client.make_bucket(MINIO_BUCKET)
-        logger.info(f"Created MinIO bucket: {MINIO_BUCKET}")
-    logger.info("MinIO client initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize MinIO client: {str(e)}")
-    minio_client = None
+# Entity cache configuration (a TTL of 0 revalidates every read with an ETag check)
+ENTITY_CACHE_MAX_BYTES = int(os.environ.get("ENTITY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+ENTITY_CACHE_TTL_SECONDS = float(os.environ.get("ENTITY_CACHE_TTL_SECONDS", "0"))
+
+# Conditional entity writes retry this many times on a version conflict
+ENTITY_WRITE_MAX_RETRIES = int(os.environ.get("ENTITY_WRITE_MAX_RETRIES", "3"))
+ENTITY_WRITE_RETRY_BACKOFF = float(os.environ.get("ENTITY_WRITE_RETRY_BACKOFF", "0.05"))
+
+# Dependencies are connected in the background after startup; failed attempts
+# are retried with exponential backoff up to this delay
+DEPENDENCY_RETRY_INITIAL = float(os.environ.get("DEPENDENCY_RETRY_INITIAL", "0.5"))
+DEPENDENCY_RETRY_MAX = float(os.environ.get("DEPENDENCY_RETRY_MAX", "30"))
+MINIO_CONNECT_TIMEOUT = float(os.environ.get("MINIO_CONNECT_TIMEOUT", "3"))
+# Connections the Minio client's default urllib3 pool keeps per host
+MINIO_POOL_SIZE = 10
+# Connections of the HTTP client shared by all node upstreams
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+
+# Diagnostics under /api/v1/admin/ need this token in X-Admin-Token; they are disabled without one
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+PROFILE_MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", "60"))
+
+# Event-loop lag sampling interval, and how long a callback may hold the loop before its stack is logged
+LOOP_MONITOR_ENABLED = os.environ.get("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_LAG_INTERVAL = float(os.environ.get("LOOP_LAG_INTERVAL", "0.25"))
+LOOP_BLOCK_THRESHOLD_MS = float(os.environ.get("LOOP_BLOCK_THRESHOLD_MS", "100"))
+
+# MinIO client, set by init_minio() once the bucket is known to exist
+minio_client: Optional[Minio] = None
+
+# Read-through cache of decoded entity documents
+entity_cache = EntityCache(ENTITY_CACHE_MAX_BYTES, ENTITY_CACHE_TTL_SECONDS)
+
+# Adjacency store for links between DIDs, set together with minio_client
+relationship_store: Optional[RelationshipStore] = None
+
+# In-memory adjacency index over the relationship store for traversal queries
+relationship_graph = RelationshipGraph()
+
+
+# Multi-worker mode: metrics are aggregated from per-process files in this
+# directory and workers share health and invalidations through GATEWAY_STATE_DIR
+PROMETHEUS_MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+GATEWAY_STATE_DIR = os.environ.get("GATEWAY_STATE_DIR")
 
 # Create Prometheus metrics
 REQUEST_COUNT = Counter('http_requests_total', 'Total HTTP Requests', ['method', 'endpoint', 'status'])
 REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'HTTP Request Latency', ['method', 'endpoint'])
-NODE_HEIGHT = Gauge('node_latest_block_height', 'Latest Block Height')
-NODE_PEERS = Gauge('node_connected_peers', 'Number of Connected Peers')
-API_UP = Gauge('api_up', 'API is up and running')
-SYSTEM_MEMORY = Gauge('system_memory_usage_bytes', 'System Memory Usage in Bytes')
-SYSTEM_CPU = Gauge('system_cpu_usage_percent', 'System CPU Usage Percentage')
-TENDERMINT_UP = Gauge('tendermint_up', 'Tendermint is up and running')
-COSMOS_REST_UP = Gauge('cosmos_rest_up', 'Cosmos REST API is up and running')
-WASMD_UP = Gauge('wasmd_up', 'wasmd is up and running')
+NODE_HEIGHT = Gauge('node_latest_block_height', 'Latest Block Height', multiprocess_mode='livemax')
+NODE_PEERS = Gauge('node_connected_peers', 'Number of Connected Peers', multiprocess_mode='livemax')
+API_UP = Gauge('api_up', 'API is up and running', multiprocess_mode='livemax')
+SYSTEM_MEMORY = Gauge('system_memory_usage_bytes', 'System Memory Usage in Bytes', multiprocess_mode='livemax')
+SYSTEM_CPU = Gauge('system_cpu_usage_percent', 'System CPU Usage Percentage', multiprocess_mode='livemax')
+TENDERMINT_UP = Gauge('tendermint_up', 'Tendermint is up and running', multiprocess_mode='livemax')
+COSMOS_REST_UP = Gauge('cosmos_rest_up', 'Cosmos REST API is up and running', multiprocess_mode='livemax')
+WASMD_UP = Gauge('wasmd_up', 'wasmd is up and running', multiprocess_mode='livemax')
+ENTITY_WRITE_CONFLICTS = Counter('entity_write_conflicts_total', 'Entity writes retried after a version conflict')
 
 # Create FastAPI app
 app = FastAPI(
@@ -113,8 +193,6 @@ app = FastAPI(
     version="1.0.0",
 )
 
-app.include_router(did_router)
-
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -129,8 +207,138 @@ TENDERMINT_RPC_URL = os.getenv("TENDERMINT_RPC_URL", "http://localhost:26657")
 COSMOS_REST_URL = os.getenv("COSMOS_REST_URL", "http://localhost:1317")
 WASMD_HOME = os.getenv("DAEMON_HOME", "/root/.wasmd")
 
-# Last successful health check timestamp
-last_successful_health_check = None
+# Node endpoints may be given as comma-separated lists; requests are routed to
+# the fastest endpoint that is not lagging more than UPSTREAM_MAX_HEIGHT_LAG blocks
+UPSTREAM_MAX_HEIGHT_LAG = int(os.getenv("UPSTREAM_MAX_HEIGHT_LAG", "5"))
+UPSTREAM_FAILURE_THRESHOLD = int(os.getenv("UPSTREAM_FAILURE_THRESHOLD", "5"))
+UPSTREAM_RESET_TIMEOUT = float(os.getenv("UPSTREAM_RESET_TIMEOUT", "30"))
+UPSTREAM_HEIGHT_INTERVAL = float(os.getenv("UPSTREAM_HEIGHT_INTERVAL", "5"))
+# Send a read to a second endpoint if the first has not answered within this many seconds (0 disables)
+UPSTREAM_HEDGE_AFTER = float(os.getenv("UPSTREAM_HEDGE_AFTER", "0"))
+
+def create_upstream_pool(name: str, urls: str, height_path: str, height_parser: Callable[[Dict[str, Any]], int]) -> UpstreamPool:
+    return UpstreamPool(
+        name,
+        parse_endpoints(urls),
+        height_path=height_path,
+        height_parser=height_parser,
+        max_height_lag=UPSTREAM_MAX_HEIGHT_LAG,
+        failure_threshold=UPSTREAM_FAILURE_THRESHOLD,
+        reset_timeout=UPSTREAM_RESET_TIMEOUT,
+        hedge_after=UPSTREAM_HEDGE_AFTER,
+        height_interval=UPSTREAM_HEIGHT_INTERVAL
+    )
+
+COSMOS_LATEST_BLOCK_PATH = "/cosmos/base/tendermint/v1beta1/blocks/latest"
+
+tendermint_upstream = create_upstream_pool("tendermint_rpc", TENDERMINT_RPC_URL, "/status", tendermint_height)
+cosmos_rest_upstream = create_upstream_pool("cosmos_rest", COSMOS_REST_URL, COSMOS_LATEST_BLOCK_PATH, cosmos_rest_height)
+# COSMOS_REST_API usually names the same nodes as COSMOS_REST_URL; share the pool then
+if parse_endpoints(COSMOS_REST_API) == cosmos_rest_upstream.urls:
+    cosmos_api_upstream = cosmos_rest_upstream
+else:
+    cosmos_api_upstream = create_upstream_pool("cosmos_api", COSMOS_REST_API, COSMOS_LATEST_BLOCK_PATH, cosmos_rest_height)
+
+upstream_pools = list({id(pool): pool for pool in (tendermint_upstream, cosmos_rest_upstream, cosmos_api_upstream)}.values())
+
+# Durable queue for on-chain DID operations
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "/var/lib/educhain/jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "1.0"))
+
+job_queue: Optional[JobQueue] = None
+job_pool: Optional[JobWorkerPool] = None
+
+# Responses remembered for Idempotency-Key replays
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+IDEMPOTENT_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+# With several workers a retry may reach another process, so the responses live under GATEWAY_STATE_DIR
+if GATEWAY_STATE_DIR:
+    idempotency_store = SharedIdempotencyStore(
+        os.path.join(GATEWAY_STATE_DIR, "idempotency.db"), IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_TTL_SECONDS
+    )
+else:
+    idempotency_store = IdempotencyStore(IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_TTL_SECONDS)
+
+# Admission control: each lane has per-client token buckets (requests/second
+# and burst) and a concurrency budget; excess requests get 429 with Retry-After
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_MAX_CLIENTS = int(os.getenv("ADMISSION_MAX_CLIENTS", "10000"))
+
+def admission_lane_config(lane: str, concurrency: int, rate: float, burst: float, queue_size: int, queue_timeout: float) -> LaneConfig:
+    prefix = f"ADMISSION_{lane.upper()}"
+    return LaneConfig(
+        concurrency=int(os.getenv(f"{prefix}_CONCURRENCY", str(concurrency))),
+        rate=float(os.getenv(f"{prefix}_RATE", str(rate))),
+        burst=float(os.getenv(f"{prefix}_BURST", str(burst))),
+        queue_size=int(os.getenv(f"{prefix}_QUEUE_SIZE", str(queue_size))),
+        queue_timeout=float(os.getenv(f"{prefix}_QUEUE_TIMEOUT", str(queue_timeout)))
+    )
+
+admission_controller = AdmissionController({
+    "verify": admission_lane_config("verify", concurrency=64, rate=50, burst=100, queue_size=256, queue_timeout=2.0),
+    "read": admission_lane_config("read", concurrency=32, rate=20, burst=40, queue_size=64, queue_timeout=1.0),
+    "write": admission_lane_config("write", concurrency=16, rate=5, burst=10, queue_size=32, queue_timeout=1.0),
+    "bulk": admission_lane_config("bulk", concurrency=4, rate=1, burst=2, queue_size=0, queue_timeout=0.0)
+}, max_clients=ADMISSION_MAX_CLIENTS)
+
+# Probes and monitoring are never shed
+ADMISSION_EXEMPT_PATHS = {
+    "/api/v1/live", "/api/v1/ready", "/api/v1/health", "/api/v1/prometheus",
+    "/api/v1/metrics", "/api/v1/upstreams", "/api/v1/admission"
+}
+ADMIN_PATH_PREFIX = "/api/v1/admin/"
+BULK_PATH_PATTERN = re.compile(r"^/api/v1/(dids/export|dids/?$|graph/|dids/[^/]+/graph$)")
+VERIFY_PATH_PATTERN = re.compile(r"/(verify|verification|integrity)(/|$)")
+
+def admission_lane(request: Request) -> Optional[str]:
+    """Priority lane of a request, or None if it bypasses admission control"""
+    path = request.url.path
+    if path in ADMISSION_EXEMPT_PATHS or path.startswith(ADMIN_PATH_PREFIX) or request.method == "OPTIONS":
+        return None
+    if VERIFY_PATH_PATTERN.search(path):
+        return "verify"
+    if request.method not in ("GET", "HEAD"):
+        # Writes such as POST /api/v1/dids share paths with bulk listings
+        return "write"
+    if BULK_PATH_PATTERN.match(path):
+        return "bulk"
+    return "read"
+
+def admission_client(request: Request) -> str:
+    """Identify the caller by API credentials if present, otherwise by address"""
+    credentials = request.headers.get("X-API-Key") or request.headers.get("Authorization")
+    if credentials:
+        return "key:" + hashlib.sha256(credentials.encode()).hexdigest()[:16]
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+# Last successful health check timestamp, shared by all workers on this host
+shared_health = SharedHealthState(GATEWAY_STATE_DIR)
+
+# Serialises conditional entity writes per DID across the workers on this host
+entity_write_lock = StripedLock(GATEWAY_STATE_DIR, "entities")
+
+# Broadcast channel for cache invalidations between workers on this host
+worker_bus = WorkerBus(GATEWAY_STATE_DIR)
+
+# Reports event-loop lag and logs callbacks that block the loop
+loop_monitor = LoopMonitor(LOOP_LAG_INTERVAL, LOOP_BLOCK_THRESHOLD_MS / 1000)
+
+# Times garbage collections; tracemalloc only runs while an admin has it started
+gc_monitor = GCMonitor()
+tracemalloc_session = TracemallocSession()
+
+# Readiness of each dependency, reported by /api/v1/ready
+dependency_status = {
+    "minio": False,
+    "tendermint_rpc": False,
+    "cosmos_rest": False,
+    "relationship_index": False
+}
+READINESS_DEPENDENCIES = ("minio", "tendermint_rpc")
 
 # Background task to update metrics
 async def update_metrics():
@@ -142,30 +350,29 @@ async def update_metrics():
         
         # Update node metrics
         try:
-            async with httpx.AsyncClient(timeout=3.0) as client:
-                # Check Tendermint RPC
-                response = await client.get(f"{TENDERMINT_RPC_URL}/status")
-                if response.status_code == 200:
-                    data = response.json()
-                    NODE_HEIGHT.set(int(data["result"]["sync_info"]["latest_block_height"]))
-                    TENDERMINT_UP.set(1)
-                else:
-                    TENDERMINT_UP.set(0)
+            # Check Tendermint RPC
+            response = await tendermint_upstream.get("/status", timeout=3.0)
+            if response.status_code == 200:
+                data = response.json()
+                NODE_HEIGHT.set(int(data["result"]["sync_info"]["latest_block_height"]))
+                TENDERMINT_UP.set(1)
+            else:
+                TENDERMINT_UP.set(0)
                 
-                # Check Cosmos REST API
-                response = await client.get(f"{COSMOS_REST_URL}/node_info")
-                if response.status_code == 200:
-                    COSMOS_REST_UP.set(1)
-                else:
-                    COSMOS_REST_UP.set(0)
+            # Check Cosmos REST API
+            response = await cosmos_rest_upstream.get("/node_info", timeout=3.0)
+            if response.status_code == 200:
+                COSMOS_REST_UP.set(1)
+            else:
+                COSMOS_REST_UP.set(0)
                 
-                # Check net info for peers
-                response = await client.get(f"{TENDERMINT_RPC_URL}/net_info")
-                if response.status_code == 200:
-                    data = response.json()
-                    NODE_PEERS.set(int(data["result"]["n_peers"]))
+            # Check net info for peers
+            response = await tendermint_upstream.get("/net_info", timeout=3.0)
+            if response.status_code == 200:
+                data = response.json()
+                NODE_PEERS.set(int(data["result"]["n_peers"]))
         except Exception as e:
-            logger.error(f"Error updating node metrics: {str(e)}")
+            logger.error("Error updating node metrics: %s", e)
             TENDERMINT_UP.set(0)
             COSMOS_REST_UP.set(0)
         
@@ -174,13 +381,13 @@ async def update_metrics():
             result = subprocess.run(["pgrep", "-f", "wasmd start"], capture_output=True, text=True)
             WASMD_UP.set(1 if result.returncode == 0 else 0)
         except Exception as e:
-            logger.error(f"Error checking wasmd process: {str(e)}")
+            logger.error("Error checking wasmd process: %s", e)
             WASMD_UP.set(0)
         
         # API is up
         API_UP.set(1)
     except Exception as e:
-        logger.error(f"Error in update_metrics: {str(e)}")
+        logger.error("Error in update_metrics: %s", e)
         API_UP.set(0)
 
 # Middleware to track request metrics
@@ -196,7 +403,7 @@ async def metrics_middleware(request: Request, call_next):
         status_code = response.status_code
         return response
     except Exception as e:
-        logger.error(f"Unhandled exception: {str(e)}")
+        logger.error("Unhandled exception: %s", e)
         raise
     finally:
         # Record request latency
@@ -205,59 +412,454 @@ async def metrics_middleware(request: Request, call_next):
         REQUEST_LATENCY.labels(request.method, endpoint).observe(latency)
         REQUEST_COUNT.labels(request.method, endpoint, status_code).inc()
 
+class AdmissionMiddleware:
+    """
+    Shed load per priority lane before it reaches the upstreams.
+    
+    A plain ASGI middleware rather than @app.middleware: the lane slot is
+    held until the app below has returned, so it covers streamed exports and
+    is released however the response ends, including a client that
+    disconnects before the body is sent.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ADMISSION_ENABLED:
+            return await self.app(scope, receive, send)
+        request = Request(scope)
+        lane_name = admission_lane(request)
+        if lane_name is None:
+            return await self.app(scope, receive, send)
+        
+        try:
+            lane = await admission_controller.admit(lane_name, admission_client(request))
+        except Rejected as e:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": f"Too many requests: {e}", "lane": e.lane},
+                headers={"Retry-After": retry_after_header(e.retry_after)}
+            )
+            return await response(scope, receive, send)
+        
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_controller.release(lane)
+
+# Added here so it keeps its place between the metrics and caching middleware
+app.add_middleware(AdmissionMiddleware)
+
+# HTTP caching of GET responses: chain-derived data is validated by the block
+# height, everything else by a hash of the response body
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+# Serve a response from an older block for this many seconds while it is refreshed (0 disables)
+RESPONSE_CACHE_STALE_WHILE_REVALIDATE = float(os.getenv("RESPONSE_CACHE_STALE_WHILE_REVALIDATE", "0"))
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "1"))
+CHAIN_HEAD_TTL = float(os.getenv("CHAIN_HEAD_TTL", "1.0"))
+
+NO_STORE_PATH_PATTERN = re.compile(
+    r"^/api/v1/(live|ready|health|prometheus|admission|upstreams|traces/.*|admin/.*|jobs/.*|dids/export)$"
+)
+# dids/{did} also carries the MinIO entity document, which changes between
+# blocks, so it is validated by content rather than by block height
+CHAIN_PATH_PATTERN = re.compile(r"^/api/v1/(nodeinfo|validators|metrics|blocks/latest|dids)$")
+IMMUTABLE_PATH_PATTERN = re.compile(r"^/api/v1/(blocks/\d+|transactions/[^/]+)$")
+
+async def fetch_chain_head() -> Tuple[int, str]:
+    response = await tendermint_upstream.get("/status")
+    response.raise_for_status()
+    sync_info = response.json()["result"]["sync_info"]
+    return int(sync_info["latest_block_height"]), sync_info["latest_block_time"]
+
+chain_head = ChainHead(fetch_chain_head, CHAIN_HEAD_TTL)
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_STALE_WHILE_REVALIDATE)
+
+# Set while a stale cached response is being regenerated in the background
+_refreshing_cached_response: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "refreshing_cached_response", default=False
+)
+
+def response_cache_policy(request: Request) -> Optional[str]:
+    """Cache policy of a request: chain, immutable, content or None for no caching"""
+    if request.method != "GET" or not request.url.path.startswith("/api/v1/"):
+        return None
+    path = request.url.path.rstrip("/") or "/"
+    if NO_STORE_PATH_PATTERN.match(path):
+        return None
+    if CHAIN_PATH_PATTERN.match(path):
+        return "chain"
+    if IMMUTABLE_PATH_PATTERN.match(path):
+        return "immutable"
+    return "content"
+
+def cache_control(policy: str) -> str:
+    if policy == "immutable":
+        return "public, max-age=31536000, immutable"
+    if policy == "chain":
+        value = f"public, max-age={HTTP_CACHE_MAX_AGE}"
+        if RESPONSE_CACHE_STALE_WHILE_REVALIDATE > 0:
+            value += f", stale-while-revalidate={int(RESPONSE_CACHE_STALE_WHILE_REVALIDATE)}"
+        return value
+    # Entity data may change at any time; clients revalidate against the ETag
+    return "no-cache"
+
+async def buffer_response(response: Response) -> Tuple[bytes, Dict[str, str]]:
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+    return body, headers
+
+async def refresh_cached_response(scope: Dict[str, Any]):
+    """Regenerate a chain-derived response by running the request through the app again"""
+    _refreshing_cached_response.set(True)
+    scope = dict(scope)
+    scope["headers"] = [(k, v) for k, v in scope["headers"] if k.lower() != b"if-none-match"]
+    
+    request_sent = False
+    response_complete = asyncio.Event()
+    
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Nothing more to read; report a disconnect once the response is done
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+    
+    async def send(message):
+        if message["type"] == "http.response.body" and not message.get("more_body", False):
+            response_complete.set()
+    
+    try:
+        await app(scope, receive, send)
+    except Exception as e:
+        logger.warning("Background refresh of %s failed: %s", scope.get("path"), e)
+    finally:
+        response_complete.set()
+
+async def chain_cached_response(request: Request, call_next) -> Response:
+    refreshing = _refreshing_cached_response.get()
+    try:
+        height, block_time = await chain_head.current()
+    except Exception as e:
+        logger.warning("Chain head unavailable, serving %s uncached: %s", request.url.path, e)
+        return await call_next(request)
+    
+    validators = {"ETag": height_etag(height), "Cache-Control": cache_control("chain")}
+    last_modified = http_date(block_time)
+    if last_modified:
+        validators["Last-Modified"] = last_modified
+    
+    key = str(request.url)
+    if not refreshing:
+        if etag_matches(request.headers.get("If-None-Match"), validators["ETag"]):
+            RESPONSE_CACHE_RESULTS.labels("chain", "not_modified").inc()
+            return Response(status_code=304, headers=validators)
+        
+        entry, stale = response_cache.lookup(key, height)
+        if entry is not None:
+            if stale:
+                RESPONSE_CACHE_RESULTS.labels("chain", "stale").inc()
+                response_cache.refresh(key, lambda: refresh_cached_response(request.scope))
+            else:
+                RESPONSE_CACHE_RESULTS.labels("chain", "hit").inc()
+            age = int(time.monotonic() - entry.stored_at)
+            return Response(content=entry.body, status_code=200, headers={**entry.headers, "Age": str(age)})
+    
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+    RESPONSE_CACHE_RESULTS.labels("chain", "miss").inc()
+    body, headers = await buffer_response(response)
+    headers.update(validators)
+    response_cache.put(key, CachedResponse(body, headers, height))
+    return Response(content=body, status_code=200, headers=headers)
+
+async def content_validated_response(request: Request, call_next, policy: str) -> Response:
+    response = await call_next(request)
+    if response.status_code != 200 or not response.headers.get("content-type", "").startswith("application/json"):
+        return response
+    
+    body, headers = await buffer_response(response)
+    headers["ETag"] = content_etag(body)
+    headers["Cache-Control"] = cache_control(policy)
+    if etag_matches(request.headers.get("If-None-Match"), headers["ETag"]):
+        RESPONSE_CACHE_RESULTS.labels(policy, "not_modified").inc()
+        return Response(status_code=304, headers={"ETag": headers["ETag"], "Cache-Control": headers["Cache-Control"]})
+    RESPONSE_CACHE_RESULTS.labels(policy, "miss").inc()
+    return Response(content=body, status_code=200, headers=headers)
+
+# Middleware to add validators to GET responses and answer conditional requests
+@app.middleware("http")
+async def response_cache_middleware(request: Request, call_next):
+    policy = response_cache_policy(request) if RESPONSE_CACHE_ENABLED else None
+    if policy is None:
+        return await call_next(request)
+    if policy == "chain":
+        return await chain_cached_response(request, call_next)
+    return await content_validated_response(request, call_next, policy)
+
+# Middleware to replay responses of retried write requests
+@app.middleware("http")
+async def idempotency_middleware(request: Request, call_next):
+    key = request.headers.get("Idempotency-Key")
+    if not key or request.method not in IDEMPOTENT_METHODS:
+        return await call_next(request)
+    
+    if len(key) > 255:
+        return JSONResponse(status_code=400, content={"detail": "Idempotency-Key must be at most 255 characters"})
+    
+    body = await request.body()
+    fingerprint = hashlib.sha256(body).hexdigest()
+    # Scoped per caller, so another client reusing a key never gets this client's response
+    scoped_key = f"{admission_client(request)} {request.method} {request.url.path} {key}"
+    
+    # The body has been consumed here, so hand it to the endpoint again
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+    
+    async def run() -> StoredResponse:
+        response = await call_next(Request(request.scope, receive))
+        content = b"".join([chunk async for chunk in response.body_iterator])
+        headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+        return StoredResponse(fingerprint, response.status_code, headers, content)
+    
+    try:
+        stored, replayed = await idempotency_store.execute(scoped_key, fingerprint, run)
+    except IdempotencyKeyReused:
+        return JSONResponse(
+            status_code=422,
+            content={"detail": "Idempotency-Key was already used with a different request body"}
+        )
+    
+    response = Response(content=stored.body, status_code=stored.status_code, headers=stored.headers)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+# Middleware to open the root span of every request; defined last so it also times the other middleware
+@app.middleware("http")
+async def tracing_middleware(request: Request, call_next):
+    if request.url.path in TRACE_EXEMPT_PATHS:
+        return await call_next(request)
+    with tracer.start_trace(
+        f"{request.method} {request.url.path}",
+        request.headers.get("traceparent"),
+        method=request.method,
+        path=request.url.path
+    ) as span:
+        response = await call_next(request)
+        span.set_attribute("status", response.status_code)
+    response.headers["X-Trace-Id"] = span.trace.trace_id
+    return response
+
 # Create a global httpx client for reuse
 @app.on_event("startup")
 async def startup_event():
-    app.state.http_client = httpx.AsyncClient(timeout=10.0)
+    # Write the log queue from this process (a preloaded app is imported before the fork)
+    log_pipeline.start()
+    app.state.http_client = httpx.AsyncClient(
+        timeout=10.0,
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=20)
+    )
+    set_pool_size("http", HTTP_MAX_CONNECTIONS)
+    set_pool_size("minio", MINIO_POOL_SIZE)
+    # Route node requests through the shared client
+    for pool in upstream_pools:
+        await pool.start(app.state.http_client)
     # Record startup time
     app.state.startup_time = datetime.now()
-    # Initial health check of dependent services
-    await check_dependent_services()
-    # Update metrics
-    await update_metrics()
+    # Join the other workers on this host
+    worker_bus.subscribe("entity_changed", lambda message: entity_cache.invalidate(message["did"]))
+    worker_bus.subscribe("link_added", lambda message: relationship_graph.add_link(
+        message["source_did"], message["relationship"], message["target_did"]
+    ))
+    worker_bus.start()
+    if LOOP_MONITOR_ENABLED:
+        await loop_monitor.start()
+    gc_monitor.install()
+    # Start draining queued DID operations
+    await start_job_workers()
+    # Connect to MinIO and the chain in the background so startup is not delayed
+    app.state.init_tasks = [
+        asyncio.create_task(init_minio()),
+        asyncio.create_task(init_chain())
+    ]
     
     # Log startup information
-    logger.info(f"EduChain API started successfully")
-    logger.info(f"Tendermint RPC URL: {TENDERMINT_RPC_URL}")
-    logger.info(f"Cosmos REST URL: {COSMOS_REST_URL}")
-    logger.info(f"WASMD_HOME: {WASMD_HOME}")
+    logger.info("EduChain API started in %.0fms", (datetime.now() - app.state.startup_time).total_seconds() * 1000)
+    logger.info("Tendermint RPC URL: %s", TENDERMINT_RPC_URL)
+    logger.info("Cosmos REST URL: %s", COSMOS_REST_URL)
+    logger.info("WASMD_HOME: %s", WASMD_HOME)
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    for task in app.state.init_tasks:
+        task.cancel()
+    await asyncio.gather(*app.state.init_tasks, return_exceptions=True)
+    worker_bus.stop()
+    await loop_monitor.stop()
+    for pool in upstream_pools:
+        await pool.stop()
+    if job_pool:
+        await job_pool.stop()
+    if job_queue:
+        job_queue.close()
+    idempotency_store.close()
     await app.state.http_client.aclose()
+    if trace_exporter is not None:
+        trace_exporter.close()
     logger.info("EduChain API shutting down")
+    log_pipeline.stop()
+
+async def start_job_workers():
+    """Open the job queue and start its worker pool"""
+    global job_queue, job_pool
+    try:
+        job_queue = JobQueue(JOB_QUEUE_PATH)
+        job_pool = JobWorkerPool(
+            job_queue,
+            {f"did.{operation}": _did_job_handler(*spec) for operation, spec in DID_JOB_OPERATIONS.items()},
+            workers=JOB_WORKERS,
+            backoff_base=JOB_RETRY_BACKOFF
+        )
+        await job_pool.start()
+        logger.info("Job queue at %s started with %s workers", JOB_QUEUE_PATH, JOB_WORKERS)
+    except Exception as e:
+        logger.error("Failed to start job queue: %s", e)
+        job_queue = None
+        job_pool = None
+
+async def retry_dependency(name: str, attempt: Callable[[], Any]) -> Any:
+    """Await attempt() until it succeeds, backing off exponentially between failures"""
+    delay = DEPENDENCY_RETRY_INITIAL
+    while True:
+        try:
+            return await attempt()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("%s not available, retrying in %.1fs: %s", name, delay, e)
+        record_retry(name.lower().replace(" ", "_"), "connect", "startup")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, DEPENDENCY_RETRY_MAX)
+
+def connect_minio() -> Minio:
+    """Create the MinIO client and make sure the entity bucket exists"""
+    client = Minio(
+        MINIO_ENDPOINT,
+        access_key=MINIO_ACCESS_KEY,
+        secret_key=MINIO_SECRET_KEY,
+        secure=MINIO_SECURE
+    )
+    
+    # Probe with a short timeout and no internal retries so an unreachable
+    # MinIO fails fast and retry_dependency() controls the backoff
+    probe = Minio(
+        MINIO_ENDPOINT,
+        access_key=MINIO_ACCESS_KEY,
+        secret_key=MINIO_SECRET_KEY,
+        secure=MINIO_SECURE,
+        http_client=urllib3.PoolManager(
+            timeout=urllib3.Timeout(connect=MINIO_CONNECT_TIMEOUT, read=MINIO_CONNECT_TIMEOUT),
+            retries=False
+        )
+    )
+    
+    # Create bucket if it doesn't exist
+    if not probe.bucket_exists(MINIO_BUCKET):
+        probe.make_bucket(MINIO_BUCKET)
+        logger.info("Created MinIO bucket: %s", MINIO_BUCKET)
+    return client
+
+async def init_minio():
+    """Connect to MinIO, then build the relationship index from it"""
+    global minio_client, relationship_store
+    client = await retry_dependency("MinIO", lambda: asyncio.to_thread(connect_minio))
+    relationship_store = RelationshipStore(client, MINIO_BUCKET, instrument=minio_call)
+    minio_client = client
+    dependency_status["minio"] = True
+    logger.info("MinIO client initialized successfully")
+    await load_relationship_graph()
+
+async def init_chain():
+    """Wait for the node's RPC endpoint, then take the first metrics sample"""
+    async def attempt():
+        services_status = await check_dependent_services()
+        if not services_status["tendermint_rpc"]:
+            raise RuntimeError(f"Tendermint RPC at {TENDERMINT_RPC_URL} is unreachable")
+    
+    await retry_dependency("Tendermint RPC", attempt)
+    await update_metrics()
+
+async def load_relationship_graph():
+    """
+    Load every stored relationship into the in-memory traversal index.
+    
+    Links that older versions kept only in the linked_dids arrays of the
+    entity documents are copied into the relationship store first, once.
+    Failures are retried with backoff like the dependencies; edges are
+    idempotent, so a load that failed halfway is simply repeated.
+    """
+    if not relationship_store:
+        logger.warning("Relationship index not loaded: MinIO client not initialized")
+        return
+    
+    async def attempt():
+        start_time = time.time()
+        if not await asyncio.to_thread(relationship_store.is_backfilled):
+            copied = await asyncio.to_thread(relationship_store.backfill, iter_entity_documents())
+            logger.info("Copied %d links from entity documents into the relationship store", copied)
+        edge_count = await asyncio.to_thread(relationship_graph.load, relationship_store.iter_edges())
+        dependency_status["relationship_index"] = True
+        logger.info("Loaded %s relationship edges in %.2fs", edge_count, time.time() - start_time)
+    
+    await retry_dependency("Relationship index", attempt)
+
+def iter_entity_documents() -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (did, document) for every entity document in MinIO; blocking"""
+    for entity_type in EntityType.__members__.values():
+        prefix = f"{entity_type.lower()}/"
+        for obj in minio_client.list_objects(MINIO_BUCKET, prefix=prefix, recursive=True):
+            if not obj.object_name.endswith(".json"):
+                continue
+            data, _, _ = _read_entity_object(obj.object_name)
+            yield obj.object_name[len(prefix):-len(".json")], data
 
 async def check_dependent_services():
     """Check if dependent services are available"""
-    global last_successful_health_check
-    
     services_status = {"tendermint_rpc": False, "cosmos_rest": False}
     
     # Check Tendermint RPC
     try:
-        response = await app.state.http_client.get(f"{TENDERMINT_RPC_URL}/health")
+        response = await tendermint_upstream.get("/health")
         if response.status_code == 200:
-            logger.info(f"Tendermint RPC service is available at {TENDERMINT_RPC_URL}")
+            health_logger.info("Tendermint RPC service is available at %s", TENDERMINT_RPC_URL)
             services_status["tendermint_rpc"] = True
         else:
-            logger.warning(f"Tendermint RPC service returned status {response.status_code}")
+            logger.warning("Tendermint RPC service returned status %s", response.status_code)
     except Exception as e:
-        logger.warning(f"Tendermint RPC service check failed: {str(e)}")
+        logger.warning("Tendermint RPC service check failed: %s", e)
     
     # Check Cosmos REST API
     try:
-        response = await app.state.http_client.get(f"{COSMOS_REST_URL}/node_info")
+        response = await cosmos_rest_upstream.get("/node_info")
         if response.status_code == 200:
-            logger.info(f"Cosmos REST API is available at {COSMOS_REST_URL}")
+            health_logger.info("Cosmos REST API is available at %s", COSMOS_REST_URL)
             services_status["cosmos_rest"] = True
         else:
-            logger.warning(f"Cosmos REST API returned status {response.status_code}")
+            logger.warning("Cosmos REST API returned status %s", response.status_code)
     except Exception as e:
-        logger.warning(f"Cosmos REST API check failed: {str(e)}")
+        logger.warning("Cosmos REST API check failed: %s", e)
+    
+    dependency_status.update(services_status)
     
     # Update last successful health check if all services are available
     if all(services_status.values()):
-        last_successful_health_check = datetime.now()
+        shared_health.set(datetime.now())
     
     return services_status
 
@@ -267,7 +869,7 @@ async def get_node_info():
     """Get node information including version, network, and validator details"""
     try:
         # Call Tendermint RPC
-        response = await app.state.http_client.get(f"{TENDERMINT_RPC_URL}/status")
+        response = await tendermint_upstream.get("/status")
         if response.status_code != 200:
             raise HTTPException(status_code=response.status_code, detail="Failed to get node status")
         
@@ -295,14 +897,168 @@ async def get_node_info():
         
         return node_info
     except Exception as e:
-        logger.error(f"Error getting node info: {str(e)}")
+        logger.error("Error getting node info: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@app.get("/api/v1/live")
+async def liveness_check():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive", "uptime_seconds": int((datetime.now() - app.state.startup_time).total_seconds())}
+
+@app.get("/api/v1/ready")
+async def readiness_check():
+    """Readiness probe: 200 once MinIO and the node RPC are reachable, 503 before"""
+    ready = all(dependency_status[name] for name in READINESS_DEPENDENCIES)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "dependencies": dependency_status}
+    )
+
+@app.get("/api/v1/upstreams")
+async def get_upstreams():
+    """Routing state of every upstream node endpoint"""
+    return {"upstreams": [pool.stats() for pool in upstream_pools]}
+
+@app.get("/api/v1/admission")
+async def get_admission():
+    """Concurrency and client counts of every admission lane"""
+    return {"enabled": ADMISSION_ENABLED, "lanes": admission_controller.stats()}
+
+@app.get("/api/v1/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Span breakdown of a recent request; needs TRACE_EXPORTER=memory"""
+    if not isinstance(trace_exporter, InMemoryExporter):
+        raise HTTPException(status_code=404, detail="Traces are not kept in memory on this instance")
+    trace = trace_exporter.find(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+    return trace
+
+# ===================== Admin Diagnostics =====================
+
+# Only one profile runs at a time; sampling is cheap but not free
+_profile_lock = asyncio.Lock()
+
+def require_admin(request: Request):
+    """Dependency rejecting callers without the admin token"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    token = request.headers.get("X-Admin-Token", "")
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+def describe_upstream_wait(frame) -> Optional[str]:
+    """Name the upstream request a suspended UpstreamPool._send frame is waiting for"""
+    if frame.f_code is not UpstreamPool._send.__code__:
+        return None
+    local = frame.f_locals
+    endpoint = local.get("endpoint")
+    return f"{local['self'].name} {local.get('method')} {endpoint.url if endpoint else ''}{local.get('path')}"
+
+@app.get("/api/v1/admin/profile", dependencies=[Depends(require_admin)])
+async def profile(
+    seconds: float = Query(10.0, gt=0, description="How long to sample"),
+    interval_ms: float = Query(10.0, ge=1, le=1000, description="Time between samples"),
+    format: str = Query("collapsed", pattern="^(collapsed|json)$", description="collapsed stacks or JSON")
+):
+    """Sample the stacks of the event loop and worker threads for a while"""
+    if seconds > PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be at most {PROFILE_MAX_SECONDS:g}")
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    
+    async with _profile_lock:
+        # Sampling runs on a worker thread so the loop keeps serving and is profiled too
+        result = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000)
+        tasks = dump_tasks(describe_upstream_wait)
+    
+    if format == "collapsed":
+        return Response(content=format_collapsed(result["stacks"]), media_type="text/plain")
+    return {
+        "duration": result["duration"],
+        "interval": result["interval"],
+        "samples": result["samples"],
+        "stacks": [{"stack": stack, "count": count} for stack, count in result["stacks"].most_common()],
+        "tasks": tasks
+    }
+
+@app.get("/api/v1/admin/tasks", dependencies=[Depends(require_admin)])
+async def get_tasks():
+    """Pending asyncio tasks and the upstream request each one waits for"""
+    tasks = dump_tasks(describe_upstream_wait)
+    waiting = {}
+    for task in tasks:
+        if task["waiting_on"]:
+            upstream = task["waiting_on"].split(" ", 1)[0]
+            waiting[upstream] = waiting.get(upstream, 0) + 1
+    return {"count": len(tasks), "waiting_on_upstreams": waiting, "tasks": tasks}
+
+def internal_container_sizes() -> Dict[str, int]:
+    """Items held by every in-memory cache and queue of this worker"""
+    sizes = {
+        "entity_cache": len(entity_cache),
+        "response_cache": len(response_cache),
+        "idempotency_store": len(idempotency_store),
+        "relationship_graph_dids": len(relationship_graph),
+        "relationship_graph_edges": relationship_graph.edge_count,
+        "admission_clients": sum(lane["clients"] for lane in admission_controller.stats().values()),
+        "log_queue": log_pipeline.queue.qsize()
+    }
+    if isinstance(trace_exporter, InMemoryExporter):
+        sizes["trace_exporter"] = len(trace_exporter.traces)
+    return sizes
+
+@app.get("/api/v1/admin/memory", dependencies=[Depends(require_admin)])
+async def get_memory():
+    """Process memory, garbage collector state and the sizes of internal caches and queues"""
+    memory = psutil.Process().memory_info()
+    # Label sets that keep growing show up as metrics with many series
+    series = sorted(((metric.name, len(metric.samples)) for metric in REGISTRY.collect()), key=lambda item: -item[1])
+    return {
+        "rss_bytes": memory.rss,
+        "vms_bytes": memory.vms,
+        "gc": {
+            "pending": gc.get_count(),
+            "thresholds": gc.get_threshold(),
+            "generations": gc.get_stats(),
+            "garbage": len(gc.garbage)
+        },
+        "entity_cache_bytes": entity_cache.size_bytes,
+        "containers": internal_container_sizes(),
+        "metric_series_total": sum(count for _, count in series),
+        "largest_metrics": dict(series[:10]),
+        "tracemalloc": tracemalloc_session.active
+    }
+
+@app.post("/api/v1/admin/memory/tracemalloc", dependencies=[Depends(require_admin)])
+async def start_tracemalloc(
+    frames: int = Query(1, ge=1, le=50, description="Stack depth recorded per allocation")
+):
+    """Start tracing allocations and take the baseline snapshot later diffs compare against"""
+    await asyncio.to_thread(tracemalloc_session.start, frames)
+    return {"tracing": True, "frames": frames}
+
+@app.get("/api/v1/admin/memory/tracemalloc", dependencies=[Depends(require_admin)])
+async def diff_tracemalloc(
+    limit: int = Query(25, ge=1, le=500, description="Number of allocation sites to return"),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    reset: bool = Query(False, description="Make this snapshot the new baseline")
+):
+    """Heap growth by allocation site since the baseline snapshot"""
+    try:
+        return await asyncio.to_thread(tracemalloc_session.diff, limit, group_by, reset)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.delete("/api/v1/admin/memory/tracemalloc", dependencies=[Depends(require_admin)])
+async def stop_tracemalloc():
+    """Stop tracing allocations and free the trace memory"""
+    tracemalloc_session.stop()
+    return {"tracing": False}
+
 @app.get("/api/v1/health")
 async def health_check(background_tasks: BackgroundTasks):
     """Health check endpoint with detailed service status"""
-    global last_successful_health_check
-    
     # Get uptime
     uptime = datetime.now() - app.state.startup_time
     
@@ -315,7 +1071,7 @@ async def health_check(background_tasks: BackgroundTasks):
         result = subprocess.run(["pgrep", "-f", "wasmd start"], capture_output=True, text=True)
         wasmd_running = result.returncode == 0
     except Exception as e:
-        logger.error(f"Error checking wasmd process: {str(e)}")
+        logger.error("Error checking wasmd process: %s", e)
     
     # Check dependent services
     services_status = await check_dependent_services()
@@ -326,7 +1082,7 @@ async def health_check(background_tasks: BackgroundTasks):
         cpu_percent = psutil.cpu_percent(interval=0.1)
         disk = psutil.disk_usage('/')
     except Exception as e:
-        logger.error(f"Error getting system resources: {str(e)}")
+        logger.error("Error getting system resources: %s", e)
         memory = None
         cpu_percent = None
         disk = None
@@ -336,6 +1092,7 @@ async def health_check(background_tasks: BackgroundTasks):
     status = "ok" if all_critical_services_up else "degraded"
     
     # If it's been more than 5 minutes since last successful health check and we're not healthy now
+    last_successful_health_check = shared_health.get()
     if (last_successful_health_check is None or 
         (datetime.now() - last_successful_health_check > timedelta(minutes=5)) and 
         not all_critical_services_up):
@@ -344,6 +1101,7 @@ async def health_check(background_tasks: BackgroundTasks):
     # If all is well, update the last successful health check
     if all_critical_services_up:
         last_successful_health_check = datetime.now()
+        shared_health.set(last_successful_health_check)
     
     health_data = {
         "status": status,
@@ -382,28 +1140,28 @@ async def health_check(background_tasks: BackgroundTasks):
 async def get_latest_block():
     """Get information about the latest block"""
     try:
-        response = await app.state.http_client.get(f"{TENDERMINT_RPC_URL}/block")
+        response = await tendermint_upstream.get("/block")
         if response.status_code != 200:
             raise HTTPException(status_code=response.status_code, detail="Failed to get latest block")
         
         data = response.json()
         return data["result"]
     except Exception as e:
-        logger.error(f"Error getting latest block: {str(e)}")
+        logger.error("Error getting latest block: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @app.get("/api/v1/blocks/{height}")
 async def get_block_by_height(height: int = Path(..., description="Block height")):
     """Get information about a specific block by height"""
     try:
-        response = await app.state.http_client.get(f"{TENDERMINT_RPC_URL}/block?height={height}")
+        response = await tendermint_upstream.get(f"/block?height={height}")
         if response.status_code != 200:
             raise HTTPException(status_code=response.status_code, detail=f"Failed to get block at height {height}")
         
         data = response.json()
         return data["result"]
     except Exception as e:
-        logger.error(f"Error getting block at height {height}: {str(e)}")
+        logger.error("Error getting block at height %s: %s", height, e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @app.get("/api/v1/metrics")
@@ -411,15 +1169,15 @@ async def get_node_metrics():
     """Get node metrics including validator status, connected peers, etc."""
     try:
         # Get status
-        status_response = await app.state.http_client.get(f"{TENDERMINT_RPC_URL}/status")
+        status_response = await tendermint_upstream.get("/status")
         status_data = status_response.json()
         
         # Get net info
-        net_info_response = await app.state.http_client.get(f"{TENDERMINT_RPC_URL}/net_info")
+        net_info_response = await tendermint_upstream.get("/net_info")
         net_info_data = net_info_response.json()
         
         # Get validator info
-        validators_response = await app.state.http_client.get(f"{TENDERMINT_RPC_URL}/validators")
+        validators_response = await tendermint_upstream.get("/validators")
         validators_data = validators_response.json()
         
         # Compile metrics
@@ -448,7 +1206,7 @@ async def get_node_metrics():
         
         return metrics
     except Exception as e:
-        logger.error(f"Error getting node metrics: {str(e)}")
+        logger.error("Error getting node metrics: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @app.get("/api/v1/transactions/{hash}")
@@ -459,7 +1217,7 @@ async def get_transaction(hash: str = Path(..., description="Transaction hash"))
         hash = hash.upper()
         
         # Query transaction
-        response = await app.state.http_client.get(f"{TENDERMINT_RPC_URL}/tx?hash=0x{hash}")
+        response = await tendermint_upstream.get(f"/tx?hash=0x{hash}")
         if response.status_code != 200:
             raise HTTPException(status_code=response.status_code, detail=f"Failed to get transaction with hash {hash}")
         
@@ -471,7 +1229,7 @@ async def get_transaction(hash: str = Path(..., description="Transaction hash"))
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error getting transaction {hash}: {str(e)}")
+        logger.error("Error getting transaction %s: %s", hash, e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @app.get("/api/v1/prometheus", response_class=Response)
@@ -479,22 +1237,29 @@ async def prometheus_metrics():
     """Expose Prometheus metrics"""
     # Update metrics before serving
     await update_metrics()
+    record_container_sizes(internal_container_sizes())
+    gc_monitor.publish()
     
     # Generate and serve metrics in Prometheus format
+    if PROMETHEUS_MULTIPROC_DIR:
+        # Aggregate the samples written by every worker process
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
     return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 @app.get("/api/v1/validators")
 async def get_validators():
     """Get information about current validators"""
     try:
-        response = await app.state.http_client.get(f"{TENDERMINT_RPC_URL}/validators")
+        response = await tendermint_upstream.get("/validators")
         if response.status_code != 200:
             raise HTTPException(status_code=response.status_code, detail="Failed to get validators")
         
         data = response.json()
         return data["result"]
     except Exception as e:
-        logger.error(f"Error getting validators: {str(e)}")
+        logger.error("Error getting validators: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @app.get("/api/v1/genesis")
@@ -528,7 +1293,7 @@ async def get_genesis():
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error getting genesis: {str(e)}")
+        logger.error("Error getting genesis: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 # ===================== DID and Entity Models =====================
@@ -557,10 +1322,22 @@ def generate_random_did(method: str = "eduid", entity_type: str = None) -> str:
         return f"did:{method}:{entity_type.lower()}-{unique_id[:16]}"
     return f"did:{method}:{unique_id[:16]}"
 
+@contextmanager
+def minio_call(operation: str, **attributes):
+    """Trace and measure one MinIO request; a missing object is not counted as an error"""
+    with tracer.span(f"minio.{operation}", **attributes), track_dependency("minio", operation, pool="minio") as call:
+        try:
+            yield
+        except S3Error as e:
+            if e.code == 'NoSuchKey':
+                call.outcome = "not_found"
+            raise
+
+@traced()
 async def store_entity_data(did: str, entity_data: Dict[str, Any]) -> str:
     """Store entity data in MinIO"""
     if not minio_client:
-        raise HTTPException(status_code=500, detail="MinIO client not initialized")
+        raise HTTPException(status_code=503, detail="MinIO client not initialized")
     
     # Calculate hash for data integrity
     data_hash = calculate_hash(entity_data)
@@ -573,23 +1350,93 @@ async def store_entity_data(did: str, entity_data: Dict[str, Any]) -> str:
     
     try:
         data_bytes = json.dumps(entity_data).encode('utf-8')
-        minio_client.put_object(
-            bucket_name=MINIO_BUCKET,
-            object_name=object_name,
-            data=io.BytesIO(data_bytes),
-            length=len(data_bytes),
-            content_type="application/json"
-        )
-        logger.info(f"Entity data for {did} stored successfully")
+        
+        def put() -> str:
+            with minio_call("put_object", object=object_name, size=len(data_bytes)):
+                return minio_client.put_object(
+                    bucket_name=MINIO_BUCKET,
+                    object_name=object_name,
+                    data=io.BytesIO(data_bytes),
+                    length=len(data_bytes),
+                    content_type="application/json"
+                ).etag
+        
+        # The upload runs in a worker thread so it does not block the event loop
+        etag = await asyncio.to_thread(put)
+        entity_cache.put(did, entity_data, object_name, etag, len(data_bytes))
+        worker_bus.publish("entity_changed", did=did)
+        entity_logger.info("Entity data for %s stored successfully", did)
         return data_hash
     except Exception as e:
-        logger.error(f"Failed to store entity data for {did}: {str(e)}")
+        logger.error("Failed to store entity data for %s: %s", did, e)
         raise HTTPException(status_code=500, detail=f"Failed to store entity data: {str(e)}")
 
-async def retrieve_entity_data(did: str) -> Dict[str, Any]:
-    """Retrieve entity data from MinIO"""
+def _read_entity_object(object_name: str) -> Tuple[Dict[str, Any], str, int]:
+    """Download and decode an entity object, returning (data, etag, size)"""
+    with minio_call("get_object", object=object_name):
+        response = minio_client.get_object(MINIO_BUCKET, object_name)
+        try:
+            raw = response.read()
+            etag = response.headers.get("ETag", "").replace('"', "")
+        finally:
+            response.close()
+            response.release_conn()
+    return json.loads(raw.decode('utf-8')), etag, len(raw)
+
+def _current_etag(object_name: str) -> Optional[str]:
+    """Return the current ETag of an object, or None if it does not exist"""
+    try:
+        with minio_call("stat_object", object=object_name):
+            return minio_client.stat_object(MINIO_BUCKET, object_name).etag
+    except S3Error as e:
+        if e.code == 'NoSuchKey':
+            return None
+        raise
+
+async def _revalidate_cached_entity(did: str, revalidate: bool = True) -> Optional[Tuple[Dict[str, Any], str, str]]:
+    """Serve a DID from the entity cache if its stored ETag is still current"""
+    entry = entity_cache.lookup(did)
+    if entry is None:
+        return None
+    
+    if not revalidate or entity_cache.is_fresh(entry):
+        ENTITY_CACHE_REQUESTS.labels("hit").inc()
+        return copy.deepcopy(entry.data), entry.object_name, entry.etag
+    
+    # Cheap metadata check instead of downloading the whole object again
+    try:
+        etag = await asyncio.to_thread(_current_etag, entry.object_name)
+    except S3Error as e:
+        ENTITY_CACHE_REVALIDATIONS.labels("error").inc()
+        logger.warning("Entity cache revalidation failed for %s: %s", did, e)
+        etag = None
+    
+    if etag is not None and entry.etag and etag == entry.etag:
+        ENTITY_CACHE_REVALIDATIONS.labels("not_modified").inc()
+        ENTITY_CACHE_REQUESTS.labels("revalidated").inc()
+        entity_cache.touch(did)
+        return copy.deepcopy(entry.data), entry.object_name, entry.etag
+    
+    ENTITY_CACHE_REVALIDATIONS.labels("changed").inc()
+    entity_cache.invalidate(did)
+    return None
+
+@traced()
+async def load_entity_for_update(did: str, revalidate: bool = True) -> Tuple[Dict[str, Any], str, str]:
+    """
+    Retrieve entity data together with the object name and ETag it was read from
+    
+    The MinIO calls, including the ETag revalidation of a cached entry, run
+    in worker threads so they do not block the event loop.
+    """
     if not minio_client:
-        raise HTTPException(status_code=500, detail="MinIO client not initialized")
+        raise HTTPException(status_code=503, detail="MinIO client not initialized")
+    
+    if entity_cache.enabled:
+        cached = await _revalidate_cached_entity(did, revalidate=revalidate)
+        if cached is not None:
+            return cached
+        ENTITY_CACHE_REQUESTS.labels("miss").inc()
     
     # First try to find the object in any possible folder
     entity_types = [t.lower() for t in EntityType.__members__.values()]
@@ -597,70 +1444,141 @@ async def retrieve_entity_data(did: str) -> Dict[str, Any]:
     for entity_type in entity_types:
         object_name = f"{entity_type}/{did}.json"
         try:
-            response = minio_client.get_object(MINIO_BUCKET, object_name)
-            data = json.loads(response.read().decode('utf-8'))
-            response.close()
-            response.release_conn()
-            logger.info(f"Entity data for {did} retrieved successfully")
-            return data
+            data, etag, size = await asyncio.to_thread(_read_entity_object, object_name)
+            entity_cache.put(did, data, object_name, etag, size)
+            entity_logger.info("Entity data for %s retrieved successfully", did)
+            return data, object_name, etag
         except S3Error as e:
             if e.code == 'NoSuchKey':
                 continue
             else:
-                logger.error(f"Failed to retrieve entity data for {did}: {str(e)}")
+                logger.error("Failed to retrieve entity data for %s: %s", did, e)
                 raise HTTPException(status_code=500, detail=f"Failed to retrieve entity data: {str(e)}")
         except Exception as e:
-            logger.error(f"Failed to retrieve entity data for {did}: {str(e)}")
+            logger.error("Failed to retrieve entity data for %s: %s", did, e)
             raise HTTPException(status_code=500, detail=f"Failed to retrieve entity data: {str(e)}")
     
     # If we get here, the entity was not found in any folder
-    logger.warning(f"Entity data for {did} not found")
+    logger.warning("Entity data for %s not found", did)
     raise HTTPException(status_code=404, detail=f"Entity data for {did} not found")
 
+async def retrieve_entity_data(did: str) -> Dict[str, Any]:
+    """Retrieve entity data from MinIO"""
+    data, _, _ = await load_entity_for_update(did)
+    return data
+
+@traced()
+async def write_entity_data(did: str, entity_data: Dict[str, Any], object_name: str, expected_etag: str) -> str:
+    """
+    Write an already-loaded entity document back to MinIO if it is unchanged.
+    
+    The write only goes through when the object's current ETag still matches
+    the one the document was read with; otherwise a 409 is raised so the
+    caller can reload and reapply its change. The check and the put run in a
+    worker thread under a per-DID lock shared by every gateway worker on this
+    host (see StripedLock); writers outside the gateway are not covered.
+    """
+    if not minio_client:
+        raise HTTPException(status_code=503, detail="MinIO client not initialized")
+    
+    # Calculate new hash
+    entity_data["metadata"] = entity_data.get("metadata", {})
+    data_hash = calculate_hash(entity_data)
+    entity_data["metadata"]["hash"] = data_hash
+    data_bytes = json.dumps(entity_data).encode('utf-8')
+    
+    def conditional_put() -> str:
+        with entity_write_lock.hold(did):
+            try:
+                current_etag = _current_etag(object_name)
+            except S3Error as e:
+                logger.error("Failed to check entity version for %s: %s", did, e)
+                raise HTTPException(status_code=500, detail=f"Failed to update entity data: {str(e)}")
+            
+            if current_etag != expected_etag:
+                entity_cache.invalidate(did)
+                raise HTTPException(status_code=409, detail=f"Entity data for {did} was modified concurrently")
+            
+            try:
+                with minio_call("put_object", object=object_name, size=len(data_bytes)):
+                    return minio_client.put_object(
+                        bucket_name=MINIO_BUCKET,
+                        object_name=object_name,
+                        data=io.BytesIO(data_bytes),
+                        length=len(data_bytes),
+                        content_type="application/json"
+                    ).etag
+            except Exception as e:
+                entity_cache.invalidate(did)
+                logger.error("Failed to update entity data for %s: %s", did, e)
+                raise HTTPException(status_code=500, detail=f"Failed to update entity data: {str(e)}")
+    
+    etag = await asyncio.to_thread(conditional_put)
+    entity_cache.put(did, entity_data, object_name, etag, len(data_bytes))
+    worker_bus.publish("entity_changed", did=did)
+    entity_logger.info("Entity data for %s updated successfully", did)
+    return data_hash
+
+async def apply_entity_update(
+    did: str,
+    mutate: Callable[[Dict[str, Any]], None],
+    document: Optional[Dict[str, Any]] = None,
+    object_name: Optional[str] = None,
+    etag: Optional[str] = None
+) -> str:
+    """
+    Apply an in-place change to an entity document and write it back.
+    
+    A document that was already loaded (with its object name and ETag) is
+    reused instead of being fetched again. On a version conflict the document
+    is reloaded and the change reapplied, up to ENTITY_WRITE_MAX_RETRIES times.
+    """
+    for attempt in range(ENTITY_WRITE_MAX_RETRIES + 1):
+        if document is None:
+            # Trust the cached version; the conditional write catches staleness
+            document, object_name, etag = await load_entity_for_update(did, revalidate=attempt > 0)
+        
+        mutate(document)
+        document["metadata"] = document.get("metadata", {})
+        document["metadata"]["updated_at"] = datetime.now().isoformat()
+        
+        try:
+            return await write_entity_data(did, document, object_name, etag)
+        except HTTPException as e:
+            if e.status_code != 409 or attempt == ENTITY_WRITE_MAX_RETRIES:
+                raise
+            ENTITY_WRITE_CONFLICTS.inc()
+            logger.warning("Version conflict updating entity data for %s, retrying (%s/%s)", did, attempt + 1, ENTITY_WRITE_MAX_RETRIES)
+            document = None
+            await asyncio.sleep(ENTITY_WRITE_RETRY_BACKOFF * (2 ** attempt))
+
 async def update_entity_data(did: str, entity_data: Dict[str, Any]) -> str:
     """Update entity data in MinIO"""
-    # First retrieve existing data to know which folder it's in
-    try:
-        existing_data = await retrieve_entity_data(did)
-        entity_type = existing_data.get("type", "Unknown")
-        
+    def merge(existing_data: Dict[str, Any]) -> None:
         # Update metadata
-        entity_data["metadata"] = entity_data.get("metadata", existing_data.get("metadata", {}))
-        entity_data["metadata"]["updated_at"] = datetime.now().isoformat()
-        
-        # Merge with existing data
-        merged_data = {**existing_data, **entity_data}
-        
-        # Calculate new hash
-        data_hash = calculate_hash(merged_data)
-        merged_data["metadata"]["hash"] = data_hash
-        
-        # Store updated data
-        object_name = f"{entity_type.lower()}/{did}.json"
-        data_bytes = json.dumps(merged_data).encode('utf-8')
-        
-        minio_client.put_object(
-            bucket_name=MINIO_BUCKET,
-            object_name=object_name,
-            data=io.BytesIO(data_bytes),
-            length=len(data_bytes),
-            content_type="application/json"
-        )
-        logger.info(f"Entity data for {did} updated successfully")
-        return data_hash
+        metadata = entity_data.get("metadata", existing_data.get("metadata", {}))
+        existing_data.update(entity_data)
+        existing_data["metadata"] = metadata
+    
+    try:
+        return await apply_entity_update(did, merge)
     except HTTPException as e:
         if e.status_code == 404:
             # If entity doesn't exist, create it
             return await store_entity_data(did, entity_data)
         raise
     except Exception as e:
-        logger.error(f"Failed to update entity data for {did}: {str(e)}")
+        logger.error("Failed to update entity data for %s: %s", did, e)
         raise HTTPException(status_code=500, detail=f"Failed to update entity data: {str(e)}")
 
 async def delete_entity_data(did: str) -> bool:
     """Delete entity data from MinIO"""
     if not minio_client:
-        raise HTTPException(status_code=500, detail="MinIO client not initialized")
+        raise HTTPException(status_code=503, detail="MinIO client not initialized")
+    
+    # Drop the cached copy before touching storage so no reader sees it again
+    entity_cache.invalidate(did)
+    worker_bus.publish("entity_changed", did=did)
     
     # First try to find the object in any possible folder
     entity_types = [t.lower() for t in EntityType.__members__.values()]
@@ -668,18 +1586,19 @@ async def delete_entity_data(did: str) -> bool:
     for entity_type in entity_types:
         object_name = f"{entity_type}/{did}.json"
         try:
-            minio_client.remove_object(MINIO_BUCKET, object_name)
-            logger.info(f"Entity data for {did} deleted successfully")
+            with minio_call("remove_object", object=object_name):
+                minio_client.remove_object(MINIO_BUCKET, object_name)
+            entity_logger.info("Entity data for %s deleted successfully", did)
             return True
         except S3Error as e:
             if e.code == 'NoSuchKey':
                 continue
             else:
-                logger.error(f"Failed to delete entity data for {did}: {str(e)}")
+                logger.error("Failed to delete entity data for %s: %s", did, e)
                 raise HTTPException(status_code=500, detail=f"Failed to delete entity data: {str(e)}")
     
     # If we get here, the entity was not found in any folder
-    logger.warning(f"Entity data for {did} not found for deletion")
+    logger.warning("Entity data for %s not found for deletion", did)
     raise HTTPException(status_code=404, detail=f"Entity data for {did} not found for deletion")
 
 async def list_entities(
@@ -691,7 +1610,7 @@ async def list_entities(
 ) -> PaginatedResponse:
     """List entities from MinIO with pagination"""
     if not minio_client:
-        raise HTTPException(status_code=500, detail="MinIO client not initialized")
+        raise HTTPException(status_code=503, detail="MinIO client not initialized")
     
     if entity_type:
         # If entity type is specified, only check that folder
@@ -710,10 +1629,11 @@ async def list_entities(
             # Only process objects within the requested page range
             if (page - 1) * limit < total_count <= page * limit:
                 try:
-                    response = minio_client.get_object(MINIO_BUCKET, obj.object_name)
-                    data = json.loads(response.read().decode('utf-8'))
-                    response.close()
-                    response.release_conn()
+                    with minio_call("get_object", object=obj.object_name):
+                        response = minio_client.get_object(MINIO_BUCKET, obj.object_name)
+                        data = json.loads(response.read().decode('utf-8'))
+                        response.close()
+                        response.release_conn()
                     
                     # Apply filters
                     if entity_subtype and data.get("subtype") != entity_subtype:
@@ -724,7 +1644,7 @@ async def list_entities(
                     
                     results.append(data)
                 except Exception as e:
-                    logger.error(f"Error processing object {obj.object_name}: {str(e)}")
+                    logger.error("Error processing object %s: %s", obj.object_name, e)
     
     return PaginatedResponse(
         items=results,
@@ -747,21 +1667,20 @@ async def verify_on_chain_did(did: str) -> Dict[str, Any]:
             }
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{COSMOS_REST_API}/cosmwasm/wasm/v1/contract/{contract_address}/smart/{base64.b64encode(json.dumps(query_msg).encode()).decode()}"
-            )
+        response = await cosmos_api_upstream.get(
+            f"/cosmwasm/wasm/v1/contract/{contract_address}/smart/{base64.b64encode(json.dumps(query_msg).encode()).decode()}"
+        )
             
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Failed to query DID document: {response.text}"
-                )
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Failed to query DID document: {response.text}"
+            )
             
-            result = response.json()
-            return result.get("data", {})
+        result = response.json()
+        return result.get("data", {})
     except Exception as e:
-        logger.error(f"Error verifying on-chain DID {did}: {str(e)}")
+        logger.error("Error verifying on-chain DID %s: %s", did, e)
         raise HTTPException(status_code=500, detail=f"Error verifying on-chain DID: {str(e)}")
 
 async def check_data_integrity(did: str) -> bool:
@@ -784,7 +1703,7 @@ async def check_data_integrity(did: str) -> bool:
         # Compare hashes
         return on_chain_hash == off_chain_hash
     except Exception as e:
-        logger.error(f"Error checking data integrity for {did}: {str(e)}")
+        logger.error("Error checking data integrity for %s: %s", did, e)
         return False
 
 # ===================== Blockchain Interaction Functions =====================
@@ -792,67 +1711,65 @@ async def check_data_integrity(did: str) -> bool:
 async def get_account_info(address: str) -> Dict[str, Any]:
     """Get account information from the blockchain"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{COSMOS_REST_API}/cosmos/auth/v1beta1/accounts/{address}")
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Failed to get account info: {response.text}"
-                )
-            return response.json().get("account", {})
+        response = await cosmos_api_upstream.get(f"/cosmos/auth/v1beta1/accounts/{address}")
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Failed to get account info: {response.text}"
+            )
+        return response.json().get("account", {})
     except Exception as e:
-        logger.error(f"Error getting account info for {address}: {str(e)}")
+        logger.error("Error getting account info for %s: %s", address, e)
         raise HTTPException(status_code=500, detail=f"Error getting account info: {str(e)}")
 
 async def estimate_gas(tx_bytes: str) -> int:
     """Estimate gas for a transaction"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{COSMOS_REST_API}/cosmos/tx/v1beta1/simulate",
-                json={"tx_bytes": tx_bytes}
+        response = await cosmos_api_upstream.post(
+            f"/cosmos/tx/v1beta1/simulate",
+            json={"tx_bytes": tx_bytes}
+        )
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Failed to simulate transaction: {response.text}"
             )
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Failed to simulate transaction: {response.text}"
-                )
-            gas_used = int(response.json().get("gas_info", {}).get("gas_used", "0"))
-            return int(float(gas_used) * float(GAS_ADJUSTMENT))
+        gas_used = int(response.json().get("gas_info", {}).get("gas_used", "0"))
+        return int(float(gas_used) * float(GAS_ADJUSTMENT))
     except Exception as e:
-        logger.error(f"Error estimating gas: {str(e)}")
+        logger.error("Error estimating gas: %s", e)
         raise HTTPException(status_code=500, detail=f"Error estimating gas: {str(e)}")
 
 async def broadcast_transaction(tx_bytes: str) -> Dict[str, Any]:
     """Broadcast a transaction to the blockchain"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{COSMOS_REST_API}/cosmos/tx/v1beta1/txs",
-                json={"tx_bytes": tx_bytes, "mode": "BROADCAST_MODE_BLOCK"}
+        response = await cosmos_api_upstream.post(
+            f"/cosmos/tx/v1beta1/txs",
+            json={"tx_bytes": tx_bytes, "mode": "BROADCAST_MODE_BLOCK"}
+        )
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Failed to broadcast transaction: {response.text}"
             )
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Failed to broadcast transaction: {response.text}"
-                )
-            return response.json()
+        return response.json()
     except Exception as e:
-        logger.error(f"Error broadcasting transaction: {str(e)}")
+        logger.error("Error broadcasting transaction: %s", e)
         raise HTTPException(status_code=500, detail=f"Error broadcasting transaction: {str(e)}")
 
-async def create_did_on_chain(request: CreateDIDRequest, sender_address: str) -> Dict[str, Any]:
+@traced()
+async def create_did_on_chain(request: CreateDIDRequest, sender_address: str, job: Optional[Job] = None) -> Dict[str, Any]:
     """Create a new DID on-chain by executing a smart contract transaction"""
     try:
         contract_address = os.environ.get("EDUID_CONTRACT_ADDRESS")
         if not contract_address:
             raise HTTPException(status_code=500, detail="EDUID_CONTRACT_ADDRESS environment variable not set")
         
-        # Generate DID if not provided
-        did = generate_random_did(
+        # Generate DID if not provided (checkpointed so a retried job keeps its DID)
+        did = await run_step(job, "did", lambda: generate_random_did(
             method=request.method, 
             entity_type=request.entity_type.lower()
-        )
+        ))
         
         # Prepare verification method
         verification_method = {
@@ -893,77 +1810,90 @@ async def create_did_on_chain(request: CreateDIDRequest, sender_address: str) ->
         # that handles the signing and broadcasting
         
         # Simulate execute message to get gas estimation
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{COSMOS_REST_API}/cosmwasm/wasm/v1/contract/{contract_address}/execute",
+        async def register():
+            response = await cosmos_api_upstream.post(
+                f"/cosmwasm/wasm/v1/contract/{contract_address}/execute",
                 json={
                     "sender": sender_address,
                     "msg": execute_msg,
                     "funds": []
                 }
             )
-            
+                
             if response.status_code != 200:
                 raise HTTPException(
                     status_code=response.status_code,
                     detail=f"Failed to execute contract: {response.text}"
                 )
+                
+            return response.json()
             
-            result = response.json()
+        result = await run_step(job, "register", register)
             
-            # If we have entity data, store it off-chain
-            if request.entity_data:
-                # Add DID to entity data
-                entity_data = request.entity_data
-                entity_data["did"] = did
-                entity_data["type"] = request.entity_type
-                entity_data["subtype"] = request.entity_subtype
-                entity_data["metadata"] = {
-                    "created_at": datetime.now().isoformat(),
-                    "updated_at": datetime.now().isoformat(),
-                    "status": "active"
-                }
+        # If we have entity data, store it off-chain
+        if request.entity_data:
+            # Add DID to entity data
+            entity_data = request.entity_data
+            entity_data["did"] = did
+            entity_data["type"] = request.entity_type
+            entity_data["subtype"] = request.entity_subtype
+            entity_data["metadata"] = {
+                "created_at": datetime.now().isoformat(),
+                "updated_at": datetime.now().isoformat(),
+                "status": "active"
+            }
                 
-                # Store entity data in MinIO
-                data_hash = await store_entity_data(did, entity_data)
+            # Store entity data in MinIO
+            data_hash = await run_step(job, "store_entity", lambda: store_entity_data(did, entity_data))
                 
-                # Update on-chain metadata with the hash of entity data
-                update_msg = {
-                    "update_did_metadata": {
-                        "did": did,
-                        "metadata": {
-                            "hash": data_hash
-                        }
+            # Update on-chain metadata with the hash of entity data
+            update_msg = {
+                "update_did_metadata": {
+                    "did": did,
+                    "metadata": {
+                        "hash": data_hash
                     }
                 }
+            }
                 
-                # Execute the update transaction
-                update_response = await client.post(
-                    f"{COSMOS_REST_API}/cosmwasm/wasm/v1/contract/{contract_address}/execute",
+            # Execute the update transaction
+            async def update_hash():
+                update_response = await cosmos_api_upstream.post(
+                    f"/cosmwasm/wasm/v1/contract/{contract_address}/execute",
                     json={
                         "sender": sender_address,
                         "msg": update_msg,
                         "funds": []
                     }
                 )
-                
+                    
                 if update_response.status_code != 200:
+                    if job is not None:
+                        # Queued jobs retry the hash update instead of leaving it behind
+                        raise HTTPException(
+                            status_code=update_response.status_code,
+                            detail=f"Failed to update DID metadata with hash: {update_response.text}"
+                        )
                     # If update fails, we should still return the DID but log the error
-                    logger.error(f"Failed to update DID metadata with hash: {update_response.text}")
+                    logger.error("Failed to update DID metadata with hash: %s", update_response.text)
+                return data_hash
+                
+            await run_step(job, "update_hash", update_hash)
             
-            # Return the created DID and transaction result
-            return {
-                "did": did,
-                "transaction_hash": result.get("txhash"),
-                "status": "success",
-                "message": "DID created successfully"
-            }
+        # Return the created DID and transaction result
+        return {
+            "did": did,
+            "transaction_hash": result.get("txhash"),
+            "status": "success",
+            "message": "DID created successfully"
+        }
             
     except Exception as e:
-        logger.error(f"Error creating DID: {str(e)}")
+        logger.error("Error creating DID: %s", e)
         raise HTTPException(status_code=500, detail=f"Error creating DID: {str(e)}")
 
-async def update_did_on_chain(request: UpdateDIDRequest, sender_address: str) -> Dict[str, Any]:
+@traced()
+async def update_did_on_chain(request: UpdateDIDRequest, sender_address: str, job: Optional[Job] = None) -> Dict[str, Any]:
     """Update a DID on-chain"""
     try:
         contract_address = os.environ.get("EDUID_CONTRACT_ADDRESS")
@@ -995,71 +1925,84 @@ async def update_did_on_chain(request: UpdateDIDRequest, sender_address: str) ->
             update_msg["update_did"]["remove_authentication"] = request.remove_authentication
         
         # Execute the update transaction
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{COSMOS_REST_API}/cosmwasm/wasm/v1/contract/{contract_address}/execute",
+        async def execute_update():
+            response = await cosmos_api_upstream.post(
+                f"/cosmwasm/wasm/v1/contract/{contract_address}/execute",
                 json={
                     "sender": sender_address,
                     "msg": update_msg,
                     "funds": []
                 }
             )
-            
+                
             if response.status_code != 200:
                 raise HTTPException(
                     status_code=response.status_code,
                     detail=f"Failed to update DID: {response.text}"
                 )
+                
+            return response.json()
             
-            result = response.json()
+        result = await run_step(job, "execute", execute_update)
             
-            # If we have entity data, update it off-chain
-            if request.entity_data:
-                # Update entity data in MinIO
-                entity_data = request.entity_data
-                entity_data["metadata"] = entity_data.get("metadata", {})
-                entity_data["metadata"]["updated_at"] = datetime.now().isoformat()
+        # If we have entity data, update it off-chain
+        if request.entity_data:
+            # Update entity data in MinIO
+            entity_data = request.entity_data
+            entity_data["metadata"] = entity_data.get("metadata", {})
+            entity_data["metadata"]["updated_at"] = datetime.now().isoformat()
                 
-                data_hash = await update_entity_data(request.did, entity_data)
+            data_hash = await run_step(job, "store_entity", lambda: update_entity_data(request.did, entity_data))
                 
-                # Update on-chain metadata with the new hash
-                update_metadata_msg = {
-                    "update_did_metadata": {
-                        "did": request.did,
-                        "metadata": {
-                            "hash": data_hash,
-                            "updated_at": datetime.now().isoformat()
-                        }
+            # Update on-chain metadata with the new hash
+            update_metadata_msg = {
+                "update_did_metadata": {
+                    "did": request.did,
+                    "metadata": {
+                        "hash": data_hash,
+                        "updated_at": datetime.now().isoformat()
                     }
                 }
+            }
                 
-                # Execute the metadata update transaction
-                update_response = await client.post(
-                    f"{COSMOS_REST_API}/cosmwasm/wasm/v1/contract/{contract_address}/execute",
+            # Execute the metadata update transaction
+            async def update_hash():
+                update_response = await cosmos_api_upstream.post(
+                    f"/cosmwasm/wasm/v1/contract/{contract_address}/execute",
                     json={
                         "sender": sender_address,
                         "msg": update_metadata_msg,
                         "funds": []
                     }
                 )
-                
+                    
                 if update_response.status_code != 200:
+                    if job is not None:
+                        # Queued jobs retry the hash update instead of leaving it behind
+                        raise HTTPException(
+                            status_code=update_response.status_code,
+                            detail=f"Failed to update DID metadata with hash: {update_response.text}"
+                        )
                     # Log error but continue since the main update was successful
-                    logger.error(f"Failed to update DID metadata with hash: {update_response.text}")
+                    logger.error("Failed to update DID metadata with hash: %s", update_response.text)
+                return data_hash
+                
+            await run_step(job, "update_hash", update_hash)
             
-            # Return transaction result
-            return {
-                "did": request.did,
-                "transaction_hash": result.get("txhash"),
-                "status": "success",
-                "message": "DID updated successfully"
-            }
+        # Return transaction result
+        return {
+            "did": request.did,
+            "transaction_hash": result.get("txhash"),
+            "status": "success",
+            "message": "DID updated successfully"
+        }
             
     except Exception as e:
-        logger.error(f"Error updating DID: {str(e)}")
+        logger.error("Error updating DID: %s", e)
         raise HTTPException(status_code=500, detail=f"Error updating DID: {str(e)}")
 
-async def revoke_did_on_chain(request: RevokeDIDRequest, sender_address: str) -> Dict[str, Any]:
+@traced()
+async def revoke_did_on_chain(request: RevokeDIDRequest, sender_address: str, job: Optional[Job] = None) -> Dict[str, Any]:
     """Revoke a DID on-chain"""
     try:
         contract_address = os.environ.get("EDUID_CONTRACT_ADDRESS")
@@ -1075,50 +2018,55 @@ async def revoke_did_on_chain(request: RevokeDIDRequest, sender_address: str) ->
         }
         
         # Execute the revoke transaction
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{COSMOS_REST_API}/cosmwasm/wasm/v1/contract/{contract_address}/execute",
+        async def execute_revoke():
+            response = await cosmos_api_upstream.post(
+                f"/cosmwasm/wasm/v1/contract/{contract_address}/execute",
                 json={
                     "sender": sender_address,
                     "msg": revoke_msg,
                     "funds": []
                 }
             )
-            
+                
             if response.status_code != 200:
                 raise HTTPException(
                     status_code=response.status_code,
                     detail=f"Failed to revoke DID: {response.text}"
                 )
+                
+            return response.json()
             
-            result = response.json()
+        result = await run_step(job, "execute", execute_revoke)
             
-            # Update off-chain entity data status
-            try:
-                entity_data = await retrieve_entity_data(request.did)
+        # Update off-chain entity data status
+        try:
+            def mark_revoked(entity_data: Dict[str, Any]) -> None:
                 entity_data["metadata"]["status"] = "revoked"
-                entity_data["metadata"]["updated_at"] = datetime.now().isoformat()
                 if request.reason:
                     entity_data["metadata"]["revocation_reason"] = request.reason
                 
-                await update_entity_data(request.did, entity_data)
-            except Exception as e:
-                # Log error but continue since the main revocation was successful
-                logger.error(f"Failed to update off-chain entity data status: {str(e)}")
+            await run_step(job, "entity", lambda: apply_entity_update(request.did, mark_revoked))
+        except Exception as e:
+            if job is not None:
+                # Queued jobs retry the entity update instead of leaving it behind
+                raise
+            # Log error but continue since the main revocation was successful
+            logger.error("Failed to update off-chain entity data status: %s", e)
             
-            # Return transaction result
-            return {
-                "did": request.did,
-                "transaction_hash": result.get("txhash"),
-                "status": "success",
-                "message": "DID revoked successfully"
-            }
+        # Return transaction result
+        return {
+            "did": request.did,
+            "transaction_hash": result.get("txhash"),
+            "status": "success",
+            "message": "DID revoked successfully"
+        }
             
     except Exception as e:
-        logger.error(f"Error revoking DID: {str(e)}")
+        logger.error("Error revoking DID: %s", e)
         raise HTTPException(status_code=500, detail=f"Error revoking DID: {str(e)}")
 
-async def transfer_did_on_chain(request: TransferDIDRequest, sender_address: str) -> Dict[str, Any]:
+@traced()
+async def transfer_did_on_chain(request: TransferDIDRequest, sender_address: str, job: Optional[Job] = None) -> Dict[str, Any]:
     """Transfer a DID to a new controller"""
     try:
         contract_address = os.environ.get("EDUID_CONTRACT_ADDRESS")
@@ -1137,29 +2085,30 @@ async def transfer_did_on_chain(request: TransferDIDRequest, sender_address: str
             transfer_msg["transfer_did"]["new_public_key"] = request.new_public_key
         
         # Execute the transfer transaction
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{COSMOS_REST_API}/cosmwasm/wasm/v1/contract/{contract_address}/execute",
+        async def execute_transfer():
+            response = await cosmos_api_upstream.post(
+                f"/cosmwasm/wasm/v1/contract/{contract_address}/execute",
                 json={
                     "sender": sender_address,
                     "msg": transfer_msg,
                     "funds": []
                 }
             )
-            
+                
             if response.status_code != 200:
                 raise HTTPException(
                     status_code=response.status_code,
                     detail=f"Failed to transfer DID: {response.text}"
                 )
+                
+            return response.json()
             
-            result = response.json()
+        result = await run_step(job, "execute", execute_transfer)
             
-            # Update off-chain entity data
-            try:
-                entity_data = await retrieve_entity_data(request.did)
+        # Update off-chain entity data
+        try:
+            def record_transfer(entity_data: Dict[str, Any]) -> None:
                 entity_data["owner_address"] = request.new_controller
-                entity_data["metadata"]["updated_at"] = datetime.now().isoformat()
                 entity_data["metadata"]["transfer_history"] = entity_data["metadata"].get("transfer_history", [])
                 entity_data["metadata"]["transfer_history"].append({
                     "previous_controller": sender_address,
@@ -1167,24 +2116,28 @@ async def transfer_did_on_chain(request: TransferDIDRequest, sender_address: str
                     "timestamp": datetime.now().isoformat()
                 })
                 
-                await update_entity_data(request.did, entity_data)
-            except Exception as e:
-                # Log error but continue since the main transfer was successful
-                logger.error(f"Failed to update off-chain entity data after transfer: {str(e)}")
+            await run_step(job, "entity", lambda: apply_entity_update(request.did, record_transfer))
+        except Exception as e:
+            if job is not None:
+                # Queued jobs retry the entity update instead of leaving it behind
+                raise
+            # Log error but continue since the main transfer was successful
+            logger.error("Failed to update off-chain entity data after transfer: %s", e)
             
-            # Return transaction result
-            return {
-                "did": request.did,
-                "transaction_hash": result.get("txhash"),
-                "status": "success",
-                "message": "DID transferred successfully"
-            }
+        # Return transaction result
+        return {
+            "did": request.did,
+            "transaction_hash": result.get("txhash"),
+            "status": "success",
+            "message": "DID transferred successfully"
+        }
             
     except Exception as e:
-        logger.error(f"Error transferring DID: {str(e)}")
+        logger.error("Error transferring DID: %s", e)
         raise HTTPException(status_code=500, detail=f"Error transferring DID: {str(e)}")
 
-async def link_dids_on_chain(request: LinkDIDsRequest, sender_address: str) -> Dict[str, Any]:
+@traced()
+async def link_dids_on_chain(request: LinkDIDsRequest, sender_address: str, job: Optional[Job] = None) -> Dict[str, Any]:
     """Link two DIDs with a specified relationship"""
     try:
         contract_address = os.environ.get("EDUID_CONTRACT_ADDRESS")
@@ -1201,84 +2154,68 @@ async def link_dids_on_chain(request: LinkDIDsRequest, sender_address: str) -> D
         }
         
         # Execute the link transaction
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{COSMOS_REST_API}/cosmwasm/wasm/v1/contract/{contract_address}/execute",
+        async def execute_link():
+            response = await cosmos_api_upstream.post(
+                f"/cosmwasm/wasm/v1/contract/{contract_address}/execute",
                 json={
                     "sender": sender_address,
                     "msg": link_msg,
                     "funds": []
                 }
             )
-            
+                
             if response.status_code != 200:
                 raise HTTPException(
                     status_code=response.status_code,
                     detail=f"Failed to link DIDs: {response.text}"
                 )
+                
+            return response.json()
             
-            result = response.json()
+        result = await run_step(job, "execute", execute_link)
             
-            # Update off-chain entity data for both DIDs
-            try:
-                # Update source DID
-                source_data = await retrieve_entity_data(request.source_did)
-                source_data["linked_dids"] = source_data.get("linked_dids", [])
-                source_data["linked_dids"].append({
-                    "did": request.target_did,
-                    "relationship": request.relationship
-                })
-                source_data["metadata"]["updated_at"] = datetime.now().isoformat()
-                await update_entity_data(request.source_did, source_data)
-                
-                # Update target DID with inverse relationship
-                target_data = await retrieve_entity_data(request.target_did)
-                target_data["linked_dids"] = target_data.get("linked_dids", [])
-                
-                # Determine inverse relationship
-                inverse_relationship = None
-                if request.relationship == RelationshipType.ENROLLED_AT:
-                    inverse_relationship = "has_student"
-                elif request.relationship == RelationshipType.EMPLOYED_BY:
-                    inverse_relationship = "employs"
-                elif request.relationship == RelationshipType.ISSUED_BY:
-                    inverse_relationship = RelationshipType.ISSUED_TO
-                elif request.relationship == RelationshipType.ISSUED_TO:
-                    inverse_relationship = RelationshipType.ISSUED_BY
-                elif request.relationship == RelationshipType.CREATED_BY:
-                    inverse_relationship = "created"
-                elif request.relationship == RelationshipType.OWNS:
-                    inverse_relationship = "owned_by"
-                elif request.relationship == RelationshipType.HAS_DEPARTMENT:
-                    inverse_relationship = RelationshipType.BELONGS_TO
-                elif request.relationship == RelationshipType.BELONGS_TO:
-                    inverse_relationship = RelationshipType.HAS_DEPARTMENT
+        # Record the relationship in the adjacency store instead of the entity documents
+        try:
+            def record_relationship():
+                if not relationship_store:
+                    raise HTTPException(status_code=503, detail="MinIO client not initialized")
+                return relationship_store.add_link(
+                    request.source_did,
+                    request.relationship,
+                    request.target_did,
+                    transaction_hash=result.get("txhash")
+                )
                 
-                if inverse_relationship:
-                    target_data["linked_dids"].append({
-                        "did": request.source_did,
-                        "relationship": inverse_relationship
-                    })
-                    target_data["metadata"]["updated_at"] = datetime.now().isoformat()
-                    await update_entity_data(request.target_did, target_data)
-            except Exception as e:
-                # Log error but continue since the main link was successful
-                logger.error(f"Failed to update off-chain entity data after linking: {str(e)}")
+            await run_step(job, "relationship", record_relationship)
+            relationship_graph.add_link(request.source_did, request.relationship, request.target_did)
+            worker_bus.publish(
+                "link_added",
+                source_did=request.source_did,
+                relationship=relationship_name(request.relationship),
+                target_did=request.target_did
+            )
+        except Exception as e:
+            if job is not None:
+                # Queued jobs retry the relationship write instead of leaving it behind
+                raise
+            # Log error but continue since the main link was successful
+            logger.error("Failed to record relationship after linking: %s", e)
             
-            # Return transaction result
-            return {
-                "source_did": request.source_did,
-                "target_did": request.target_did,
-                "relationship": request.relationship,
-                "transaction_hash": result.get("txhash"),
-                "status": "success",
-                "message": "DIDs linked successfully"
-            }
+        # Return transaction result
+        return {
+            "source_did": request.source_did,
+            "target_did": request.target_did,
+            "relationship": request.relationship,
+            "transaction_hash": result.get("txhash"),
+            "status": "success",
+            "message": "DIDs linked successfully"
+        }
             
     except Exception as e:
-        logger.error(f"Error linking DIDs: {str(e)}")
+        logger.error("Error linking DIDs: %s", e)
         raise HTTPException(status_code=500, detail=f"Error linking DIDs: {str(e)}")
 
+@traced()
 async def query_did_on_chain(did: str) -> Dict[str, Any]:
     """Query a DID document from the blockchain"""
     try:
@@ -1292,21 +2229,20 @@ async def query_did_on_chain(did: str) -> Dict[str, Any]:
             }
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{COSMOS_REST_API}/cosmwasm/wasm/v1/contract/{contract_address}/smart/{base64.b64encode(json.dumps(query_msg).encode()).decode()}"
-            )
+        response = await cosmos_api_upstream.get(
+            f"/cosmwasm/wasm/v1/contract/{contract_address}/smart/{base64.b64encode(json.dumps(query_msg).encode()).decode()}"
+        )
             
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Failed to query DID document: {response.text}"
-                )
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Failed to query DID document: {response.text}"
+            )
             
-            result = response.json()
-            return result.get("data", {})
+        result = response.json()
+        return result.get("data", {})
     except Exception as e:
-        logger.error(f"Error querying DID {did}: {str(e)}")
+        logger.error("Error querying DID %s: %s", did, e)
         raise HTTPException(status_code=500, detail=f"Error querying DID: {str(e)}")
 
 async def list_dids_on_chain(
@@ -1314,20 +2250,32 @@ async def list_dids_on_chain(
     entity_type: Optional[str] = None,
     status: Optional[str] = None,
     page: int = 1,
-    limit: int = 10
+    limit: int = 10,
+    start_after: Optional[str] = None,
+    fields: Optional[FieldSelection] = None
 ) -> Dict[str, Any]:
-    """List DIDs from the blockchain with pagination"""
+    """
+    List DIDs from the blockchain with pagination
+    
+    When start_after is given the page continues after that DID instead of
+    skipping (page - 1) * limit entries, and the response carries the
+    next_cursor to pass on the following call. A contract answering with a
+    bare list is returned as {"dids": [...]} so the cursor always has a place.
+    A field selection is applied to every listed DID.
+    """
     try:
         contract_address = os.environ.get("EDUID_CONTRACT_ADDRESS")
         if not contract_address:
             raise HTTPException(status_code=500, detail="EDUID_CONTRACT_ADDRESS environment variable not set")
         
+        if start_after is not None:
+            pagination = {"limit": limit, "start_after": start_after}
+        else:
+            pagination = {"limit": limit, "offset": (page - 1) * limit}
+        
         query_msg = {
             "list_dids": {
-                "pagination": {
-                    "limit": limit,
-                    "offset": (page - 1) * limit
-                }
+                "pagination": pagination
             }
         }
         
@@ -1340,25 +2288,99 @@ async def list_dids_on_chain(
         if status:
             query_msg["list_dids"]["status"] = status
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{COSMOS_REST_API}/cosmwasm/wasm/v1/contract/{contract_address}/smart/{base64.b64encode(json.dumps(query_msg).encode()).decode()}"
+        response = await cosmos_api_upstream.get(
+            f"/cosmwasm/wasm/v1/contract/{contract_address}/smart/{base64.b64encode(json.dumps(query_msg).encode()).decode()}"
+        )
+            
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Failed to list DIDs: {response.text}"
             )
             
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Failed to list DIDs: {response.text}"
-                )
+        result = response.json()
+        data = result.get("data", {})
+        # A bare list page is wrapped so it has somewhere to carry its cursor
+        if isinstance(data, list):
+            data = {"dids": data}
             
-            result = response.json()
-            return result.get("data", {})
+        # The last key of a full page is where the next page starts
+        items = _did_page_items(data)
+        data["next_cursor"] = _did_cursor(items[-1]) if len(items) >= limit else None
+        if fields is not None:
+            for key in ("dids", "items"):
+                if isinstance(data.get(key), list):
+                    data[key] = fields.apply(data[key])
+        return data
     except Exception as e:
-        logger.error(f"Error listing DIDs: {str(e)}")
+        logger.error("Error listing DIDs: %s", e)
         raise HTTPException(status_code=500, detail=f"Error listing DIDs: {str(e)}")
 
-async def resolve_did(did: str) -> Dict[str, Any]:
-    """Resolve a DID by combining on-chain DID document with off-chain entity data"""
+def field_selection(
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; dots select nested fields"),
+    include: Optional[str] = Query(None, description="Alias of fields")
+) -> Optional[FieldSelection]:
+    """Dependency parsing the sparse field selection of a request"""
+    return FieldSelection.parse(fields, include)
+
+def _did_page_items(data: Dict[str, Any]) -> List[Any]:
+    """Entries of a list_dids page, whichever key the contract returns them under"""
+    return data.get("dids") or data.get("items") or []
+
+def _did_cursor(item: Any) -> str:
+    """Continuation key of a list_dids entry"""
+    if isinstance(item, dict):
+        return item.get("did") or item.get("id")
+    return item
+
+async def iter_dids_on_chain(
+    controller: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    status: Optional[str] = None,
+    page_size: int = 100
+):
+    """
+    Iterate over every DID on chain, page by page.
+    
+    The next page is requested as soon as the current one arrives, so it is
+    in flight while the caller consumes the current page.
+    """
+    def fetch(cursor: Optional[str]):
+        return asyncio.create_task(list_dids_on_chain(
+            controller=controller,
+            entity_type=entity_type,
+            status=status,
+            limit=page_size,
+            start_after=cursor
+        ))
+    
+    # The first page has no key to continue from, so it starts at offset 0
+    next_page = asyncio.create_task(list_dids_on_chain(
+        controller=controller,
+        entity_type=entity_type,
+        status=status,
+        limit=page_size
+    ))
+    try:
+        while next_page is not None:
+            data = await next_page
+            cursor = data.get("next_cursor")
+            next_page = fetch(cursor) if cursor else None
+            for item in _did_page_items(data):
+                yield item
+    finally:
+        if next_page is not None and not next_page.done():
+            next_page.cancel()
+
+@traced()
+async def resolve_did(did: str, fields: Optional[FieldSelection] = None) -> Dict[str, Any]:
+    """
+    Resolve a DID by combining on-chain DID document with off-chain entity data
+    
+    With a field selection only the selected fields are returned, and the
+    entity data is not read at all unless entity_data or integrity_verified
+    is selected.
+    """
     try:
         # Query on-chain DID document
         did_document = await query_did_on_chain(did)
@@ -1366,6 +2388,9 @@ async def resolve_did(did: str) -> Dict[str, Any]:
         if not did_document:
             raise HTTPException(status_code=404, detail=f"DID {did} not found")
         
+        if fields is not None and not (fields.includes("entity_data") or fields.includes("integrity_verified")):
+            return fields.apply({"did_document": did_document})
+        
         # Fetch off-chain entity data
         try:
             entity_data = await retrieve_entity_data(did)
@@ -1382,20 +2407,21 @@ async def resolve_did(did: str) -> Dict[str, Any]:
                 "entity_data": entity_data,
                 "integrity_verified": integrity_verified
             }
-            return result
         except HTTPException as e:
-            if e.status_code == 404:
-                # If entity data not found, return only the DID document
-                return {
-                    "did_document": did_document,
-                    "entity_data": None,
-                    "integrity_verified": False
-                }
-            raise
+            if e.status_code != 404:
+                raise
+            # If entity data not found, return only the DID document
+            result = {
+                "did_document": did_document,
+                "entity_data": None,
+                "integrity_verified": False
+            }
+        return fields.apply(result) if fields is not None else result
     except Exception as e:
-        logger.error(f"Error resolving DID {did}: {str(e)}")
+        logger.error("Error resolving DID %s: %s", did, e)
         raise HTTPException(status_code=500, detail=f"Error resolving DID: {str(e)}")
 
+@traced()
 async def verify_credential(credential_did: str) -> Dict[str, Any]:
     """Verify a credential by checking its integrity and validity"""
     try:
@@ -1438,7 +2464,8 @@ async def verify_credential(credential_did: str) -> Dict[str, Any]:
             
             # Verify issuer exists and is not revoked
             if issuer_did:
-                issuer_data = await query_did_on_chain(issuer_did)
+                with tracer.span("issuer_lookup", did=issuer_did):
+                    issuer_data = await query_did_on_chain(issuer_did)
                 if not issuer_data:
                     return {
                         "verified": False,
@@ -1455,7 +2482,8 @@ async def verify_credential(credential_did: str) -> Dict[str, Any]:
             
             # Verify holder exists
             if holder_did:
-                holder_data = await query_did_on_chain(holder_did)
+                with tracer.span("holder_lookup", did=holder_did):
+                    holder_data = await query_did_on_chain(holder_did)
                 if not holder_data:
                     return {
                         "verified": False,
@@ -1469,5 +2497,214 @@ async def verify_credential(credential_did: str) -> Dict[str, Any]:
             "credential": credential_data
         }
     except Exception as e:
-        logger.error(f"Error verifying credential {credential_did}: {str(e)}")
+        logger.error("Error verifying credential %s: %s", credential_did, e)
         raise HTTPException(status_code=500, detail=f"Error verifying credential: {str(e)}")
+
+# ===================== DID Read Endpoints =====================
+
+@app.get("/api/v1/dids/list")
+async def get_dids_page(
+    controller: Optional[str] = Query(None, description="Only list DIDs of this controller"),
+    entity_type: Optional[str] = Query(None, description="Only list DIDs of this entity type"),
+    status: Optional[str] = Query(None, description="Only list DIDs with this status"),
+    page: int = Query(1, ge=1, description="Page number, when no start_after is given"),
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of DIDs per page"),
+    start_after: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    fields: Optional[FieldSelection] = Depends(field_selection)
+):
+    """List one page of DIDs on chain; fields= applies to every listed DID"""
+    return await list_dids_on_chain(
+        controller=controller,
+        entity_type=entity_type,
+        status=status,
+        page=page,
+        limit=limit,
+        start_after=start_after,
+        fields=fields
+    )
+
+@app.get("/api/v1/dids/{did}/resolve")
+async def get_resolved_did(
+    did: str = Path(..., description="DID to resolve"),
+    fields: Optional[FieldSelection] = Depends(field_selection)
+):
+    """DID document with its entity data; the entity data is only read when selected"""
+    return await resolve_did(did, fields)
+
+@app.get("/api/v1/dids/{did}/entity")
+async def get_entity_data(
+    did: str = Path(..., description="DID whose off-chain entity data to return"),
+    fields: Optional[FieldSelection] = Depends(field_selection)
+):
+    """Off-chain entity data of a DID"""
+    entity_data = await retrieve_entity_data(did)
+    return fields.apply(entity_data) if fields is not None else entity_data
+
+# ===================== Relationship Endpoints =====================
+
+@app.get("/api/v1/dids/{did}/links")
+async def get_did_links(
+    did: str = Path(..., description="DID whose neighbours to list"),
+    relationship: Optional[str] = Query(None, description="Only list links of this relationship type"),
+    limit: int = Query(50, ge=1, le=1000, description="Maximum number of links per page"),
+    cursor: Optional[str] = Query(None, description="Continuation cursor from the previous page"),
+    fields: Optional[FieldSelection] = Depends(field_selection)
+):
+    """List the DIDs linked to a DID, one page at a time"""
+    if not relationship_store:
+        raise HTTPException(status_code=503, detail="MinIO client not initialized")
+    
+    try:
+        page = relationship_store.list_neighbours(did, relationship=relationship, limit=limit, cursor=cursor)
+        if fields is not None:
+            page["items"] = fields.apply(page["items"])
+        return page
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error("Error listing links for %s: %s", did, e)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+class GraphPathPattern(BaseModel):
+    start: str = Field(..., description="DID to start from")
+    path: List[str] = Field(..., description="Relationship step sequence; alternatives separated by '|'")
+
+class GraphQueryRequest(BaseModel):
+    patterns: List[GraphPathPattern] = Field(..., min_length=1, description="Patterns whose end DIDs are intersected")
+    limit: int = Field(100, ge=1, le=10000)
+
+def _parse_relationships(relationships: Optional[str]) -> Optional[set]:
+    """Parse a comma-separated relationship filter"""
+    if not relationships:
+        return None
+    return {r.strip() for r in relationships.split(",") if r.strip()}
+
+def _require_relationship_graph():
+    if not relationship_graph.loaded:
+        raise HTTPException(status_code=503, detail="Relationship index is still loading")
+
+@app.get("/api/v1/dids/{did}/graph")
+async def get_did_neighbourhood(
+    did: str = Path(..., description="DID to start the traversal from"),
+    relationships: Optional[str] = Query(None, description="Comma-separated relationship types to follow"),
+    depth: int = Query(2, ge=1, le=6, description="Maximum number of hops"),
+    limit: int = Query(100, ge=1, le=10000, description="Maximum number of DIDs returned")
+):
+    """Breadth-first neighbourhood of a DID over the relationship index"""
+    _require_relationship_graph()
+    return relationship_graph.traverse(did, _parse_relationships(relationships), max_depth=depth, limit=limit)
+
+@app.get("/api/v1/graph/path")
+async def get_graph_path(
+    source: str = Query(..., description="Source DID"),
+    target: str = Query(..., description="Target DID"),
+    relationships: Optional[str] = Query(None, description="Comma-separated relationship types to follow"),
+    max_depth: int = Query(4, ge=1, le=8, description="Maximum number of hops")
+):
+    """Shortest relationship path between two DIDs"""
+    _require_relationship_graph()
+    hops = relationship_graph.shortest_path(source, target, _parse_relationships(relationships), max_depth=max_depth)
+    if hops is None:
+        raise HTTPException(status_code=404, detail=f"No path from {source} to {target} within {max_depth} hops")
+    return {"source": source, "target": target, "hops": hops}
+
+@app.post("/api/v1/graph/query")
+async def query_graph(query: GraphQueryRequest):
+    """
+    DIDs matching every path pattern.
+    
+    For example, the students of institution X holding a credential issued
+    by department Y are the intersection of X -> has_student and
+    Y -> issued_to -> issued_to.
+    """
+    _require_relationship_graph()
+    matches = None
+    try:
+        for pattern in query.patterns:
+            steps = [set(step.split("|")) for step in pattern.path]
+            reached = relationship_graph.match_path(pattern.start, steps)
+            matches = reached if matches is None else matches & reached
+            if not matches:
+                break
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    items = sorted(matches)
+    return {"items": items[:query.limit], "total": len(items), "truncated": len(items) > query.limit}
+
+# ===================== Export Endpoints =====================
+
+@app.get("/api/v1/dids/export")
+async def export_dids(
+    controller: Optional[str] = Query(None, description="Only export DIDs with this controller"),
+    entity_type: Optional[str] = Query(None, description="Only export DIDs of this entity type"),
+    status: Optional[str] = Query(None, description="Only export DIDs with this status"),
+    page_size: int = Query(500, ge=1, le=1000, description="Number of DIDs fetched per contract query"),
+    fields: Optional[FieldSelection] = Depends(field_selection)
+):
+    """Stream every DID on chain as newline-delimited JSON"""
+    async def generate():
+        async for item in iter_dids_on_chain(controller, entity_type, status, page_size=page_size):
+            yield json.dumps(fields.apply(item) if fields is not None else item) + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+# ===================== Job Endpoints =====================
+
+# Queueable DID operations: request model and the function that performs it
+DID_JOB_OPERATIONS = {
+    "create": (CreateDIDRequest, create_did_on_chain),
+    "update": (UpdateDIDRequest, update_did_on_chain),
+    "revoke": (RevokeDIDRequest, revoke_did_on_chain),
+    "transfer": (TransferDIDRequest, transfer_did_on_chain),
+    "link": (LinkDIDsRequest, link_dids_on_chain),
+}
+
+def _did_job_handler(model, operation):
+    """Worker handler replaying a queued request through its checkpointed steps"""
+    async def handle(job: Job) -> Dict[str, Any]:
+        request = model(**job.payload["request"])
+        return await operation(request, job.payload["sender_address"], job=job)
+    return handle
+
+class DIDJobRequest(BaseModel):
+    sender_address: str = Field(..., description="Address submitting the transaction")
+    request: Dict[str, Any] = Field(..., description="Body of the DID operation request")
+
+@app.post("/api/v1/jobs/dids/{operation}", status_code=202)
+async def enqueue_did_job(
+    operation: str = Path(..., description="One of create, update, revoke, transfer, link"),
+    body: DIDJobRequest = Body(...)
+):
+    """Queue a DID operation and return its job id immediately"""
+    if operation not in DID_JOB_OPERATIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown DID operation: {operation}")
+    if not job_queue:
+        raise HTTPException(status_code=503, detail="Job queue not available")
+    
+    model, _ = DID_JOB_OPERATIONS[operation]
+    try:
+        request = model(**body.request)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    payload = {"sender_address": body.sender_address, "request": jsonable_encoder(request)}
+    job_id = await asyncio.to_thread(job_queue.enqueue, f"did.{operation}", payload, JOB_MAX_ATTEMPTS)
+    job_pool.notify()
+    
+    return {"job_id": job_id, "status": "pending", "status_url": f"/api/v1/jobs/{job_id}"}
+
+@app.get("/api/v1/jobs/{job_id}")
+async def get_job(job_id: str = Path(..., description="Job id returned when the operation was queued")):
+    """Get the status, completed steps and result of a queued operation"""
+    if not job_queue:
+        raise HTTPException(status_code=503, detail="Job queue not available")
+    
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+# Included last so that fixed paths such as /api/v1/dids/export take
+# precedence over the parameterised /api/v1/dids/{did} routes
+app.include_router(did_router)
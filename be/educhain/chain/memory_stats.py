@@ -0,0 +1,194 @@
+"""
+Memory and garbage-collector introspection.
+
+GC callbacks time every collection per generation, size gauges track the
+gateway's in-memory caches and queues, and a tracemalloc session compares
+the heap against a baseline by allocation site, so slow RSS growth can be
+traced to the code that allocates it without attaching a debugger.
+"""
+
+import gc
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+
+GC_PAUSE = Histogram(
+    'python_gc_pause_seconds',
+    'Time spent in garbage collection by generation',
+    ['generation'],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+GC_COLLECTIONS = Counter(
+    'python_gc_runs_total',
+    'Garbage collections by generation',
+    ['generation']
+)
+GC_COLLECTED = Counter(
+    'python_gc_collected_objects_total',
+    'Objects freed by the garbage collector by generation',
+    ['generation']
+)
+GC_UNCOLLECTABLE = Counter(
+    'python_gc_uncollectable_objects_total',
+    'Objects the garbage collector found but could not free',
+    ['generation']
+)
+GC_PENDING = Gauge(
+    'python_gc_pending_objects',
+    'Allocations counted towards the next collection of each generation',
+    ['generation'],
+    multiprocess_mode='livesum'
+)
+CONTAINER_SIZE = Gauge(
+    'internal_container_size',
+    'Items held by in-memory caches and queues',
+    ['container'],
+    multiprocess_mode='livesum'
+)
+
+
+class GCMonitor:
+    """
+    Times collections through gc.callbacks.
+
+    The callback runs inside a collection, which can start while any thread
+    holds prometheus_client's value lock (one non-reentrant lock in
+    multiprocess mode), so it only updates plain ints and a deque. publish()
+    moves them into the metrics from the scrape path.
+    """
+
+    # Pauses kept between scrapes; older ones are dropped from the histogram
+    MAX_PENDING_PAUSES = 10000
+
+    def __init__(self):
+        self._started: Optional[float] = None
+        self.installed = False
+        # Fixed-size lists, so the callback never grows a container mid-collection
+        generations = len(gc.get_count())
+        self.collections = [0] * generations
+        self.collected = [0] * generations
+        self.uncollectable = [0] * generations
+        self._published = ([0] * generations, [0] * generations, [0] * generations)
+        self.pauses: Deque[Tuple[int, float]] = deque(maxlen=self.MAX_PENDING_PAUSES)
+        self._publish_lock = threading.Lock()
+
+    def install(self) -> None:
+        if not self.installed:
+            gc.callbacks.append(self._callback)
+            self.installed = True
+
+    def uninstall(self) -> None:
+        if self.installed:
+            gc.callbacks.remove(self._callback)
+            self.installed = False
+
+    def _callback(self, phase: str, info: Dict[str, int]) -> None:
+        if phase == "start":
+            self._started = time.perf_counter()
+            return
+        generation = info["generation"]
+        if self._started is not None:
+            self.pauses.append((generation, time.perf_counter() - self._started))
+            self._started = None
+        self.collections[generation] += 1
+        self.collected[generation] += info["collected"]
+        self.uncollectable[generation] += info["uncollectable"]
+
+    def publish(self) -> None:
+        """Move the collections recorded since the last call into the metrics"""
+        with self._publish_lock:
+            for counter, totals, published in zip(
+                (GC_COLLECTIONS, GC_COLLECTED, GC_UNCOLLECTABLE),
+                (self.collections, self.collected, self.uncollectable),
+                self._published
+            ):
+                for generation, total in enumerate(list(totals)):
+                    if total > published[generation]:
+                        counter.labels(str(generation)).inc(total - published[generation])
+                        published[generation] = total
+            while True:
+                try:
+                    generation, seconds = self.pauses.popleft()
+                except IndexError:
+                    break
+                GC_PAUSE.labels(str(generation)).observe(seconds)
+            for generation, count in enumerate(gc.get_count()):
+                GC_PENDING.labels(str(generation)).set(count)
+
+
+def record_container_sizes(sizes: Dict[str, int]) -> None:
+    for container, size in sizes.items():
+        CONTAINER_SIZE.labels(container).set(size)
+
+
+class TracemallocSession:
+    """Heap growth by allocation site since a baseline snapshot"""
+
+    GROUP_BY = ("lineno", "filename", "traceback")
+
+    def __init__(self):
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> None:
+        """Start tracing (if needed) and take the baseline snapshot"""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            self._baseline = self._snapshot()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._baseline = None
+            tracemalloc.stop()
+
+    def diff(self, limit: int = 25, group_by: str = "lineno", reset: bool = False) -> Dict[str, Any]:
+        """
+        Compare the heap with the baseline, largest change first.
+
+        Taking a snapshot walks every traced allocation; call it from a
+        worker thread. With reset the current snapshot becomes the baseline.
+        """
+        if group_by not in self.GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(self.GROUP_BY)}")
+        with self._lock:
+            if self._baseline is None or not tracemalloc.is_tracing():
+                raise RuntimeError("tracemalloc is not running")
+            snapshot = self._snapshot()
+            stats = snapshot.compare_to(self._baseline, group_by)
+            if reset:
+                self._baseline = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "traced_bytes": current,
+            "peak_traced_bytes": peak,
+            "growth_bytes": sum(stat.size_diff for stat in stats),
+            "sites": [_site(stat) for stat in stats[:limit]]
+        }
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>")
+        ))
+
+
+def _site(stat: tracemalloc.StatisticDiff) -> Dict[str, Any]:
+    frames: List[str] = [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+    return {
+        "site": frames[0] if frames else "?",
+        "traceback": frames,
+        "size_bytes": stat.size,
+        "size_diff_bytes": stat.size_diff,
+        "count": stat.count,
+        "count_diff": stat.count_diff
+    }
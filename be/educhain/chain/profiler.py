@@ -0,0 +1,101 @@
+"""
+On-demand diagnostics for a running gateway.
+
+`sample_stacks` is a wall-clock sampling profiler: a background thread reads
+the current frame of every thread (the event loop and the to_thread workers
+alike) at a fixed interval and counts identical stacks. The result is in the
+collapsed format understood by flamegraph.pl, speedscope and similar tools:
+one line per distinct stack, frames joined by ";" and followed by the count.
+
+`dump_tasks` lists the pending asyncio tasks with the chain of coroutines
+each one is suspended in.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Any, Callable, Dict, List, Optional
+
+
+def _frame_label(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_name}"
+
+
+def _collapse(frame: Optional[FrameType]) -> List[str]:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def sample_stacks(duration: float, interval: float = 0.01) -> Dict[str, Any]:
+    """
+    Sample the stacks of all threads for `duration` seconds.
+
+    Blocks the calling thread; run it with asyncio.to_thread so the event
+    loop keeps serving (and shows up in the samples) meanwhile.
+    """
+    me = threading.get_ident()
+    counts: Counter = Counter()
+    samples = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            counts[";".join([names.get(ident, f"thread-{ident}")] + _collapse(frame))] += 1
+        samples += 1
+        time.sleep(interval)
+    return {"duration": duration, "interval": interval, "samples": samples, "stacks": counts}
+
+
+def format_collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def _await_chain(awaitable: Any) -> List[Any]:
+    """Coroutine frames an awaitable is suspended in, outermost first"""
+    chain = []
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "ag_frame", None)
+        if frame is None:
+            break
+        chain.append(frame)
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "ag_await", None)
+    return chain
+
+
+def dump_tasks(describe_wait: Optional[Callable[[FrameType], Optional[str]]] = None) -> List[Dict[str, Any]]:
+    """
+    Describe every pending task of the running loop.
+
+    `describe_wait` may recognise a coroutine frame (for example an upstream
+    call) and return what the task is waiting on.
+    """
+    current = asyncio.current_task()
+    tasks = []
+    for task in asyncio.all_tasks():
+        if task is current or task.done():
+            continue
+        frames = _await_chain(task.get_coro())
+        waiting_on = None
+        if describe_wait is not None:
+            for frame in reversed(frames):
+                waiting_on = describe_wait(frame)
+                if waiting_on:
+                    break
+        tasks.append({
+            "name": task.get_name(),
+            "coroutine": getattr(task.get_coro(), "__qualname__", repr(task.get_coro())),
+            "stack": [f"{_frame_label(frame)}:{frame.f_lineno}" for frame in frames],
+            "waiting_on": waiting_on
+        })
+    tasks.sort(key=lambda task: (task["waiting_on"] is None, task["name"]))
+    return tasks
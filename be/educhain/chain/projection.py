@@ -0,0 +1,67 @@
+"""
+Sparse field selection for API responses.
+
+Clients pass `fields=` (or its alias `include=`) as a comma-separated list of
+field paths, with dots for nested fields: `did_document.metadata.status,
+integrity_verified`. A path selects that field and everything below it;
+fields that do not exist are simply left out. Lists are projected element by
+element, so `items.did` keeps only the `did` of every item.
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+
+class FieldSelection:
+    """A parsed tree of selected field paths"""
+
+    def __init__(self, paths: Iterable[str]):
+        self._tree: Dict[str, Optional[dict]] = {}
+        for path in paths:
+            node = self._tree
+            parts = [part for part in path.strip().split(".") if part]
+            for i, part in enumerate(parts):
+                last = i == len(parts) - 1
+                if part in node and node[part] is None:
+                    # An ancestor is already selected as a whole
+                    break
+                if last:
+                    node[part] = None
+                else:
+                    node = node.setdefault(part, {})
+
+    @classmethod
+    def parse(cls, *values: Optional[str]) -> Optional["FieldSelection"]:
+        """Parse comma-separated selections; None when nothing was selected"""
+        paths = [path for value in values if value for path in value.split(",") if path.strip()]
+        if not paths:
+            return None
+        return cls(paths)
+
+    def __repr__(self) -> str:
+        return f"FieldSelection({self._tree!r})"
+
+    def includes(self, key: str) -> bool:
+        """Whether the top-level field, or anything below it, is selected"""
+        return key in self._tree
+
+    def child(self, key: str) -> Optional["FieldSelection"]:
+        """Selection below a top-level field; None if the whole field is selected"""
+        subtree = self._tree.get(key)
+        if subtree is None:
+            return None
+        selection = FieldSelection(())
+        selection._tree = subtree
+        return selection
+
+    def apply(self, data: Any) -> Any:
+        return _project(data, self._tree)
+
+
+def _project(data: Any, tree: Optional[dict]) -> Any:
+    if tree is None:
+        return data
+    if isinstance(data, list):
+        return [_project(item, tree) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {key: _project(data[key], subtree) for key, subtree in tree.items() if key in data}
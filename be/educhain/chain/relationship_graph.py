@@ -0,0 +1,165 @@
+"""
+In-memory adjacency index over DID relationships for multi-hop queries.
+
+The index mirrors the relationship store (both directions of every link) as
+dict-of-dict-of-set adjacency lists, so breadth-first traversals, path
+pattern matches and shortest-path lookups never touch MinIO.
+"""
+
+import sys
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from relationship_store import inverse_relationship, relationship_name
+
+
+class RelationshipGraph:
+    """Thread-safe adjacency index keyed by DID and relationship type"""
+
+    def __init__(self):
+        self._adjacency: Dict[str, Dict[str, Set[str]]] = {}
+        self._edge_count = 0
+        self._lock = threading.RLock()
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._adjacency)
+
+    @property
+    def edge_count(self) -> int:
+        return self._edge_count
+
+    def add_edge(self, did: str, relationship: str, other: str) -> None:
+        """Add a single directed edge"""
+        did, relationship, other = sys.intern(did), sys.intern(relationship), sys.intern(other)
+        with self._lock:
+            targets = self._adjacency.setdefault(did, {}).setdefault(relationship, set())
+            if other not in targets:
+                targets.add(other)
+                self._edge_count += 1
+
+    def add_link(self, source_did: str, relationship: Any, target_did: str) -> None:
+        """Add a link and its inverse, mirroring RelationshipStore.add_link"""
+        relationship = relationship_name(relationship)
+        self.add_edge(source_did, relationship, target_did)
+        inverse = inverse_relationship(relationship)
+        if inverse:
+            self.add_edge(target_did, inverse, source_did)
+
+    def load(self, edges: Iterable[Tuple[str, str, str]]) -> int:
+        """Bulk-load (did, relationship, neighbour) edges; returns the edge count"""
+        for did, relationship, other in edges:
+            self.add_edge(did, relationship, other)
+        self.loaded = True
+        return self._edge_count
+
+    def neighbours(self, did: str, relationships: Optional[Set[str]] = None) -> Iterator[Tuple[str, str]]:
+        """Yield (relationship, neighbour) pairs of a DID"""
+        with self._lock:
+            adjacency = self._adjacency.get(did)
+            if not adjacency:
+                return iter(())
+            pairs = [
+                (relationship, other)
+                for relationship, others in adjacency.items()
+                if relationships is None or relationship in relationships
+                for other in others
+            ]
+        return iter(pairs)
+
+    def traverse(
+        self,
+        start_did: str,
+        relationships: Optional[Set[str]] = None,
+        max_depth: int = 2,
+        limit: int = 100,
+        max_visited: int = 100000
+    ) -> Dict[str, Any]:
+        """
+        Breadth-first traversal from a DID.
+
+        Returns every DID reached within max_depth hops along the given
+        relationship types, each with its depth and the edge it was reached by.
+        The walk stops after `limit` results or `max_visited` DIDs.
+        """
+        visited = {start_did}
+        queue = deque([(start_did, 0)])
+        results = []
+        truncated = False
+
+        while queue:
+            did, depth = queue.popleft()
+            if depth >= max_depth:
+                continue
+            for relationship, other in self.neighbours(did, relationships):
+                if other in visited:
+                    continue
+                if len(results) >= limit or len(visited) >= max_visited:
+                    truncated = True
+                    queue.clear()
+                    break
+                visited.add(other)
+                results.append({"did": other, "depth": depth + 1, "relationship": relationship, "parent": did})
+                queue.append((other, depth + 1))
+
+        return {"start": start_did, "items": results, "truncated": truncated}
+
+    def match_path(self, start_did: str, path: List[Set[str]], max_visited: int = 100000) -> Set[str]:
+        """
+        DIDs reached from start_did by following a sequence of relationship steps.
+
+        Each step is a set of acceptable relationship types.
+        """
+        frontier = {start_did}
+        visited = 0
+        for step in path:
+            next_frontier = set()
+            for did in frontier:
+                for _, other in self.neighbours(did, step):
+                    next_frontier.add(other)
+                    visited += 1
+                    if visited >= max_visited:
+                        raise ValueError("Path query exceeded the traversal budget")
+            frontier = next_frontier
+            if not frontier:
+                break
+        return frontier
+
+    def shortest_path(
+        self,
+        source_did: str,
+        target_did: str,
+        relationships: Optional[Set[str]] = None,
+        max_depth: int = 4,
+        max_visited: int = 100000
+    ) -> Optional[List[Dict[str, str]]]:
+        """Shortest list of hops from source to target, or None if unreachable"""
+        if source_did == target_did:
+            return []
+
+        parents: Dict[str, Tuple[str, str]] = {source_did: ("", "")}
+        queue = deque([(source_did, 0)])
+        while queue:
+            did, depth = queue.popleft()
+            if depth >= max_depth:
+                continue
+            for relationship, other in self.neighbours(did, relationships):
+                if other in parents:
+                    continue
+                parents[other] = (did, relationship)
+                if other == target_did:
+                    hops = []
+                    node = other
+                    while node != source_did:
+                        parent, via = parents[node]
+                        hops.append({"from": parent, "relationship": via, "to": node})
+                        node = parent
+                    return list(reversed(hops))
+                if len(parents) >= max_visited:
+                    return None
+                queue.append((other, depth + 1))
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"dids": len(self._adjacency), "edges": self._edge_count, "loaded": self.loaded}
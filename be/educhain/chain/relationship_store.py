@@ -0,0 +1,194 @@
+"""
+Adjacency store for relationships between DIDs.
+
+Every link is kept as two small MinIO objects, one keyed by
+(source, relationship) and one by (target, inverse relationship):
+
+    relationships/{source}/{relationship}/{target}.json
+    relationships/{target}/{inverse}/{source}.json
+
+Adding a link is therefore two constant-size writes, and the neighbours of a
+DID are listed page by page from the key prefix alone, without reading or
+rewriting the entity documents of either side.
+
+Links used to be kept in a linked_dids array inside both entity documents;
+backfill() copies those into the store once, after which a marker object
+records that the copy is done.
+"""
+
+import io
+import json
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, Optional, Tuple
+
+RELATIONSHIP_PREFIX = "relationships"
+# Written once the linked_dids arrays of the entity documents have been copied
+BACKFILL_MARKER = "linked_dids_backfilled.json"
+
+# Relationship recorded on the target when a link is created from the source
+INVERSE_RELATIONSHIPS = {
+    "enrolled_at": "has_student",
+    "employed_by": "employs",
+    "issued_by": "issued_to",
+    "issued_to": "issued_by",
+    "created_by": "created",
+    "owns": "owned_by",
+    "has_department": "belongs_to",
+    "belongs_to": "has_department",
+}
+
+
+def relationship_name(relationship: Any) -> str:
+    """Plain string value of a relationship, accepting RelationshipType members"""
+    return str(getattr(relationship, "value", relationship))
+
+
+def inverse_relationship(relationship: Any) -> Optional[str]:
+    """Inverse of a relationship type, or None if it has no inverse"""
+    return INVERSE_RELATIONSHIPS.get(relationship_name(relationship))
+
+
+class RelationshipStore:
+    """
+    Paged adjacency lists of DID relationships stored as MinIO objects.
+
+    instrument(operation, **attributes), if given, wraps each MinIO request
+    and is called with the S3 operation name, e.g. to trace and time it.
+    """
+
+    def __init__(
+        self,
+        client,
+        bucket: str,
+        prefix: str = RELATIONSHIP_PREFIX,
+        instrument: Optional[Callable[..., ContextManager]] = None
+    ):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.instrument = instrument or (lambda operation, **attributes: nullcontext())
+
+    def _edge_key(self, did: str, relationship: str, other: str) -> str:
+        return f"{self.prefix}/{did}/{relationship}/{other}.json"
+
+    def _parse_key(self, object_name: str) -> Optional[Tuple[str, str, str]]:
+        parts = object_name[len(self.prefix) + 1:].split("/")
+        if len(parts) != 3 or not parts[2].endswith(".json"):
+            return None
+        return parts[0], parts[1], parts[2][:-len(".json")]
+
+    def _put_edge(self, did: str, relationship: str, other: str, body: Dict[str, Any]) -> None:
+        data_bytes = json.dumps(body).encode('utf-8')
+        object_name = self._edge_key(did, relationship, other)
+        with self.instrument("put_object", object=object_name, size=len(data_bytes)):
+            self.client.put_object(
+                bucket_name=self.bucket,
+                object_name=object_name,
+                data=io.BytesIO(data_bytes),
+                length=len(data_bytes),
+                content_type="application/json"
+            )
+
+    def add_link(
+        self,
+        source_did: str,
+        relationship: Any,
+        target_did: str,
+        transaction_hash: Optional[str] = None
+    ) -> Optional[str]:
+        """Record a link and its inverse; returns the inverse relationship used"""
+        relationship = relationship_name(relationship)
+        inverse = inverse_relationship(relationship)
+        body = {
+            "source_did": source_did,
+            "target_did": target_did,
+            "relationship": relationship,
+            "created_at": datetime.now().isoformat(),
+            "transaction_hash": transaction_hash
+        }
+
+        self._put_edge(source_did, relationship, target_did, body)
+        if inverse:
+            self._put_edge(target_did, inverse, source_did, {**body, "inverse_relationship": inverse})
+        return inverse
+
+    def is_backfilled(self) -> bool:
+        """Whether backfill() has already run to completion"""
+        marker = f"{self.prefix}/{BACKFILL_MARKER}"
+        with self.instrument("list_objects", prefix=marker):
+            return any(obj.object_name == marker for obj in self.client.list_objects(self.bucket, prefix=marker))
+
+    def backfill(self, documents: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Record the links in the linked_dids arrays of (did, entity document) pairs.
+
+        Every entry is added like a new link, so running it again, or next to
+        links that are already stored, only rewrites the same objects.
+        Returns the number of entries copied.
+        """
+        copied = 0
+        for did, document in documents:
+            for entry in document.get("linked_dids") or []:
+                if isinstance(entry, dict) and entry.get("did") and entry.get("relationship"):
+                    self.add_link(did, entry["relationship"], entry["did"])
+                    copied += 1
+
+        body = json.dumps({"completed_at": datetime.now().isoformat(), "links": copied}).encode('utf-8')
+        with self.instrument("put_object", object=f"{self.prefix}/{BACKFILL_MARKER}", size=len(body)):
+            self.client.put_object(
+                bucket_name=self.bucket,
+                object_name=f"{self.prefix}/{BACKFILL_MARKER}",
+                data=io.BytesIO(body),
+                length=len(body),
+                content_type="application/json"
+            )
+        return copied
+
+    def list_neighbours(
+        self,
+        did: str,
+        relationship: Optional[Any] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        List one page of neighbours of a DID.
+
+        The cursor is the object key of the last item returned; pass it back
+        to continue after that item. A cursor from outside this listing
+        raises ValueError.
+        """
+        if relationship:
+            prefix = f"{self.prefix}/{did}/{relationship_name(relationship)}/"
+        else:
+            prefix = f"{self.prefix}/{did}/"
+        if cursor is not None and not cursor.startswith(prefix):
+            raise ValueError("Cursor does not belong to this listing")
+
+        items = []
+        next_cursor = None
+        with self.instrument("list_objects", prefix=prefix):
+            objects = self.client.list_objects(self.bucket, prefix=prefix, recursive=True, start_after=cursor)
+            for obj in objects:
+                if len(items) == limit:
+                    next_cursor = items[-1]["cursor"]
+                    break
+                parsed = self._parse_key(obj.object_name)
+                if parsed is None:
+                    continue
+                _, rel, other = parsed
+                items.append({"did": other, "relationship": rel, "cursor": obj.object_name})
+
+        return {
+            "did": did,
+            "items": [{"did": item["did"], "relationship": item["relationship"]} for item in items],
+            "next_cursor": next_cursor
+        }
+
+    def iter_edges(self) -> Iterator[Tuple[str, str, str]]:
+        """Yield every stored (did, relationship, neighbour) edge, inverses included"""
+        for obj in self.client.list_objects(self.bucket, prefix=f"{self.prefix}/", recursive=True):
+            parsed = self._parse_key(obj.object_name)
+            if parsed is not None:
+                yield parsed
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, LaneConfig, Rejected, TokenBucket, retry_after_header
+
+
+def controller(**overrides):
+    config = dict(concurrency=1, rate=0, burst=0, queue_size=1, queue_timeout=0.5)
+    config.update(overrides)
+    return AdmissionController({"read": LaneConfig(**config)})
+
+
+def test_token_bucket_refills():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.take() == 0
+    assert bucket.take() == 0
+    wait = bucket.take()
+    assert 0 < wait <= 0.1
+    bucket.updated -= 0.1
+    assert bucket.take() == 0
+
+
+def test_rate_limit_is_per_client():
+    async def scenario():
+        admission = controller(concurrency=10, rate=1, burst=1)
+        admission.release(await admission.admit("read", "a"))
+        with pytest.raises(Rejected) as rejected:
+            await admission.admit("read", "a")
+        admission.release(await admission.admit("read", "b"))
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    assert rejected.reason == "rate limit exceeded"
+    assert 0 < rejected.retry_after <= 1
+
+
+def test_waiter_gets_released_slot():
+    async def scenario():
+        admission = controller()
+        lane = await admission.admit("read", "a")
+        waiting = asyncio.create_task(admission.admit("read", "b"))
+        await asyncio.sleep(0.01)
+        assert admission.stats()["read"]["waiting"] == 1
+        admission.release(lane)
+        admission.release(await waiting)
+        return admission.stats()["read"]
+
+    assert asyncio.run(scenario())["in_flight"] == 0
+
+
+def test_sheds_when_queue_is_full():
+    async def scenario():
+        admission = controller(queue_size=1, queue_timeout=5)
+        lane = await admission.admit("read", "a")
+        waiting = asyncio.create_task(admission.admit("read", "b"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(Rejected) as rejected:
+            await admission.admit("read", "c")
+        admission.release(lane)
+        admission.release(await waiting)
+        return rejected.value
+
+    assert asyncio.run(scenario()).reason == "is at capacity"
+
+
+def test_sheds_after_queue_timeout():
+    async def scenario():
+        admission = controller(queue_timeout=0.05)
+        lane = await admission.admit("read", "a")
+        with pytest.raises(Rejected):
+            await admission.admit("read", "b")
+        admission.release(lane)
+        return admission.stats()["read"]
+
+    stats = asyncio.run(scenario())
+    assert stats["in_flight"] == 0
+    assert stats["waiting"] == 0
+
+
+def test_retry_after_header_rounds_up():
+    assert retry_after_header(0.2) == "1"
+    assert retry_after_header(2.5) == "3"
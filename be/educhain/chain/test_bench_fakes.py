@@ -0,0 +1,60 @@
+import asyncio
+import base64
+import io
+import json
+
+import httpx
+import pytest
+from minio.error import S3Error
+
+from bench_fakes import FakeNode, InMemoryObjectStore, Latency
+
+
+def smart_path(message):
+    return f"/cosmwasm/wasm/v1/contract/c1/smart/{base64.b64encode(json.dumps(message).encode()).decode()}"
+
+
+def test_latency_parse():
+    latency = Latency.parse("5+-2")
+    assert (latency.mean_ms, latency.jitter_ms) == (5.0, 2.0)
+    assert all(0.003 <= latency.sample() <= 0.007 for _ in range(50))
+    assert Latency.parse("0").sample() == 0.0
+
+
+def test_object_store_matches_minio_api():
+    store = InMemoryObjectStore()
+    result = store.put_object("bucket", "person/did:1.json", io.BytesIO(b'{"a": 1}'), 8)
+    assert store.stat_object("bucket", "person/did:1.json").etag == result.etag
+    assert store.get_object("bucket", "person/did:1.json").read() == b'{"a": 1}'
+    assert [obj.object_name for obj in store.list_objects("bucket", prefix="person/")] == ["person/did:1.json"]
+    store.remove_object("bucket", "person/did:1.json")
+    with pytest.raises(S3Error) as error:
+        store.get_object("bucket", "person/did:1.json")
+    assert error.value.code == "NoSuchKey"
+
+
+def test_node_serves_rpc_and_contract_calls():
+    node = FakeNode(block_time=0.05)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=node.transport(), base_url="http://node") as client:
+            executed = await client.post("/cosmwasm/wasm/v1/contract/c1/execute", json={
+                "sender": "edu1", "msg": {"register_did": {"did": "did:eduid:1", "metadata": {"status": "active"}}}
+            })
+            document = await client.get(smart_path({"get_did_document": {"did": "did:eduid:1"}}))
+            listed = await client.get(smart_path({"list_dids": {"pagination": {"limit": 10, "offset": 0}}}))
+            first = (await client.get("/status")).json()["result"]["sync_info"]["latest_block_height"]
+            await asyncio.sleep(0.12)
+            status = (await client.get("/status")).json()["result"]["sync_info"]
+            future = await client.get(f"/block?height={int(status['latest_block_height']) + 100}")
+            unknown = await client.get("/nope")
+            return executed, document, listed, int(first), status, future, unknown
+
+    executed, document, listed, first, status, future, unknown = asyncio.run(scenario())
+    assert executed.json()["txhash"]
+    assert document.json()["data"]["metadata"] == {"status": "active"}
+    assert [item["id"] for item in listed.json()["data"]["dids"]] == ["did:eduid:1"]
+    assert int(status["latest_block_height"]) >= first + 2
+    assert status["latest_block_time"].endswith("Z")
+    assert future.status_code == 400
+    assert unknown.status_code == 404
@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def bench(*args):
+    return subprocess.run(
+        [sys.executable, "bench_gateway.py", "--scenarios", "resolve,list,create,blocks_latest", "--requests", "4",
+         "--concurrency", "2", "--warmup", "0", "--dids", "5", "--block-time", "0.5", *args],
+        cwd=HERE, capture_output=True, text=True, timeout=120
+    )
+
+
+def test_smoke_run_records_and_checks_a_baseline(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    recorded = bench("--baseline", str(baseline), "--update-baseline")
+    assert recorded.returncode == 0, recorded.stderr
+    scenarios = json.loads(baseline.read_text())["scenarios"]
+    assert set(scenarios) == {"resolve", "list", "create", "blocks_latest"}
+    assert all(result["requests"] == 4 and result["errors"] == 0 for result in scenarios.values())
+
+    checked = bench("--baseline", str(baseline), "--tolerance", "1000")
+    assert checked.returncode == 0, checked.stderr
+    assert "REGRESSION" not in checked.stderr
+    assert "%" in checked.stdout.splitlines()[-1]
+
+    # A negative tolerance makes every scenario count as regressed
+    failed = bench("--baseline", str(baseline), "--tolerance", "-0.99")
+    assert failed.returncode == 1
+    assert "REGRESSION resolve: p99" in failed.stderr
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from cluster_state import SharedHealthState, StripedLock, WorkerBus
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_health_state_is_in_process_without_state_dir():
+    state = SharedHealthState()
+    assert state.get() is None
+    now = datetime.now()
+    state.set(now)
+    assert state.get() == now
+
+
+def test_health_state_is_shared_through_state_dir():
+    with tempfile.TemporaryDirectory() as state_dir:
+        first = SharedHealthState(state_dir)
+        second = SharedHealthState(state_dir)
+        assert second.get() is None
+
+        now = datetime.now()
+        first.set(now)
+        assert abs((second.get() - now).total_seconds()) < 0.001
+
+
+def test_bus_is_disabled_without_state_dir():
+    async def run():
+        bus = WorkerBus()
+        bus.start()
+        assert not bus.enabled
+        bus.publish("entity_changed", did="did:educhain:1")
+        bus.stop()
+
+    asyncio.run(run())
+
+
+def test_bus_delivers_to_other_workers_only():
+    async def run(state_dir):
+        received = []
+        publisher, subscriber = WorkerBus(state_dir), WorkerBus(state_dir)
+        publisher.subscribe("entity_changed", lambda message: received.append(("publisher", message["did"])))
+        subscriber.subscribe("entity_changed", lambda message: received.append(("subscriber", message["did"])))
+
+        # Both buses live in this process, so give them distinct socket names
+        publisher.start()
+        os.rename(publisher._path, publisher._path.replace(".sock", "-a.sock"))
+        publisher._path = publisher._path.replace(".sock", "-a.sock")
+        subscriber.start()
+
+        publisher.publish("entity_changed", did="did:educhain:1")
+        deadline = time.monotonic() + 1
+        while not received and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+
+        publisher.stop()
+        subscriber.stop()
+        return received
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        assert asyncio.run(run(state_dir)) == [("subscriber", "did:educhain:1")]
+
+
+def test_bus_removes_sockets_of_dead_workers():
+    async def run(state_dir):
+        bus = WorkerBus(state_dir)
+        bus.start()
+        stale = os.path.join(bus.directory, "999999999.sock")
+        open(stale, "w").close()
+        bus.publish("entity_changed", did="did:educhain:1")
+        bus.stop()
+        return os.path.exists(stale)
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        assert asyncio.run(run(state_dir)) is False
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_striped_lock_excludes_threads(shared):
+    with tempfile.TemporaryDirectory() as state_dir:
+        lock = StripedLock(state_dir if shared else None, "entities", stripes=4)
+        inside = []
+        overlaps = []
+
+        def hold():
+            with lock.hold("did:educhain:1"):
+                inside.append(1)
+                overlaps.append(len(inside))
+                time.sleep(0.01)
+                inside.pop()
+
+        threads = [threading.Thread(target=hold) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert overlaps == [1] * 5
+
+
+def test_striped_lock_excludes_other_processes():
+    with tempfile.TemporaryDirectory() as state_dir:
+        lock = StripedLock(state_dir, "entities")
+        worker = subprocess.Popen([sys.executable, "-c", (
+            "import time\n"
+            "from cluster_state import StripedLock\n"
+            f"with StripedLock({state_dir!r}, 'entities').hold('did:educhain:1'):\n"
+            "    print('held', flush=True)\n"
+            "    time.sleep(0.3)\n"
+        )], cwd=HERE, stdout=subprocess.PIPE, text=True)
+        assert worker.stdout.readline().strip() == "held"
+        start = time.monotonic()
+        with lock.hold("did:educhain:1"):
+            waited = time.monotonic() - start
+        assert worker.wait() == 0
+        assert waited >= 0.1
@@ -0,0 +1,142 @@
+import asyncio
+import base64
+import json
+
+import httpx
+import pytest
+
+from bench_fakes import FakeNode
+from contract_simulator import ChainClock, ContractError, CredentialRegistry, DIDRegistry, synthetic_dids
+
+
+def register(registry, did, controller="edu1a", entity_type="person", status="active"):
+    return registry.execute(controller, {"register_did": {
+        "did": did,
+        "controller": controller,
+        "verification_method": {"id": f"{did}#key-1"},
+        "authentication": [f"{did}#key-1"],
+        "metadata": {"entity_type": entity_type, "status": status}
+    }})
+
+
+def listed(registry, **args):
+    page = registry.query({"list_dids": args})
+    return [document["id"] for document in page["dids"]], page["total"]
+
+
+def test_register_query_and_update():
+    registry = DIDRegistry()
+    result = register(registry, "did:eduid:1")
+    assert result["action"] == "register_did" and result["height"] >= 1
+    with pytest.raises(ContractError):
+        register(registry, "did:eduid:1")
+
+    registry.execute("edu1a", {"update_did_metadata": {"did": "did:eduid:1", "metadata": {"hash": "abc"}}})
+    registry.execute("edu1a", {"update_did": {
+        "did": "did:eduid:1",
+        "add_service": [{"id": "did:eduid:1#hub"}],
+        "remove_authentication": ["did:eduid:1#key-1"]
+    }})
+    document = registry.query({"get_did_document": {"did": "did:eduid:1"}})
+    assert document["metadata"] == {"entity_type": "person", "status": "active", "hash": "abc"}
+    assert document["service"] == [{"id": "did:eduid:1#hub"}]
+    assert document["authentication"] == []
+    with pytest.raises(ContractError):
+        registry.query({"get_did_document": {"did": "did:eduid:missing"}})
+
+
+def test_list_paging_and_filters_follow_indexes():
+    registry = DIDRegistry()
+    for n in range(10):
+        register(registry, f"did:eduid:{n}", controller="edu1a" if n % 2 else "edu1b",
+                 entity_type="person" if n < 6 else "school")
+
+    assert listed(registry, pagination={"limit": 3, "offset": 2}) == (["did:eduid:2", "did:eduid:3", "did:eduid:4"], 10)
+    assert listed(registry, pagination={"limit": 2, "start_after": "did:eduid:7"}) == (["did:eduid:8", "did:eduid:9"], 10)
+    assert listed(registry, controller="edu1a", pagination={"limit": 10}) == (
+        ["did:eduid:1", "did:eduid:3", "did:eduid:5", "did:eduid:7", "did:eduid:9"], 5)
+    assert listed(registry, controller="edu1a", entity_type="person", pagination={"limit": 1, "offset": 1}) == (
+        ["did:eduid:3"], 3)
+
+    registry.execute("edu1a", {"revoke_did": {"did": "did:eduid:3", "reason": "lost"}})
+    registry.execute("edu1a", {"transfer_did": {"did": "did:eduid:5", "new_controller": "edu1c"}})
+    assert listed(registry, status="revoked", pagination={"limit": 10}) == (["did:eduid:3"], 1)
+    assert listed(registry, controller="edu1c", pagination={"limit": 10}) == (["did:eduid:5"], 1)
+    assert listed(registry, controller="edu1a", status="active", pagination={"limit": 10}) == (
+        ["did:eduid:1", "did:eduid:7", "did:eduid:9"], 3)
+    with pytest.raises(ContractError):
+        registry.execute("edu1a", {"revoke_did": {"did": "did:eduid:3"}})
+
+
+def test_links_and_controller_checks():
+    registry = DIDRegistry(check_controller=True)
+    register(registry, "did:eduid:1")
+    register(registry, "did:eduid:2")
+    registry.execute("edu1a", {"link_dids": {"source_did": "did:eduid:1", "target_did": "did:eduid:2", "relationship": "holder"}})
+    assert [link["target_did"] for link in registry.links["did:eduid:1"]] == ["did:eduid:2"]
+    with pytest.raises(ContractError):
+        registry.execute("edu1a", {"link_dids": {"source_did": "did:eduid:1", "target_did": "did:eduid:2", "relationship": "holder"}})
+    with pytest.raises(ContractError):
+        registry.execute("edu1a", {"link_dids": {"source_did": "did:eduid:1", "target_did": "did:eduid:9", "relationship": "holder"}})
+    with pytest.raises(ContractError):
+        registry.execute("edu1z", {"revoke_did": {"did": "did:eduid:1"}})
+
+
+def test_bulk_register_matches_incremental_state():
+    registry = DIDRegistry()
+    register(registry, "did:eduid:sim-0000000003", controller="edu1b")
+    assert registry.bulk_register(synthetic_dids(3, "edu1b", entity_type="school"), sender="edu1b") == 3
+    assert len(registry) == 4
+    assert listed(registry, controller="edu1b", entity_type="school", pagination={"limit": 10})[1] == 3
+    assert listed(registry, pagination={"limit": 2, "start_after": "did:eduid:sim-0000000001"})[0] == [
+        "did:eduid:sim-0000000002", "did:eduid:sim-0000000003"]
+    with pytest.raises(ContractError):
+        registry.bulk_register(synthetic_dids(1, "edu1b"))
+
+
+def test_failed_bulk_register_keeps_indexes_sorted():
+    registry = DIDRegistry()
+    register(registry, "did:eduid:sim-0000000001", controller="edu1b")
+    with pytest.raises(ContractError):
+        registry.bulk_register(reversed(list(synthetic_dids(4, "edu1b"))), sender="edu1b")
+    assert len(registry) == 3
+    assert listed(registry, pagination={"limit": 10})[0] == [
+        "did:eduid:sim-0000000001", "did:eduid:sim-0000000002", "did:eduid:sim-0000000003"]
+    assert listed(registry, controller="edu1b", pagination={"limit": 1, "start_after": "did:eduid:sim-0000000001"})[0] == [
+        "did:eduid:sim-0000000002"]
+
+
+def test_credentials_issue_revoke_and_query():
+    registry = CredentialRegistry()
+    assert registry.query({"IsRevoked": {"hash": "h1"}}) is False
+    registry.execute("edu1a", {"IssueVC": {"hash": "h1", "metadata": "m", "issuer": "did:eduid:1", "signature": "s"}})
+    assert registry.query({"GetCredential": {"hash": "h1"}})["issuer"] == "did:eduid:1"
+    registry.execute("edu1a", {"RevokeVC": {"hash": "h1"}})
+    assert registry.query({"IsRevoked": {"hash": "h1"}}) is True
+    with pytest.raises(ContractError):
+        registry.execute("edu1a", {"RevokeVC": {"hash": "h2"}})
+    assert registry.bulk_issue({"hash": f"b{n}", "issuer": "edu1a"} for n in range(5)) == 5
+    assert len(registry) == 6
+
+
+def test_node_routes_contracts_by_address_and_reports_contract_errors():
+    clock = ChainClock(block_time=60)
+    node = FakeNode(contract=DIDRegistry(clock), contracts={"cert": CredentialRegistry(clock)})
+
+    def smart(address, message):
+        return f"/cosmwasm/wasm/v1/contract/{address}/smart/{base64.b64encode(json.dumps(message).encode()).decode()}"
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=node.transport(), base_url="http://node") as client:
+            issued = await client.post("/cosmwasm/wasm/v1/contract/cert/execute", json={
+                "sender": "edu1a", "msg": {"IssueVC": {"hash": "h1", "issuer": "edu1a"}}
+            })
+            revoked = await client.get(smart("cert", {"IsRevoked": {"hash": "h1"}}))
+            missing = await client.get(smart("eduid", {"get_did_document": {"did": "did:eduid:none"}}))
+            return issued, revoked, missing
+
+    issued, revoked, missing = asyncio.run(scenario())
+    assert issued.status_code == 200 and int(issued.json()["height"]) == node.height
+    assert revoked.json()["data"] is False
+    assert missing.status_code == 500
+    assert missing.json()["message"].endswith("query wasm contract failed")
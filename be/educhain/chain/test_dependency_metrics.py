@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from dependency_metrics import track_dependency
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_track_dependency_counts_outcomes():
+    labels = {"dependency": "minio", "operation": "test_put"}
+    with track_dependency("minio", "test_put", pool="test_pool"):
+        assert sample("connection_pool_in_use", pool="test_pool") == 1
+    with pytest.raises(ValueError):
+        with track_dependency("minio", "test_put", pool="test_pool"):
+            raise ValueError("boom")
+    with track_dependency("minio", "test_put") as call:
+        call.outcome = "not_found"
+
+    assert sample("dependency_requests_total", outcome="success", **labels) == 1
+    assert sample("dependency_requests_total", outcome="error", **labels) == 1
+    assert sample("dependency_requests_total", outcome="not_found", **labels) == 1
+    assert sample("dependency_request_duration_seconds_count", **labels) == 3
+    assert sample("connection_pool_in_use", pool="test_pool") == 0
+
+
+def test_track_dependency_counts_cancellation():
+    async def scenario():
+        with track_dependency("contract", "test_query"):
+            await asyncio.sleep(10)
+
+    async def cancel():
+        task = asyncio.ensure_future(scenario())
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(cancel())
+    assert sample(
+        "dependency_requests_total", dependency="contract", operation="test_query", outcome="cancelled"
+    ) == 1
@@ -0,0 +1,54 @@
+import time
+
+from entity_cache import EntityCache
+
+def test_put_and_lookup_returns_isolated_copy():
+    cache = EntityCache(max_bytes=1024)
+    doc = {"did": "did:eduid:a", "metadata": {"status": "active"}}
+    cache.put("did:eduid:a", doc, "person/did:eduid:a.json", "etag-1", 100)
+
+    # Mutating the caller's dict must not leak into the cache
+    doc["metadata"]["status"] = "revoked"
+    entry = cache.lookup("did:eduid:a")
+    assert entry.data["metadata"]["status"] == "active"
+    assert entry.object_name == "person/did:eduid:a.json"
+    assert entry.etag == "etag-1"
+
+def test_byte_budget_evicts_least_recently_used():
+    cache = EntityCache(max_bytes=250)
+    cache.put("a", {"n": 1}, "person/a.json", "1", 100)
+    cache.put("b", {"n": 2}, "person/b.json", "2", 100)
+    cache.lookup("a")
+    cache.put("c", {"n": 3}, "person/c.json", "3", 100)
+
+    assert cache.lookup("b") is None
+    assert cache.lookup("a") is not None
+    assert cache.lookup("c") is not None
+    assert cache.size_bytes == 200
+
+def test_oversized_entry_is_not_cached():
+    cache = EntityCache(max_bytes=50)
+    cache.put("a", {"n": 1}, "person/a.json", "1", 100)
+    assert cache.lookup("a") is None
+    assert len(cache) == 0
+
+def test_ttl_freshness():
+    cache = EntityCache(max_bytes=1024, ttl_seconds=0.05)
+    cache.put("a", {"n": 1}, "person/a.json", "1", 10)
+    assert cache.is_fresh(cache.lookup("a"))
+    time.sleep(0.06)
+    assert not cache.is_fresh(cache.lookup("a"))
+    cache.touch("a")
+    assert cache.is_fresh(cache.lookup("a"))
+
+def test_zero_ttl_always_revalidates():
+    cache = EntityCache(max_bytes=1024)
+    cache.put("a", {"n": 1}, "person/a.json", "1", 10)
+    assert not cache.is_fresh(cache.lookup("a"))
+
+def test_invalidate_releases_bytes():
+    cache = EntityCache(max_bytes=1024)
+    cache.put("a", {"n": 1}, "person/a.json", "1", 10)
+    cache.invalidate("a")
+    assert cache.lookup("a") is None
+    assert cache.size_bytes == 0
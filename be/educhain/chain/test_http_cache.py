@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+from http_cache import (
+    CachedResponse, ChainHead, ResponseCache, content_etag, etag_matches, height_etag, http_date
+)
+
+
+def test_etag_matching():
+    etag = height_etag(42)
+    assert etag == 'W/"h42"'
+    assert etag_matches('W/"h42"', etag)
+    assert etag_matches('"h41", "h42"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"h41"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_content_etag_depends_on_body():
+    assert content_etag(b"a") == content_etag(b"a")
+    assert content_etag(b"a") != content_etag(b"b")
+
+
+def test_http_date_from_block_time():
+    assert http_date("2024-05-01T10:00:00.123456789Z") == "Wed, 01 May 2024 10:00:00 GMT"
+    assert http_date("not a time") is None
+    assert http_date(None) is None
+
+
+def test_chain_head_shares_lookups():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 7, "2024-05-01T10:00:00Z"
+
+    async def scenario():
+        head = ChainHead(fetch, ttl_seconds=60)
+        results = await asyncio.gather(*(head.current() for _ in range(5)))
+        results.append(await head.current())
+        return results
+
+    results = asyncio.run(scenario())
+    assert all(result == (7, "2024-05-01T10:00:00Z") for result in results)
+    assert len(calls) == 1
+
+
+def test_lookup_by_height():
+    cache = ResponseCache(max_entries=10)
+    cache.put("/v", CachedResponse(b"x", {}, height=5))
+    assert cache.lookup("/v", 5)[0] is not None
+    assert cache.lookup("/v", 6) == (None, False)
+
+
+def test_stale_while_revalidate_window():
+    cache = ResponseCache(max_entries=10, stale_while_revalidate=30)
+    cache.put("/v", CachedResponse(b"x", {}, height=5))
+    entry, stale = cache.lookup("/v", 6)
+    assert entry.body == b"x" and stale
+
+    entry.stored_at = time.monotonic() - 31
+    assert cache.lookup("/v", 6) == (None, False)
+
+
+def test_put_keeps_newer_height_and_evicts_lru():
+    cache = ResponseCache(max_entries=2)
+    cache.put("/a", CachedResponse(b"new", {}, height=9))
+    cache.put("/a", CachedResponse(b"old", {}, height=8))
+    assert cache.lookup("/a", 9)[0].body == b"new"
+
+    cache.put("/b", CachedResponse(b"b", {}, height=9))
+    cache.put("/c", CachedResponse(b"c", {}, height=9))
+    assert len(cache) == 2
+    assert cache.lookup("/a", 9) == (None, False)
+
+
+def test_refresh_runs_once_per_key():
+    runs = []
+
+    async def load():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+
+    async def scenario():
+        cache = ResponseCache()
+        cache.refresh("/v", load)
+        cache.refresh("/v", load)
+        await asyncio.sleep(0.05)
+        cache.refresh("/v", load)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert len(runs) == 2
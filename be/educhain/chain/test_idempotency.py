@@ -0,0 +1,132 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from idempotency import IdempotencyKeyReused, IdempotencyStore, SharedIdempotencyStore, StoredResponse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def test_concurrent_duplicates_share_one_execution():
+    store = IdempotencyStore()
+    executions = []
+
+    async def run():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return StoredResponse("fp", 200, {}, b'{"did": "did:eduid:x"}')
+
+    async def main():
+        return await asyncio.gather(*[store.execute("POST /dids k1", "fp", run) for _ in range(5)])
+
+    results = asyncio.run(main())
+    assert len(executions) == 1
+    assert [replayed for _, replayed in results].count(False) == 1
+    assert all(response.body == b'{"did": "did:eduid:x"}' for response, _ in results)
+
+def test_replay_and_fingerprint_mismatch():
+    store = IdempotencyStore()
+
+    async def run():
+        return StoredResponse("fp", 201, {}, b"created")
+
+    async def main():
+        first = await store.execute("k", "fp", run)
+        second = await store.execute("k", "fp", run)
+        with pytest.raises(IdempotencyKeyReused):
+            await store.execute("k", "other", run)
+        return first, second
+
+    (_, first_replayed), (response, second_replayed) = asyncio.run(main())
+    assert not first_replayed
+    assert second_replayed
+    assert response.status_code == 201
+
+def test_server_errors_are_not_remembered():
+    store = IdempotencyStore()
+    calls = []
+
+    async def run():
+        calls.append(1)
+        return StoredResponse("fp", 503, {}, b"")
+
+    async def main():
+        await store.execute("k", "fp", run)
+        await store.execute("k", "fp", run)
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+def test_store_is_bounded_and_expires():
+    store = IdempotencyStore(max_entries=2, ttl_seconds=0.01)
+    for key in ("a", "b", "c"):
+        store.put(key, StoredResponse("fp", 200, {}, b""))
+    assert len(store) == 2
+    assert store.get("a") is None
+    assert store.get("c") is not None
+
+    time.sleep(0.02)
+    assert store.get("c") is None
+
+def test_shared_store_replays_across_instances(tmp_path):
+    path = str(tmp_path / "idempotency.db")
+    first, second = SharedIdempotencyStore(path), SharedIdempotencyStore(path)
+    calls = []
+
+    async def run():
+        calls.append(1)
+        return StoredResponse("fp", 201, {"x-did": "did:eduid:x"}, b"created")
+
+    async def main():
+        await first.execute("k", "fp", run)
+        response, replayed = await second.execute("k", "fp", run)
+        with pytest.raises(IdempotencyKeyReused):
+            await second.execute("k", "other", run)
+        return response, replayed
+
+    response, replayed = asyncio.run(main())
+    assert replayed and len(calls) == 1
+    assert (response.status_code, response.headers, response.body) == (201, {"x-did": "did:eduid:x"}, b"created")
+    assert len(second) == 1
+
+def test_shared_store_waits_for_another_process(tmp_path):
+    path = str(tmp_path / "idempotency.db")
+    # Another worker claims the key and stores its response a little later
+    worker = subprocess.Popen([sys.executable, "-c", (
+        "import sys, time\n"
+        "from idempotency import SharedIdempotencyStore, StoredResponse\n"
+        f"store = SharedIdempotencyStore({path!r})\n"
+        "assert store._claim('k', 'fp') is True\n"
+        "print('claimed', flush=True)\n"
+        "time.sleep(0.3)\n"
+        "store.put('k', StoredResponse('fp', 200, {}, b'from worker'))\n"
+    )], cwd=HERE, stdout=subprocess.PIPE, text=True)
+    assert worker.stdout.readline().strip() == "claimed"
+    store = SharedIdempotencyStore(path, poll_interval=0.01)
+
+    async def run():
+        raise AssertionError("the request ran twice")
+
+    response, replayed = asyncio.run(store.execute("k", "fp", run))
+    assert worker.wait() == 0
+    assert replayed and response.body == b"from worker"
+
+def test_shared_store_takes_over_claims_of_dead_processes(tmp_path):
+    path = str(tmp_path / "idempotency.db")
+    worker = subprocess.run([sys.executable, "-c", (
+        "from idempotency import SharedIdempotencyStore\n"
+        f"assert SharedIdempotencyStore({path!r})._claim('k', 'fp') is True\n"
+    )], cwd=HERE)
+    assert worker.returncode == 0
+    store = SharedIdempotencyStore(path)
+
+    async def run():
+        return StoredResponse("fp", 503, {}, b"")
+
+    response, replayed = asyncio.run(store.execute("k", "fp", run))
+    assert not replayed and response.status_code == 503
+    # Uncacheable responses release the claim
+    assert store._claim("k", "fp") is True
@@ -0,0 +1,67 @@
+import asyncio
+
+from job_queue import FAILED, PENDING, SUCCEEDED, JobQueue, JobWorkerPool
+
+def test_claim_checkpoint_and_complete(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    job_id = queue.enqueue("did.create", {"request": {"controller": "wasm1abc"}})
+
+    job = queue.claim("worker-1")
+    assert job.id == job_id
+    assert job.attempts == 1
+    assert queue.claim("worker-2") is None
+
+    queue.save_checkpoint(job_id, {"register": {"txhash": "ABC"}})
+    queue.complete(job_id, {"did": "did:eduid:x"})
+
+    status = queue.get(job_id)
+    assert status["status"] == SUCCEEDED
+    assert status["completed_steps"] == ["register"]
+    assert status["result"] == {"did": "did:eduid:x"}
+
+def test_failed_attempt_is_retried_later(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    job_id = queue.enqueue("did.create", {}, max_attempts=2)
+
+    queue.fail(queue.claim("w").id, "node timeout", retry_in=60)
+    assert queue.get(job_id)["status"] == PENDING
+    assert queue.claim("w") is None
+
+    queue.fail(job_id, "node timeout", retry_in=None)
+    assert queue.get(job_id)["status"] == FAILED
+
+def test_recover_requeues_jobs_of_dead_workers(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    job_id = queue.enqueue("did.create", {})
+    queue.claim("999999999-0")
+
+    assert queue.recover() == 1
+    assert queue.get(job_id)["status"] == PENDING
+
+def test_worker_pool_resumes_after_completed_steps(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    executed = []
+
+    async def handler(job):
+        await job.step("register", lambda: executed.append("register") or "tx-1")
+        if job.attempts == 1:
+            raise RuntimeError("hash update failed")
+        await job.step("update_hash", lambda: executed.append("update_hash") or "hash")
+        return {"attempts": job.attempts}
+
+    async def run():
+        pool = JobWorkerPool(queue, {"did.create": handler}, workers=2, poll_interval=0.01, backoff_base=0.01)
+        await pool.start()
+        job_id = queue.enqueue("did.create", {})
+        pool.notify()
+        for _ in range(200):
+            if queue.get(job_id)["status"] == SUCCEEDED:
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop()
+        return queue.get(job_id)
+
+    status = asyncio.run(run())
+    assert status["status"] == SUCCEEDED
+    assert status["result"] == {"attempts": 2}
+    assert executed == ["register", "update_hash"]
@@ -0,0 +1,105 @@
+import json
+import logging
+import os
+import queue
+
+import pytest
+
+from log_pipeline import JsonFormatter, LogPipeline, NonBlockingQueueHandler, SamplingFilter, parse_sample_rates
+
+
+def record(name="educhain-api", level=logging.INFO, msg="Entity data for %s retrieved", args=("did:1",), **extra):
+    entry = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    entry.__dict__.update(extra)
+    return entry
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates("httpx=0.1, educhain-api.entities=0.5,,") == {
+        "httpx": 0.1, "educhain-api.entities": 0.5
+    }
+    assert parse_sample_rates(None) == {}
+
+
+def test_json_formatter_includes_extra_fields():
+    entry = json.loads(JsonFormatter().format(record(did="did:1", duration_ms=3)))
+    assert entry["message"] == "Entity data for did:1 retrieved"
+    assert entry["logger"] == "educhain-api"
+    assert entry["level"] == "INFO"
+    assert entry["did"] == "did:1"
+    assert entry["duration_ms"] == 3
+
+
+def test_json_formatter_includes_exception():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        entry = logging.LogRecord("x", logging.ERROR, __file__, 1, "failed", (), __import__("sys").exc_info())
+    assert "ValueError: boom" in json.loads(JsonFormatter().format(entry))["exception"]
+
+
+def test_sampling_keeps_every_nth_info_record():
+    sampler = SamplingFilter({"educhain-api.entities": 0.25})
+    kept = [sampler.filter(record(name="educhain-api.entities.read")) for _ in range(8)]
+    assert kept.count(True) == 2
+
+
+def test_sampling_never_drops_warnings_or_other_loggers():
+    sampler = SamplingFilter({"educhain-api": 0.0})
+    assert not sampler.filter(record())
+    assert sampler.filter(record(level=logging.WARNING))
+    assert sampler.filter(record(name="httpx"))
+
+
+def test_queue_handler_defers_formatting_and_drops_when_full():
+    log_queue = queue.Queue(maxsize=1)
+    handler = NonBlockingQueueHandler(log_queue)
+    first = record()
+    handler.emit(first)
+    handler.emit(record())
+
+    queued = log_queue.get_nowait()
+    assert queued is first
+    assert queued.args == ("did:1",)
+    assert handler.dropped == 1
+
+
+def file_pipeline(path, fmt="%(message)s"):
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter(fmt))
+    return LogPipeline([handler], {}, 100)
+
+
+def test_pipeline_writes_only_once_started(tmp_path):
+    path = tmp_path / "gateway.log"
+    pipeline = file_pipeline(path)
+    pipeline.handler.handle(record(msg="before start", args=()))
+    pipeline.stop()
+    assert path.read_text() == ""
+
+    pipeline.start()
+    pipeline.start()
+    pipeline.handler.handle(record(msg="after start", args=()))
+    pipeline.stop()
+    assert path.read_text().splitlines() == ["before start", "after start"]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_forked_child_starts_its_own_writer(tmp_path):
+    path = tmp_path / "gateway.log"
+    pipeline = file_pipeline(path, "%(process)d %(message)s")
+    pipeline.start()
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            pipeline.start()
+            pipeline.handler.handle(record(msg="from child", args=()))
+            pipeline.stop()
+            code = 0
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    pipeline.stop()
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert path.read_text() == f"{pid} from child\n"
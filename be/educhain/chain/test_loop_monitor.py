@@ -0,0 +1,44 @@
+import asyncio
+import logging
+import time
+
+from prometheus_client import REGISTRY
+
+from loop_monitor import LoopMonitor
+
+
+def blocking_handler():
+    time.sleep(0.3)
+
+
+def test_logs_stack_of_blocking_callback(caplog):
+    async def scenario():
+        monitor = LoopMonitor(interval=0.02, block_threshold=0.1)
+        await monitor.start()
+        await asyncio.sleep(0.05)
+        blocking_handler()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    blocks_before = REGISTRY.get_sample_value("event_loop_blocks_total") or 0
+    lag_before = REGISTRY.get_sample_value("event_loop_lag_seconds_count") or 0
+    with caplog.at_level(logging.WARNING, logger="educhain-api.loop"):
+        asyncio.run(scenario())
+
+    warnings = [record.getMessage() for record in caplog.records if record.name == "educhain-api.loop"]
+    assert len(warnings) == 1
+    assert "in blocking_handler" in warnings[0]
+    assert REGISTRY.get_sample_value("event_loop_blocks_total") - blocks_before == 1
+    assert REGISTRY.get_sample_value("event_loop_lag_seconds_count") > lag_before
+
+
+def test_quiet_loop_is_not_reported(caplog):
+    async def scenario():
+        monitor = LoopMonitor(interval=0.01, block_threshold=0.1)
+        await monitor.start()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+    with caplog.at_level(logging.WARNING, logger="educhain-api.loop"):
+        asyncio.run(scenario())
+    assert not [record for record in caplog.records if record.name == "educhain-api.loop"]
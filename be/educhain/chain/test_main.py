@@ -0,0 +1,192 @@
+import asyncio
+import json
+
+import pytest
+
+from bench_fakes import FakeNode, InMemoryObjectStore, Latency
+from bench_gateway import CERT_CONTRACT_ADDRESS, import_gateway, seed, start_gateway
+from contract_simulator import ChainClock, CredentialRegistry, DIDRegistry
+from job_queue import JobQueue, JobWorkerPool
+
+
+@pytest.fixture(scope="module")
+def main(tmp_path_factory):
+    # Imported once per test run, with the fakes in place of the node and MinIO
+    return import_gateway(str(tmp_path_factory.mktemp("gateway")), admission=False)
+
+
+@pytest.fixture
+def chain(main):
+    clock = ChainClock(60.0)
+    node = FakeNode(contract=DIDRegistry(clock), contracts={CERT_CONTRACT_ADDRESS: CredentialRegistry(clock)}, clock=clock)
+    store = InMemoryObjectStore()
+    main.entity_cache.clear()
+    return node, store, seed(main, node, store, 3)
+
+
+def call(main, chain, scenario):
+    """Run scenario(client) against the gateway wired to the fake node and store"""
+    node, store, _ = chain
+
+    async def run():
+        client = await start_gateway(main, node, store)
+        try:
+            return await scenario(client)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def test_resolve_entity_and_list_apply_field_selection(main, chain):
+    person = chain[2]["people"][0]
+
+    async def scenario(client):
+        return (
+            await client.get(f"/api/v1/dids/{person}/resolve", params={"fields": "did_document.metadata.status"}),
+            await client.get(f"/api/v1/dids/{person}/resolve", params={"include": "integrity_verified,entity_data.name"}),
+            await client.get(f"/api/v1/dids/{person}/entity", params={"fields": "name"}),
+            await client.get("/api/v1/dids/list", params={"limit": 2, "fields": "id"}),
+            await client.get(f"/api/v1/dids/{person}/entity")
+        )
+
+    status, integrity, entity, listed, full = call(main, chain, scenario)
+    assert status.json() == {"did_document": {"metadata": {"status": "active"}}}
+    assert integrity.json() == {"entity_data": {"name": "Person 0"}, "integrity_verified": True}
+    assert entity.json() == {"name": "Person 0"}
+    assert listed.json()["dids"] == [{"id": chain[2]["credentials"][0]}, {"id": chain[2]["credentials"][1]}]
+    assert listed.json()["next_cursor"] == chain[2]["credentials"][1]
+    assert set(full.json()) == {"did", "type", "name", "metadata"}
+
+
+def test_idempotency_keys_are_scoped_per_caller(main, chain, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "job_queue", JobQueue(str(tmp_path / "jobs.db")))
+    monkeypatch.setattr(main, "job_pool", JobWorkerPool(main.job_queue, {}))
+    body = {"sender_address": "edu1sender", "request": {"did": "did:eduid:person-00000000"}}
+
+    async def scenario(client):
+        async def revoke(api_key):
+            return await client.post("/api/v1/jobs/dids/revoke", json=body,
+                                     headers={"Idempotency-Key": "1", "X-API-Key": api_key})
+        return await revoke("alice"), await revoke("bob"), await revoke("alice")
+
+    alice, bob, alice_retry = call(main, chain, scenario)
+    assert alice.status_code == bob.status_code == 202
+    assert "Idempotent-Replayed" not in bob.headers
+    assert bob.json()["job_id"] != alice.json()["job_id"]
+    assert alice_retry.headers["Idempotent-Replayed"] == "true"
+    assert alice_retry.json() == alice.json()
+    main.job_queue.close()
+
+
+def test_admission_slots_are_released_when_the_client_disconnects(main, chain, monkeypatch):
+    monkeypatch.setattr(main, "ADMISSION_ENABLED", True)
+    bulk = main.admission_controller.lanes["bulk"]
+    statuses = []
+
+    async def disconnected():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    async def scenario(client):
+        # More exports than the lane has slots, each from its own address to stay under the rate limit
+        for n in range(bulk.config.concurrency + 2):
+            await main.app({
+                "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+                "path": "/api/v1/dids/export", "raw_path": b"/api/v1/dids/export", "query_string": b"",
+                "root_path": "", "headers": [(b"host", b"gateway")], "client": (f"10.0.0.{n}", 1234),
+                "server": ("gateway", 80)
+            }, disconnected, send)
+        # One client past its burst is still turned away
+        shed = [(await client.get("/api/v1/dids/export")).status_code for _ in range(3)]
+        return bulk.in_flight, shed
+
+    assert call(main, chain, scenario) == (0, [200, 200, 429])
+    assert statuses == [200] * (bulk.config.concurrency + 2)
+
+
+def ticks_while(operation):
+    """Run operation and count how often a 5ms ticker got to run on the loop meanwhile"""
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        try:
+            return await operation(), ticks
+        finally:
+            task.cancel()
+
+    return run()
+
+
+def test_entity_reads_and_revalidation_leave_the_loop_free(main, chain):
+    person = chain[2]["people"][0]
+    chain[1].latency = Latency(100)
+
+    async def scenario(client):
+        # The first read downloads the object, the second only revalidates its ETag
+        return [await ticks_while(lambda: main.retrieve_entity_data(person)) for _ in range(2)]
+
+    (first, first_ticks), (second, second_ticks) = call(main, chain, scenario)
+    assert first == second and first["name"] == "Person 0"
+    assert first_ticks >= 5 and second_ticks >= 5
+
+
+def test_entity_store_leaves_the_loop_free(main, chain):
+    chain[1].latency = Latency(100)
+
+    async def scenario(client):
+        return await ticks_while(lambda: main.store_entity_data("did:eduid:new", {"type": "Person", "name": "New"}))
+
+    data_hash, ticks = call(main, chain, scenario)
+    assert ticks >= 5
+    assert chain[1].get_object("bucket", "person/did:eduid:new.json").read().decode().count(data_hash) == 1
+
+
+def test_links_kept_in_entity_documents_survive_the_move_to_the_store(main, chain):
+    node, store, seeded = chain
+    student, school = seeded["people"][:2]
+    for did, entry in ((student, {"did": school, "relationship": "enrolled_at"}),
+                       (school, {"did": student, "relationship": "has_student"})):
+        document = dict(json.loads(store.objects[f"person/{did}.json"][0]), linked_dids=[entry])
+        store.put_json(f"person/{did}.json", document)
+
+    async def scenario(client):
+        await main.load_relationship_graph()
+        return (
+            await client.get(f"/api/v1/dids/{school}/links"),
+            await client.get(f"/api/v1/dids/{student}/graph", params={"depth": 1})
+        )
+
+    links, graph = call(main, chain, scenario)
+    assert links.json()["items"] == [{"did": student, "relationship": "has_student"}]
+    assert [(item["did"], item["relationship"]) for item in graph.json()["items"]] == [(school, "enrolled_at")]
+    assert main.relationship_store.is_backfilled()
+
+
+def test_export_pages_through_a_contract_answering_with_bare_lists(main, chain, monkeypatch):
+    node, _, seeded = chain
+    contract = node.contract
+    paged = contract._list
+    monkeypatch.setattr(contract, "_list", lambda args: paged(args)["dids"])
+
+    async def scenario(client):
+        return (
+            await client.get("/api/v1/dids/list", params={"limit": 2, "fields": "id"}),
+            await client.get("/api/v1/dids/export", params={"page_size": 2, "fields": "id"})
+        )
+
+    listed, exported = call(main, chain, scenario)
+    assert listed.json() == {"dids": [{"id": did} for did in contract._order[:2]], "next_cursor": contract._order[1]}
+    assert [json.loads(line)["id"] for line in exported.text.splitlines()] == contract._order
+    assert len(contract._order) > 2
@@ -0,0 +1,60 @@
+import gc
+
+import pytest
+from prometheus_client import REGISTRY
+
+from memory_stats import GCMonitor, TracemallocSession, record_container_sizes
+
+
+def test_gc_monitor_times_collections():
+    before = REGISTRY.get_sample_value("python_gc_runs_total", {"generation": "2"}) or 0
+    monitor = GCMonitor()
+    monitor.install()
+    try:
+        gc.collect()
+    finally:
+        monitor.uninstall()
+    gc.collect()
+
+    # Nothing reaches the metrics from inside a collection
+    assert (REGISTRY.get_sample_value("python_gc_runs_total", {"generation": "2"}) or 0) == before
+    monitor.publish()
+    monitor.publish()
+    assert REGISTRY.get_sample_value("python_gc_runs_total", {"generation": "2"}) - before == 1
+    assert REGISTRY.get_sample_value("python_gc_pause_seconds_count", {"generation": "2"}) >= 1
+    assert monitor._callback not in gc.callbacks
+
+
+def test_record_container_sizes():
+    record_container_sizes({"test_queue": 7})
+    assert REGISTRY.get_sample_value("internal_container_size", {"container": "test_queue"}) == 7
+
+
+def allocate():
+    return [bytearray(1024) for _ in range(200)]
+
+
+def test_tracemalloc_diff_reports_growth_by_site():
+    session = TracemallocSession()
+    with pytest.raises(RuntimeError):
+        session.diff()
+
+    session.start()
+    try:
+        kept = allocate()
+        result = session.diff(limit=5)
+        top = result["sites"][0]
+        assert top["site"].endswith(f"test_memory_stats.py:{allocate.__code__.co_firstlineno + 1}")
+        assert top["size_diff_bytes"] >= 200 * 1024
+        assert top["count_diff"] >= 200
+
+        reset = session.diff(reset=True)
+        assert reset["growth_bytes"] >= 200 * 1024
+        assert all(site["size_diff_bytes"] < 200 * 1024 for site in session.diff()["sites"])
+        del kept
+    finally:
+        session.stop()
+    assert not session.active
+
+    with pytest.raises(ValueError):
+        session.diff(group_by="module")
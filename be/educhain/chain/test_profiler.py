@@ -0,0 +1,59 @@
+import asyncio
+import threading
+
+from profiler import dump_tasks, format_collapsed, sample_stacks
+
+
+def busy_worker(stop):
+    while not stop.is_set():
+        stop.wait(0.001)
+
+
+def test_sample_stacks_sees_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_worker, args=(stop,), name="busy")
+    worker.start()
+    try:
+        result = sample_stacks(0.05, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert result["samples"] > 0
+    busy = [stack for stack in result["stacks"] if stack.startswith("busy;")]
+    assert busy and all("test_profiler:busy_worker" in stack for stack in busy)
+    assert not any("profiler:sample_stacks" in stack for stack in result["stacks"])
+
+    line = format_collapsed(result["stacks"]).splitlines()[0]
+    stack, count = line.rsplit(" ", 1)
+    assert int(count) == result["stacks"][stack]
+
+
+async def fetch(url):
+    await asyncio.sleep(10)
+
+
+async def handler():
+    await fetch("http://node/status")
+
+
+def test_dump_tasks_names_what_tasks_wait_on():
+    def describe(frame):
+        if frame.f_code is fetch.__code__:
+            return f"GET {frame.f_locals['url']}"
+        return None
+
+    async def scenario():
+        task = asyncio.create_task(handler(), name="request-1")
+        await asyncio.sleep(0)
+        tasks = dump_tasks(describe)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return tasks
+
+    tasks = asyncio.run(scenario())
+    assert len(tasks) == 1
+    assert tasks[0]["name"] == "request-1"
+    assert tasks[0]["waiting_on"] == "GET http://node/status"
+    assert tasks[0]["stack"][0].startswith("test_profiler:handler:")
+    assert tasks[0]["stack"][1].startswith("test_profiler:fetch:")
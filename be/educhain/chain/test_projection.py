@@ -0,0 +1,43 @@
+from projection import FieldSelection
+
+DOCUMENT = {
+    "did_document": {"id": "did:eduid:1", "metadata": {"status": "active", "hash": "abc"}},
+    "entity_data": {"name": "Alice", "linked_dids": ["did:eduid:2"], "transfer_history": []},
+    "integrity_verified": True
+}
+
+
+def test_parse_returns_none_without_fields():
+    assert FieldSelection.parse(None) is None
+    assert FieldSelection.parse("", " , ") is None
+
+
+def test_parse_merges_fields_and_include():
+    selection = FieldSelection.parse("integrity_verified", "did_document.metadata.status")
+    assert selection.includes("integrity_verified")
+    assert selection.includes("did_document")
+    assert not selection.includes("entity_data")
+
+
+def test_apply_nested_paths():
+    selection = FieldSelection.parse("did_document.metadata.status,integrity_verified")
+    assert selection.apply(DOCUMENT) == {
+        "did_document": {"metadata": {"status": "active"}},
+        "integrity_verified": True
+    }
+
+
+def test_whole_field_wins_over_nested_path():
+    for value in ("entity_data.name,entity_data", "entity_data,entity_data.name"):
+        assert FieldSelection.parse(value).apply(DOCUMENT) == {"entity_data": DOCUMENT["entity_data"]}
+        assert FieldSelection.parse(value).child("entity_data") is None
+
+
+def test_apply_to_lists_and_missing_fields():
+    items = [{"did": "a", "status": "active"}, {"did": "b"}, "c"]
+    assert FieldSelection.parse("status,missing").apply(items) == [{"status": "active"}, {}, "c"]
+
+
+def test_child_selection():
+    selection = FieldSelection.parse("did_document.metadata.status")
+    assert selection.child("did_document").apply(DOCUMENT["did_document"]) == {"metadata": {"status": "active"}}
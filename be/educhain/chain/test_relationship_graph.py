@@ -0,0 +1,59 @@
+import time
+
+from relationship_graph import RelationshipGraph
+
+def build_campus():
+    graph = RelationshipGraph()
+    graph.load([])
+    graph.add_link("did:eduid:dept-y", "belongs_to", "did:eduid:uni-x")
+    for i in range(4):
+        graph.add_link(f"did:eduid:student-{i}", "enrolled_at", "did:eduid:uni-x")
+    # Credentials issued by department Y to students 1 and 3, and one to an outsider
+    for holder in ("did:eduid:student-1", "did:eduid:student-3", "did:eduid:outsider"):
+        credential = f"did:eduid:cred-{holder[-1]}"
+        graph.add_link(credential, "issued_by", "did:eduid:dept-y")
+        graph.add_link(credential, "issued_to", holder)
+    return graph
+
+def test_traverse_respects_filters_and_depth():
+    graph = build_campus()
+
+    result = graph.traverse("did:eduid:uni-x", {"has_student"}, max_depth=3)
+    assert sorted(item["did"] for item in result["items"]) == [f"did:eduid:student-{i}" for i in range(4)]
+    assert all(item["depth"] == 1 for item in result["items"])
+
+    result = graph.traverse("did:eduid:uni-x", max_depth=1)
+    assert "did:eduid:cred-1" not in {item["did"] for item in result["items"]}
+
+def test_traverse_limit_truncates():
+    graph = build_campus()
+    result = graph.traverse("did:eduid:uni-x", {"has_student"}, limit=2)
+    assert len(result["items"]) == 2
+    assert result["truncated"] is True
+
+def test_match_path_intersection_answers_enrolment_query():
+    graph = build_campus()
+    students = graph.match_path("did:eduid:uni-x", [{"has_student"}])
+    holders = graph.match_path("did:eduid:dept-y", [{"issued_to"}, {"issued_to"}])
+    assert students & holders == {"did:eduid:student-1", "did:eduid:student-3"}
+
+def test_shortest_path():
+    graph = build_campus()
+    hops = graph.shortest_path("did:eduid:cred-1", "did:eduid:uni-x")
+    assert [hop["relationship"] for hop in hops] == ["issued_by", "belongs_to"]
+    assert graph.shortest_path("did:eduid:cred-1", "did:eduid:unknown") is None
+
+def test_multi_hop_query_over_large_graph_is_fast():
+    graph = RelationshipGraph()
+    edges = []
+    for i in range(100000):
+        edges.append((f"did:eduid:student-{i}", "enrolled_at", f"did:eduid:uni-{i % 50}"))
+        edges.append((f"did:eduid:uni-{i % 50}", "has_student", f"did:eduid:student-{i}"))
+    graph.load(edges)
+
+    start = time.perf_counter()
+    result = graph.traverse("did:eduid:student-0", {"enrolled_at", "has_student"}, max_depth=2, limit=500)
+    elapsed = time.perf_counter() - start
+
+    assert len(result["items"]) == 500
+    assert elapsed < 0.5
@@ -0,0 +1,105 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from relationship_store import RelationshipStore, inverse_relationship
+
+class InMemoryObjectClient:
+    """Just enough of the MinIO client API for the relationship store"""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, bucket_name, object_name, data, length, content_type=None):
+        self.objects[object_name] = data.read()
+
+    def list_objects(self, bucket_name, prefix="", recursive=False, start_after=None):
+        for name in sorted(self.objects):
+            if name.startswith(prefix) and (start_after is None or name > start_after):
+                yield SimpleNamespace(object_name=name)
+
+def test_add_link_writes_both_directions():
+    client = InMemoryObjectClient()
+    store = RelationshipStore(client, "bucket")
+
+    inverse = store.add_link("did:eduid:student-1", "enrolled_at", "did:eduid:uni-1")
+
+    assert inverse == "has_student"
+    assert store.list_neighbours("did:eduid:student-1")["items"] == [
+        {"did": "did:eduid:uni-1", "relationship": "enrolled_at"}
+    ]
+    assert store.list_neighbours("did:eduid:uni-1", relationship="has_student")["items"] == [
+        {"did": "did:eduid:student-1", "relationship": "has_student"}
+    ]
+
+def test_list_neighbours_pages_with_cursor():
+    client = InMemoryObjectClient()
+    store = RelationshipStore(client, "bucket")
+    for i in range(5):
+        store.add_link(f"did:eduid:student-{i}", "enrolled_at", "did:eduid:uni-1")
+
+    seen = []
+    cursor = None
+    while True:
+        page = store.list_neighbours("did:eduid:uni-1", limit=2, cursor=cursor)
+        seen.extend(item["did"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [f"did:eduid:student-{i}" for i in range(5)]
+
+def test_relationship_without_inverse():
+    client = InMemoryObjectClient()
+    store = RelationshipStore(client, "bucket")
+
+    assert inverse_relationship("mentors") is None
+    store.add_link("did:eduid:a", "mentors", "did:eduid:b")
+    assert store.list_neighbours("did:eduid:b")["items"] == []
+    assert list(store.iter_edges()) == [("did:eduid:a", "mentors", "did:eduid:b")]
+
+def test_rejects_cursor_outside_the_listing():
+    store = RelationshipStore(InMemoryObjectClient(), "bucket")
+    store.add_link("did:eduid:a", "owns", "did:eduid:b")
+    store.add_link("did:eduid:c", "owns", "did:eduid:d")
+
+    cursor = "relationships/did:eduid:a/owns/did:eduid:b.json"
+    assert store.list_neighbours("did:eduid:a", cursor=cursor)["items"] == []
+    for did, relationship in (("did:eduid:c", None), ("did:eduid:a", "mentors")):
+        with pytest.raises(ValueError):
+            store.list_neighbours(did, relationship=relationship, cursor=cursor)
+
+def test_instrument_sees_each_s3_operation():
+    calls = []
+
+    @contextmanager
+    def instrument(operation, **attributes):
+        calls.append((operation, attributes.get("object") or attributes.get("prefix")))
+        yield
+
+    store = RelationshipStore(InMemoryObjectClient(), "bucket", instrument=instrument)
+    store.add_link("did:eduid:a", "owns", "did:eduid:b")
+    store.list_neighbours("did:eduid:a")
+    assert calls == [
+        ("put_object", "relationships/did:eduid:a/owns/did:eduid:b.json"),
+        ("put_object", "relationships/did:eduid:b/owned_by/did:eduid:a.json"),
+        ("list_objects", "relationships/did:eduid:a/")
+    ]
+
+def test_backfill_copies_linked_dids_once():
+    client = InMemoryObjectClient()
+    store = RelationshipStore(client, "bucket")
+    assert not store.is_backfilled()
+
+    documents = [
+        ("did:eduid:student", {"linked_dids": [{"did": "did:eduid:uni", "relationship": "enrolled_at"}]}),
+        ("did:eduid:uni", {"linked_dids": [{"did": "did:eduid:student", "relationship": "has_student"}]}),
+        ("did:eduid:other", {"name": "no links"})
+    ]
+    assert store.backfill(documents) == 2
+    assert store.is_backfilled()
+    assert sorted(store.iter_edges()) == [
+        ("did:eduid:student", "enrolled_at", "did:eduid:uni"),
+        ("did:eduid:uni", "has_student", "did:eduid:student")
+    ]
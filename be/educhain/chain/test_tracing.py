@@ -0,0 +1,110 @@
+import asyncio
+import json
+import logging
+
+from tracing import FileExporter, InMemoryExporter, Tracer, current_span, current_traceparent, parse_traceparent
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+def test_parse_traceparent():
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (TRACE_ID, PARENT_ID, True)
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00") == (TRACE_ID, PARENT_ID, False)
+    assert parse_traceparent(None) is None
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+    assert parse_traceparent(f"00-{'x' * 32}-{PARENT_ID}-01") is None
+
+
+def test_spans_nest_under_the_incoming_trace():
+    exporter = InMemoryExporter()
+    tracer = Tracer(exporter)
+    with tracer.start_trace("GET /did", f"00-{TRACE_ID}-{PARENT_ID}-01") as root:
+        with tracer.span("query", did="did:1") as child:
+            assert current_traceparent() == f"00-{TRACE_ID}-{child.span_id}-01"
+    assert current_span() is None
+
+    spans = {span["name"]: span for span in exporter.find(TRACE_ID)["spans"]}
+    assert spans["GET /did"]["parent_id"] == PARENT_ID
+    assert spans["query"]["parent_id"] == root.span_id
+    assert spans["query"]["attributes"] == {"did": "did:1"}
+
+
+def test_context_follows_tasks_and_threads():
+    exporter = InMemoryExporter()
+    tracer = Tracer(exporter)
+
+    @tracer.traced("lookup")
+    async def lookup():
+        await asyncio.sleep(0)
+
+    def blocking():
+        with tracer.span("minio.get_object"):
+            pass
+
+    async def run():
+        with tracer.start_trace("verify") as root:
+            await asyncio.gather(lookup(), lookup(), asyncio.to_thread(blocking))
+        return root
+
+    root = asyncio.run(run())
+    spans = exporter.find(root.trace.trace_id)["spans"]
+    assert sorted(span["name"] for span in spans) == ["lookup", "lookup", "minio.get_object", "verify"]
+    assert all(span["parent_id"] == root.span_id for span in spans if span["name"] != "verify")
+
+
+def test_errors_are_recorded_and_unsampled_traces_not_exported():
+    exporter = InMemoryExporter()
+    tracer = Tracer(exporter, sample_rate=0.0)
+    try:
+        with tracer.start_trace("write"):
+            with tracer.span("put"):
+                raise ValueError("boom")
+    except ValueError:
+        pass
+    assert not exporter.traces
+
+    tracer.sample_rate = 1.0
+    try:
+        with tracer.start_trace("write"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert exporter.traces[0]["spans"][0]["error"] == "ValueError"
+
+
+def test_span_limit_counts_dropped_spans():
+    exporter = InMemoryExporter()
+    tracer = Tracer(exporter, max_spans=3)
+    with tracer.start_trace("export"):
+        for _ in range(5):
+            with tracer.span("read"):
+                pass
+    trace = exporter.traces[0]
+    assert len(trace["spans"]) == 3
+    assert trace["dropped_spans"] == 3
+
+
+def test_slow_requests_log_their_breakdown(caplog):
+    tracer = Tracer(slow_threshold_ms=0)
+    with caplog.at_level(logging.WARNING, logger="educhain-api.tracing"):
+        with tracer.start_trace("POST /verify"):
+            with tracer.span("issuer_lookup"):
+                pass
+    message = caplog.records[0].getMessage()
+    assert message.startswith("Slow POST /verify")
+    assert "\n  issuer_lookup " in message
+
+
+def test_file_exporter_writes_json_lines(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = FileExporter(str(path))
+    tracer = Tracer(exporter)
+    for _ in range(2):
+        with tracer.start_trace("GET /health"):
+            pass
+    exporter.close()
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])["spans"][0]["name"] == "GET /health"
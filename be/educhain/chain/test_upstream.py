@@ -0,0 +1,210 @@
+import asyncio
+import base64
+import json
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from tracing import InMemoryExporter, tracer
+
+from upstream import (
+    CLOSED, OPEN, UpstreamPool, classify_request, cosmos_rest_height, parse_endpoints, tendermint_height
+)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def started(pool, handler):
+    await pool.start(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    return pool
+
+
+def test_parse_endpoints():
+    assert parse_endpoints("http://a:1/, http://b:2,,") == ["http://a:1", "http://b:2"]
+    assert parse_endpoints("http://a:1") == ["http://a:1"]
+
+
+def test_height_parsers():
+    assert tendermint_height({"result": {"sync_info": {"latest_block_height": "42"}}}) == 42
+    assert cosmos_rest_height({"block": {"header": {"height": "7"}}}) == 7
+    assert cosmos_rest_height({"sdk_block": {"header": {"height": "8"}}, "block": {}}) == 8
+
+
+def test_classify_request():
+    query = base64.b64encode(json.dumps({"get_did_document": {"did": "did:1"}}).encode()).decode()
+    assert classify_request("cosmos_api", f"/cosmwasm/wasm/v1/contract/c1/smart/{query}") == ("contract", "get_did_document")
+    assert classify_request("cosmos_api", "/cosmwasm/wasm/v1/contract/c1/smart/%%%") == ("contract", "smart_query")
+    assert classify_request(
+        "cosmos_api", "/cosmwasm/wasm/v1/contract/c1/execute", {"msg": {"register_did": {}}}
+    ) == ("contract", "register_did")
+    assert classify_request("cosmos_api", "/cosmos/tx/v1beta1/txs") == ("cosmos_api", "broadcast")
+    assert classify_request("cosmos_api", "/cosmos/auth/v1beta1/accounts/edu1xyz") == ("cosmos_api", "get_account")
+    assert classify_request("tendermint_rpc", "/block?height=5") == ("tendermint_rpc", "block")
+    assert classify_request("tendermint_rpc", "/unknown/deep/path") == ("tendermint_rpc", "other")
+
+
+def test_requires_endpoints():
+    with pytest.raises(ValueError):
+        UpstreamPool("rpc", [])
+
+
+def test_prefers_lowest_latency():
+    async def scenario():
+        pool = await started(UpstreamPool("rpc", ["http://a", "http://b"]), lambda request: httpx.Response(200))
+        pool.endpoints[0].ewma_latency = 0.5
+        pool.endpoints[1].ewma_latency = 0.01
+        response = await pool.get("/status")
+        return str(response.request.url)
+
+    assert run(scenario()) == "http://b/status"
+
+
+def test_skips_lagging_endpoints():
+    async def scenario():
+        pool = await started(UpstreamPool("rpc", ["http://a", "http://b"], max_height_lag=2),
+                             lambda request: httpx.Response(200))
+        pool.endpoints[0].ewma_latency = 0.01
+        pool.endpoints[0].height = 100
+        pool.endpoints[1].ewma_latency = 0.5
+        pool.endpoints[1].height = 110
+        return [endpoint.url for endpoint in pool.candidates()]
+
+    assert run(scenario()) == ["http://b"]
+
+
+def test_refresh_heights():
+    def handler(request):
+        height = {"a": "10", "b": "12"}[request.url.host]
+        return httpx.Response(200, json={"result": {"sync_info": {"latest_block_height": height}}})
+
+    async def scenario():
+        pool = await started(UpstreamPool("rpc", ["http://a", "http://b"], "/status", tendermint_height), handler)
+        await pool.refresh_heights()
+        return pool.best_height, [endpoint.height for endpoint in pool.endpoints]
+
+    assert run(scenario()) == (12, [10, 12])
+
+
+def test_reads_fail_over_and_open_breaker():
+    def handler(request):
+        if request.url.host == "a":
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, json={"ok": True})
+
+    async def scenario():
+        pool = await started(UpstreamPool("rpc", ["http://a", "http://b"], failure_threshold=2), handler)
+        for endpoint in pool.endpoints:
+            endpoint.ewma_latency = 0.01 if endpoint.url == "http://a" else 0.5
+        responses = [await pool.get("/status") for _ in range(3)]
+        return pool, responses
+
+    def failovers():
+        return REGISTRY.get_sample_value(
+            "dependency_retries_total", {"dependency": "rpc", "operation": "status", "reason": "failover"}
+        ) or 0
+
+    before = failovers()
+    pool, responses = run(scenario())
+    assert all(response.json() == {"ok": True} for response in responses)
+    assert failovers() - before == 2
+    assert pool.endpoints[0].state == OPEN
+    assert pool.endpoints[0].requests == 2
+    assert [endpoint.url for endpoint in pool.candidates()] == ["http://b"]
+
+
+def test_breaker_half_opens_after_reset_timeout():
+    async def scenario():
+        pool = await started(UpstreamPool("rpc", ["http://a", "http://b"], reset_timeout=0.0),
+                             lambda request: httpx.Response(200))
+        pool.endpoints[0].state = OPEN
+        pool.endpoints[0].opened_at = 0.0
+        pool.endpoints[0].ewma_latency = 0.01
+        pool.endpoints[1].ewma_latency = 0.5
+        await pool.get("/status")
+        return pool.endpoints[0]
+
+    assert run(scenario()).state == CLOSED
+
+
+def test_contract_errors_do_not_fail_over_or_open_breaker():
+    calls = []
+    query = base64.b64encode(json.dumps({"get_did_document": {"did": "did:none"}}).encode()).decode()
+
+    def handler(request):
+        calls.append(request.url.host)
+        if request.url.path == "/cosmos/error":
+            return httpx.Response(500, json={"code": 5, "message": "not found"})
+        if request.url.path == "/status":
+            return httpx.Response(500, text="panic")
+        return httpx.Response(500, json={"message": "query wasm contract failed"})
+
+    async def scenario():
+        pool = await started(UpstreamPool("rest", ["http://a", "http://b"], failure_threshold=2), handler)
+        for _ in range(3):
+            assert (await pool.get(f"/cosmwasm/wasm/v1/contract/c1/smart/{query}")).status_code == 500
+            assert (await pool.get("/cosmos/error")).status_code == 500
+        assert all(endpoint.state == CLOSED for endpoint in pool.endpoints)
+        assert len(calls) == 6
+        # A 500 without a gRPC status is the node failing
+        await pool.get("/status")
+        return pool
+
+    pool = run(scenario())
+    assert len(calls) == 8
+    assert sum(endpoint.failures for endpoint in pool.endpoints) == 2
+
+
+def test_writes_are_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.host)
+        return httpx.Response(503)
+
+    async def scenario():
+        pool = await started(UpstreamPool("rest", ["http://a", "http://b"]), handler)
+        return await pool.post("/txs", json={})
+
+    assert run(scenario()).status_code == 503
+    assert len(calls) == 1
+
+
+def test_hedges_slow_reads():
+    async def handler(request):
+        if request.url.host == "a":
+            await asyncio.sleep(1)
+        return httpx.Response(200, text=request.url.host)
+
+    async def scenario():
+        pool = UpstreamPool("rpc", ["http://a", "http://b"], hedge_after=0.05)
+        await pool.start(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        pool.endpoints[0].ewma_latency = 0.01
+        pool.endpoints[1].ewma_latency = 0.02
+        response = await pool.get("/block")
+        return response.text, pool.endpoints[0].in_flight
+
+    assert run(scenario()) == ("b", 0)
+
+
+def test_spans_are_named_by_operation():
+    query = base64.b64encode(json.dumps({"get_did_document": {"did": "did:1"}}).encode()).decode()
+    path = f"/cosmwasm/wasm/v1/contract/c1/smart/{query}"
+    exporter = InMemoryExporter()
+
+    async def scenario():
+        pool = await started(UpstreamPool("cosmos_api", ["http://a"]), lambda request: httpx.Response(200))
+        with tracer.start_trace("GET /did") as root:
+            await pool.get(path)
+        return root.trace.trace_id
+
+    tracer.configure(exporter)
+    try:
+        trace_id = run(scenario())
+    finally:
+        tracer.configure()
+    spans = {span["name"]: span for span in exporter.find(trace_id)["spans"]}
+    assert set(spans) == {"GET /did", "cosmos_api GET get_did_document"}
+    assert spans["cosmos_api GET get_did_document"]["attributes"]["path"] == path
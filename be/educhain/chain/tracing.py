@@ -0,0 +1,296 @@
+"""
+Lightweight span tracing for request workflows.
+
+A trace starts per incoming request (continuing the W3C `traceparent` header
+when the client sends one) or per background job. Stages open child spans
+with `tracer.span(...)` or the `@traced` decorator; the current span travels
+in a context variable, so it follows awaits, asyncio tasks and
+asyncio.to_thread calls. Finished traces go to an exporter (in-memory for
+tests, or newline-delimited JSON in a local file), and requests slower than
+a threshold can log their span breakdown.
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("educhain-api.tracing")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+def parse_traceparent(value: Optional[str]):
+    """Return (trace_id, parent_span_id, sampled) from a traceparent header, or None"""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    version, trace_id, parent_id, flags = parts[:4]
+    if version == "ff" or trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    try:
+        int(trace_id, 16), int(parent_id, 16)
+        sampled = bool(int(flags, 16) & 1)
+    except ValueError:
+        return None
+    return trace_id, parent_id, sampled
+
+
+class Trace:
+    """Spans recorded for one request or job"""
+
+    def __init__(self, trace_id: str, sampled: bool, max_spans: int):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.max_spans = max_spans
+        self.spans: List["Span"] = []
+        self.dropped = 0
+
+    def add(self, span: "Span") -> None:
+        if len(self.spans) < self.max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "spans": [span.to_dict() for span in self.spans],
+            "dropped_spans": self.dropped
+        }
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start", "end", "attributes", "error")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.time()) - self.start) * 1000
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace.trace_id}-{self.span_id}-{'01' if self.trace.sampled else '00'}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+class InMemoryExporter:
+    """Keeps the most recent finished traces; meant for tests and debugging"""
+
+    def __init__(self, max_traces: int = 1000):
+        self.traces: Deque[Dict[str, Any]] = deque(maxlen=max_traces)
+
+    def export(self, trace: Trace) -> None:
+        self.traces.append(trace.to_dict())
+
+    def find(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        for trace in reversed(self.traces):
+            if trace["trace_id"] == trace_id:
+                return trace
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class FileExporter:
+    """Appends finished traces as JSON lines from a background thread"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._queue: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self, trace: Trace) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            # Started lazily so a forked worker gets its own writer
+            self._thread = threading.Thread(target=self._write, name="trace-exporter", daemon=True)
+            self._thread.start()
+        self._queue.put(trace.to_dict())
+
+    def _write(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                trace = self._queue.get()
+                if trace is None:
+                    return
+                f.write(json.dumps(trace, default=str) + "\n")
+                if self._queue.empty():
+                    f.flush()
+
+    def close(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+
+def format_breakdown(trace: Trace) -> str:
+    """Indented span tree with durations, root first"""
+    children: Dict[Optional[str], List[Span]] = {}
+    span_ids = {span.span_id for span in trace.spans}
+    for span in trace.spans:
+        parent = span.parent_id if span.parent_id in span_ids else None
+        children.setdefault(parent, []).append(span)
+
+    lines = []
+
+    def walk(parent: Optional[str], depth: int) -> None:
+        for span in sorted(children.get(parent, []), key=lambda s: s.start):
+            error = f" error={span.error}" if span.error else ""
+            lines.append(f"{'  ' * depth}{span.name} {span.duration_ms:.1f}ms{error}")
+            walk(span.span_id, depth + 1)
+
+    walk(None, 0)
+    if trace.dropped:
+        lines.append(f"... {trace.dropped} more spans not recorded")
+    return "\n".join(lines)
+
+
+class Tracer:
+    """Creates spans and hands finished traces to the exporter and slow-request log"""
+
+    def __init__(
+        self,
+        exporter: Optional[Any] = None,
+        sample_rate: float = 1.0,
+        slow_threshold_ms: Optional[float] = None,
+        slow_log_sample_rate: float = 1.0,
+        max_spans: int = 1000
+    ):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.slow_threshold_ms = slow_threshold_ms
+        self.slow_log_sample_rate = slow_log_sample_rate
+        self.max_spans = max_spans
+
+    def configure(
+        self,
+        exporter: Optional[Any] = None,
+        sample_rate: float = 1.0,
+        slow_threshold_ms: Optional[float] = None,
+        slow_log_sample_rate: float = 1.0
+    ) -> None:
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.slow_threshold_ms = slow_threshold_ms
+        self.slow_log_sample_rate = slow_log_sample_rate
+
+    @contextmanager
+    def start_trace(self, name: str, traceparent: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+        """Open the root span of a new trace, continuing an incoming traceparent if valid"""
+        incoming = parse_traceparent(traceparent)
+        if incoming:
+            trace_id, parent_id, sampled = incoming
+            sampled = sampled or random.random() < self.sample_rate
+        else:
+            trace_id, parent_id, sampled = _new_id(16), None, random.random() < self.sample_rate
+        trace = Trace(trace_id, sampled, self.max_spans)
+        root = None
+        try:
+            with self._open(trace, name, parent_id, attributes) as root:
+                yield root
+        finally:
+            if root is not None:
+                self._finish(trace, root)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Open a child of the current span; starts a new trace outside of one"""
+        parent = _current_span.get()
+        if parent is None:
+            with self.start_trace(name, **attributes) as root:
+                yield root
+            return
+        with self._open(parent.trace, name, parent.span_id, attributes) as span:
+            yield span
+
+    def traced(self, name: Optional[str] = None) -> Callable:
+        """Decorator running an async function inside a span"""
+        def decorator(fn: Callable) -> Callable:
+            span_name = name or fn.__name__
+
+            @functools.wraps(fn)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.span(span_name):
+                    return await fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def _open(self, trace: Trace, name: str, parent_id: Optional[str], attributes: Dict[str, Any]) -> Iterator[Span]:
+        span = Span(trace, name, parent_id, dict(attributes))
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = getattr(e, "detail", None) or type(e).__name__
+            raise
+        finally:
+            span.end = time.time()
+            _current_span.reset(token)
+            trace.add(span)
+
+    def _finish(self, trace: Trace, root: Span) -> None:
+        if trace.sampled and self.exporter is not None:
+            try:
+                self.exporter.export(trace)
+            except Exception as e:
+                logger.warning("Failed to export trace %s: %s", trace.trace_id, e)
+        if (self.slow_threshold_ms is not None and root.duration_ms >= self.slow_threshold_ms
+                and random.random() < self.slow_log_sample_rate):
+            logger.warning("Slow %s took %.1fms (trace %s)\n%s",
+                           root.name, root.duration_ms, trace.trace_id, format_breakdown(trace))
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_traceparent() -> Optional[str]:
+    """traceparent header value for an outgoing call from the current span"""
+    span = _current_span.get()
+    return span.traceparent if span is not None else None
+
+
+# Process-wide tracer; the gateway configures its exporter and thresholds at startup
+tracer = Tracer()
+traced = tracer.traced
@@ -0,0 +1,386 @@
+"""
+Routing of node RPC and REST calls across several upstream endpoints.
+
+Each dependency (Tendermint RPC, Cosmos REST) is configured as a list of base
+URLs. An UpstreamPool sends every request to the endpoint with the best
+score (EWMA latency weighted by requests in flight), skips endpoints whose
+circuit breaker is open or whose block height lags behind the highest
+height seen on any endpoint, and can hedge slow reads to a second endpoint.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import random
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from dependency_metrics import record_retry, status_outcome, track_dependency
+from tracing import current_span, current_traceparent, tracer
+
+logger = logging.getLogger("educhain-api.upstream")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Gateway and proxy answers that always mean the endpoint could not serve the call
+NODE_FAILURE_STATUSES = {502, 503, 504}
+
+# Metric names of node endpoints whose paths carry parameters
+NAMED_OPERATIONS = {
+    "/cosmos/tx/v1beta1/txs": "broadcast",
+    "/cosmos/tx/v1beta1/simulate": "simulate",
+    "/cosmos/auth/v1beta1/accounts": "get_account",
+    "/cosmos/base/tendermint/v1beta1/blocks/latest": "latest_block"
+}
+_OPERATION_NAME = re.compile(r"^[a-z][a-z0-9_]{0,63}$")
+
+
+def classify_request(pool_name: str, path: str, body: Any = None) -> Tuple[str, str]:
+    """
+    Return the (dependency, operation) metric labels of a node request.
+
+    Contract calls are named after their query or execute message, e.g.
+    get_did_document or register_did; other calls after their endpoint.
+    Names are only taken from a fixed vocabulary or the message key, never
+    from path parameters, to keep label cardinality bounded.
+    """
+    path = path.split("?")[0]
+    if path.startswith("/cosmwasm/"):
+        message = None
+        if "/smart/" in path:
+            try:
+                message = json.loads(base64.b64decode(path.rsplit("/smart/", 1)[1]))
+            except ValueError:
+                pass
+            fallback = "smart_query"
+        else:
+            message = body.get("msg") if isinstance(body, dict) else None
+            fallback = "execute"
+        name = next(iter(message), None) if isinstance(message, dict) else None
+        return "contract", name if name and _OPERATION_NAME.match(name) else fallback
+
+    for prefix, name in NAMED_OPERATIONS.items():
+        if path == prefix or path.startswith(prefix + "/"):
+            return pool_name, name
+    segment = path.strip("/")
+    return pool_name, segment if _OPERATION_NAME.match(segment) else "other"
+
+
+def is_endpoint_failure(path: str, response: httpx.Response) -> bool:
+    """
+    Whether an answer shows the endpoint itself failing.
+
+    Cosmos REST reports application errors, such as a contract query for a
+    DID that does not exist, as HTTP 500 with a gRPC status code in the
+    body. Every endpoint gives the same answer, so these neither count
+    against the endpoint nor fail over.
+    """
+    if response.status_code in NODE_FAILURE_STATUSES:
+        return True
+    if response.status_code < 500 or "/smart/" in path:
+        return False
+    try:
+        body = response.json()
+    except ValueError:
+        return True
+    return not (isinstance(body, dict) and isinstance(body.get("code"), int))
+
+
+def parse_endpoints(value: str) -> List[str]:
+    """Split a comma-separated list of base URLs"""
+    return [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+
+
+def tendermint_height(data: Dict[str, Any]) -> int:
+    """Latest block height from a Tendermint RPC /status response"""
+    return int(data["result"]["sync_info"]["latest_block_height"])
+
+
+def cosmos_rest_height(data: Dict[str, Any]) -> int:
+    """Latest block height from a Cosmos REST latest-block response"""
+    block = data.get("sdk_block") or data["block"]
+    return int(block["header"]["height"])
+
+
+class Endpoint:
+    """One upstream base URL and what has been observed about it"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.ewma_latency: Optional[float] = None
+        self.in_flight = 0
+        self.height: Optional[int] = None
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.requests = 0
+        self.failures = 0
+
+    def score(self) -> float:
+        # Endpoints that have not answered yet score 0 so they get probed
+        return (self.ewma_latency or 0.0) * (self.in_flight + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "state": self.state,
+            "ewma_latency_ms": round(self.ewma_latency * 1000, 2) if self.ewma_latency is not None else None,
+            "in_flight": self.in_flight,
+            "height": self.height,
+            "requests": self.requests,
+            "failures": self.failures
+        }
+
+
+class UpstreamPool:
+    """
+    Latency- and height-aware router over equivalent upstream endpoints.
+
+    Idempotent requests that fail with a transport error or an endpoint
+    failure (see is_endpoint_failure) are retried on the next candidate;
+    other requests go to one endpoint only.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        urls: List[str],
+        height_path: Optional[str] = None,
+        height_parser: Optional[Callable[[Dict[str, Any]], int]] = None,
+        max_height_lag: int = 5,
+        ewma_alpha: float = 0.3,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        hedge_after: float = 0.0,
+        height_interval: float = 5.0
+    ):
+        if not urls:
+            raise ValueError(f"No endpoints configured for {name}")
+        self.name = name
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.height_path = height_path
+        self.height_parser = height_parser
+        self.max_height_lag = max_height_lag
+        self.ewma_alpha = ewma_alpha
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hedge_after = hedge_after
+        self.height_interval = height_interval
+        self.client: Optional[httpx.AsyncClient] = None
+        self._height_task: Optional[asyncio.Task] = None
+
+    @property
+    def urls(self) -> List[str]:
+        return [endpoint.url for endpoint in self.endpoints]
+
+    @property
+    def best_height(self) -> Optional[int]:
+        heights = [endpoint.height for endpoint in self.endpoints if endpoint.height is not None]
+        return max(heights) if heights else None
+
+    async def start(self, client: httpx.AsyncClient) -> None:
+        """Use the given client and start tracking endpoint heights"""
+        self.client = client
+        if self.height_path and self.height_parser and len(self.endpoints) > 1:
+            self._height_task = asyncio.create_task(self._track_heights())
+
+    async def stop(self) -> None:
+        if self._height_task:
+            self._height_task.cancel()
+            await asyncio.gather(self._height_task, return_exceptions=True)
+            self._height_task = None
+
+    def candidates(self) -> List[Endpoint]:
+        """Endpoints in the order they should be tried"""
+        now = time.monotonic()
+        best_height = self.best_height
+        usable = []
+        for endpoint in self.endpoints:
+            if endpoint.state == OPEN and now - endpoint.opened_at >= self.reset_timeout:
+                endpoint.state = HALF_OPEN
+            if endpoint.state == OPEN or (endpoint.state == HALF_OPEN and endpoint.trial_in_flight):
+                continue
+            if (best_height is not None and endpoint.height is not None
+                    and best_height - endpoint.height > self.max_height_lag):
+                continue
+            usable.append(endpoint)
+
+        if not usable:
+            # Everything is unhealthy; trying something beats failing outright
+            usable = list(self.endpoints)
+        random.shuffle(usable)
+        return sorted(usable, key=Endpoint.score)
+
+    async def get(self, path: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    async def request(self, method: str, path: str, hedge: Optional[bool] = None, **kwargs: Any) -> httpx.Response:
+        """
+        Send a request to the best endpoint.
+
+        Reads are retried on other endpoints after a transport error or an
+        endpoint failure, and with hedging enabled a read that has not answered after
+        hedge_after seconds is also sent to the next endpoint.
+        """
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        candidates = self.candidates()
+        if not idempotent:
+            candidates = candidates[:1]
+        if hedge is None:
+            hedge = idempotent and self.hedge_after > 0
+        if hedge and len(candidates) > 1:
+            return await self._hedged(method, path, candidates, **kwargs)
+
+        last_error: Optional[Exception] = None
+        response: Optional[httpx.Response] = None
+        for attempt, endpoint in enumerate(candidates):
+            if attempt:
+                record_retry(*classify_request(self.name, path, kwargs.get("json")), "failover")
+            try:
+                response = await self._send(endpoint, method, path, **kwargs)
+            except httpx.HTTPError as e:
+                last_error = e
+                continue
+            if not is_endpoint_failure(path, response):
+                return response
+        if response is not None:
+            return response
+        raise last_error
+
+    async def _hedged(self, method: str, path: str, candidates: List[Endpoint], **kwargs: Any) -> httpx.Response:
+        """Race the best endpoint against the next one once it is slow"""
+        pending = {asyncio.create_task(self._send(candidates[0], method, path, **kwargs))}
+        remaining = candidates[1:]
+        result: Optional[httpx.Response] = None
+        last_error: Optional[Exception] = None
+        try:
+            while pending:
+                timeout = self.hedge_after if remaining else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.debug("Hedging %s %s to %s", method, path, remaining[0].url)
+                    record_retry(*classify_request(self.name, path, kwargs.get("json")), "hedge")
+                    pending.add(asyncio.create_task(self._send(remaining.pop(0), method, path, **kwargs)))
+                    continue
+                for task in done:
+                    try:
+                        response = task.result()
+                    except httpx.HTTPError as e:
+                        last_error = e
+                        continue
+                    if not is_endpoint_failure(path, response):
+                        return response
+                    result = response
+                if not pending and remaining:
+                    record_retry(*classify_request(self.name, path, kwargs.get("json")), "failover")
+                    pending.add(asyncio.create_task(self._send(remaining.pop(0), method, path, **kwargs)))
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        if result is not None:
+            return result
+        raise last_error
+
+    async def _send(
+        self, endpoint: Endpoint, method: str, path: str, operation: Optional[str] = None, **kwargs: Any
+    ) -> httpx.Response:
+        if self.client is None:
+            raise RuntimeError(f"Upstream pool {self.name} is not started")
+        dependency, default_operation = classify_request(self.name, path, kwargs.get("json"))
+        half_open_trial = endpoint.state == HALF_OPEN
+        if half_open_trial:
+            endpoint.trial_in_flight = True
+        endpoint.in_flight += 1
+        endpoint.requests += 1
+        start = time.monotonic()
+        try:
+            with track_dependency(dependency, operation or default_operation, pool="http") as call:
+                if current_span() is None:
+                    # Background probes are not part of any request worth tracing
+                    response = await self.client.request(method, f"{endpoint.url}{path}", **kwargs)
+                else:
+                    # Named by operation: paths carry DIDs and base64 queries
+                    with tracer.span(
+                        f"{self.name} {method} {operation or default_operation}",
+                        endpoint=endpoint.url,
+                        path=path.split("?")[0]
+                    ) as span:
+                        kwargs["headers"] = {**(kwargs.get("headers") or {}), "traceparent": current_traceparent()}
+                        response = await self.client.request(method, f"{endpoint.url}{path}", **kwargs)
+                        span.set_attribute("status", response.status_code)
+                call.outcome = status_outcome(response.status_code)
+        except asyncio.CancelledError:
+            raise
+        except httpx.HTTPError:
+            self._record_failure(endpoint)
+            raise
+        finally:
+            endpoint.in_flight -= 1
+            if half_open_trial:
+                endpoint.trial_in_flight = False
+
+        self._record_latency(endpoint, time.monotonic() - start)
+        if is_endpoint_failure(path, response):
+            self._record_failure(endpoint)
+        else:
+            self._record_success(endpoint)
+        return response
+
+    def _record_latency(self, endpoint: Endpoint, elapsed: float) -> None:
+        if endpoint.ewma_latency is None:
+            endpoint.ewma_latency = elapsed
+        else:
+            endpoint.ewma_latency += self.ewma_alpha * (elapsed - endpoint.ewma_latency)
+
+    def _record_success(self, endpoint: Endpoint) -> None:
+        if endpoint.state != CLOSED:
+            logger.info("Upstream %s endpoint %s recovered", self.name, endpoint.url)
+        endpoint.state = CLOSED
+        endpoint.consecutive_failures = 0
+
+    def _record_failure(self, endpoint: Endpoint) -> None:
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        if endpoint.state == HALF_OPEN or endpoint.consecutive_failures >= self.failure_threshold:
+            if endpoint.state != OPEN:
+                logger.warning("Upstream %s endpoint %s marked down after %d failures",
+                               self.name, endpoint.url, endpoint.consecutive_failures)
+            endpoint.state = OPEN
+            endpoint.opened_at = time.monotonic()
+
+    async def refresh_heights(self) -> None:
+        """Poll every endpoint for its latest block height"""
+        async def probe(endpoint: Endpoint) -> None:
+            try:
+                response = await self._send(endpoint, "GET", self.height_path, operation="height_probe")
+                if response.status_code == 200:
+                    endpoint.height = self.height_parser(response.json())
+            except Exception as e:
+                logger.debug("Height probe of %s failed: %s", endpoint.url, e)
+
+        await asyncio.gather(*(probe(endpoint) for endpoint in self.endpoints))
+
+    async def _track_heights(self) -> None:
+        while True:
+            await self.refresh_heights()
+            await asyncio.sleep(self.height_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "best_height": self.best_height,
+            "endpoints": [endpoint.stats() for endpoint in self.endpoints]
+        }
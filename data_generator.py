@@ -10,8 +10,16 @@ import json
 import os
 import time
 import argparse
+import threading
+import glob
+import shutil
+import subprocess
+import sys
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from functools import partial
+from typing import List, Dict, Any, Optional, Callable, Iterable
 
 # Default API base URL
 API_BASE = 'http://localhost:8279/api'
@@ -31,19 +39,51 @@ logger = logging.getLogger("DataGenerator")
 # Parse command line arguments
 parser = argparse.ArgumentParser(description='Generate data for ViEduChain-Hino system')
 parser.add_argument('--api-base', help='API Base URL', default=API_BASE)
-parser.add_argument('--module', help='Specific module to generate data for (eduadmission, eduid, educert, edupay, edumarket, researchledger)', default='all')
+parser.add_argument('--module', help='Specific module to generate data for (nodeinfo, eduadmission, eduid, educert, edupay, edumarket, researchledger, or none)', default='all')
 parser.add_argument('--count', help='Number of records to generate', type=int, default=10)
-parser.add_argument('--dry-run', help='Print actions without executing API calls', action='store_true')
+parser.add_argument('--dry-run', help='Print actions without executing API calls; output goes to *.dry-run copies', action='store_true')
+parser.add_argument('--concurrency', help='Maximum number of API calls in flight', type=int, default=16)
+parser.add_argument('--progress-interval', help='Seconds between throughput reports (0 to disable)', type=float, default=5.0)
+parser.add_argument('--store', help='Output format: ndjson streams records to --output-dir, json keeps everything in memory and writes data.json', choices=['ndjson', 'json'], default='ndjson')
+parser.add_argument('--output-dir', help='Directory of the per-module NDJSON files', default='data')
+parser.add_argument('--fsync-interval', help='Seconds between fsyncs of the NDJSON files', type=float, default=1.0)
+parser.add_argument('--reservoir-size', help='Sampled records kept in memory per non-ID collection (their de-duplication keys are always kept)', type=int, default=1000)
+parser.add_argument('--export-json', help='Also write the legacy data.json (or the given path) after the run; use with --module none to only export', nargs='?', const='data.json')
+parser.add_argument('--seed', help='Seed of the generated workload; the same seed and starting data give byte-identical output (random by default)', type=int)
+parser.add_argument('--workers', help='Processes generating independent modules in parallel (ndjson store only)', type=int, default=1)
+# Set by the parent process on its workers: the module whose checkpoint part to write
+parser.add_argument('--checkpoint-part', help=argparse.SUPPRESS)
 args = parser.parse_args()
+if args.workers > 1 and args.store != 'ndjson':
+    parser.error('--workers needs --store ndjson')
+
+# Collections in data.json order; the ID collections are sampled by other modules
+DATA_KEYS = ['dids', 'nodes', 'wallets', 'certificates', 'course_completions', 'degrees',
+             'nfts', 'seats', 'scores', 'research_papers']
+ID_COLLECTIONS = {'dids', 'wallets', 'nfts', 'seats'}
 
 # Update API base from arguments
 API_BASE = args.api_base
 DRY_RUN = args.dry_run
 DATA_COUNT = args.count
+CONCURRENCY = max(1, args.concurrency)
+SEED = args.seed if args.seed is not None else random.SystemRandom().randrange(2 ** 32)
+
+def dry_run_path(path: str) -> str:
+    """Where a dry run writes instead of path: data -> data.dry-run, data.json -> data.dry-run.json"""
+    base, extension = os.path.splitext(path.rstrip(os.sep))
+    return f"{base}.dry-run{extension}"
+
+# A dry run works on throwaway copies, so it never adds records to the real
+# output or advances the checkpoint a real run resumes from
+OUTPUT_DIR = dry_run_path(args.output_dir) if DRY_RUN else args.output_dir
+JSON_PATH = dry_run_path('data.json') if DRY_RUN else 'data.json'
+EXPORT_PATH = dry_run_path(args.export_json) if DRY_RUN and args.export_json else args.export_json
 
 # Create storage for generated data
 class DataStore:
-    def __init__(self):
+    def __init__(self, path: str = 'data.json'):
+        self.path = path
         self.dids: List[str] = []
         self.nodes: List[Dict[str, str]] = []
         self.wallets: List[str] = []
@@ -55,20 +95,42 @@ class DataStore:
         self.scores: List[Dict[str, Any]] = []
         self.research_papers: List[Dict[str, Any]] = []
         
-        # Load from data.json if exists
+        self._keys: Dict[str, set] = {key: set() for key in DATA_KEYS}
+        self.checkpoint: Optional['Checkpoint'] = None
+        
+        # Load from data.json if exists, dropping records repeated by earlier runs
         if os.path.exists('data.json'):
             try:
                 with open('data.json', 'r') as f:
                     data = json.load(f)
                     for key, value in data.items():
                         if hasattr(self, key):
-                            setattr(self, key, value)
-                logger.info(f"Loaded existing data from data.json")
+                            setattr(self, key, [])
+                            for record in value:
+                                self.add(key, record)
+                logger.info("Loaded existing data from data.json")
             except Exception as e:
-                logger.error(f"Error loading data.json: {e}")
+                logger.error("Error loading data.json: %s", e)
+    
+    def add(self, collection: str, record: Any) -> bool:
+        """Append a record unless one with the same key is already held"""
+        key = record_key(collection, record)
+        if key in self._keys[collection]:
+            return False
+        self._keys[collection].add(key)
+        getattr(self, collection).append(record)
+        return True
+    
+    def has(self, collection: str, key: Any) -> bool:
+        return key in self._keys[collection]
     
     def save(self):
         """Save all generated data to a JSON file"""
+        self.export_json(self.path)
+        if self.checkpoint is not None:
+            self.checkpoint.save()
+    
+    def export_json(self, path: str):
         data = {
             'dids': self.dids,
             'nodes': self.nodes,
@@ -81,42 +143,557 @@ class DataStore:
             'scores': self.scores,
             'research_papers': self.research_papers
         }
-        with open('data.json', 'w') as f:
+        with open(path, 'w') as f:
             json.dump(data, f, indent=2)
-        logger.info(f"Saved data to data.json")
+        logger.info("Saved data to %s", path)
+    
+    def close(self):
+        pass
 
-# Initialize data store
-data = DataStore()
+def record_key(collection: str, record: Any) -> Any:
+    """
+    Identity of a record for de-duplication: the ID itself for the ID
+    collections, the node id for nodes, and a digest of the content for the
+    rest, whose ids may be assigned by the API.
+    """
+    if collection in ID_COLLECTIONS:
+        return record
+    if collection == 'nodes':
+        return record['id']
+    return hashlib.blake2b(json.dumps(record, sort_keys=True).encode('utf-8'), digest_size=8).digest()
 
-# Helper to make API calls with logging and error handling
-def api_call(endpoint: str, method: str = 'GET', json_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    url = f"{API_BASE}/{endpoint}"
-    if DRY_RUN:
-        logger.info(f"DRY RUN: {method} {url} - {json.dumps(json_data) if json_data else ''}")
-        return {"success": True, "dry_run": True}
+class RecordStream:
+    """
+    One collection appended to an NDJSON file, one record per line.
     
-    try:
-        if method.upper() == 'GET':
-            response = requests.get(url)
-        else:  # POST
-            response = requests.post(url, json=json_data)
+    ID collections keep every ID in memory, since other modules pick random
+    references from them. Other collections keep a count and a fixed-size
+    uniform reservoir of records instead of the records themselves. Every
+    collection also keeps the de-duplication key of each record (the ID, or
+    an 8-byte digest), so memory still grows with the run, by roughly 100
+    bytes per record.
+    """
+    
+    def __init__(self, path: str, collection: str, reservoir_size: int, fsync_interval: float):
+        self.path = path
+        self.collection = collection
+        self.keep_ids = collection in ID_COLLECTIONS
+        # Keys of every record in the file, so re-runs never write a record twice
+        self.keys: set = set()
+        self.ids: List[Any] = []
+        self.reservoir: List[Any] = []
+        self.reservoir_size = reservoir_size
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        # Reservoir sampling draws from its own generator, not the workload's
+        self._random = random.Random(path)
+        self._lock = threading.Lock()
+        self._load()
+        self._file = open(path, 'a', encoding='utf-8')
+        self._last_sync = time.monotonic()
+    
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            valid_bytes = 0
+            for line in f:
+                # A crash can leave a partial last line; it is cut off below
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                key = record_key(self.collection, record)
+                if key not in self.keys:
+                    self.keys.add(key)
+                    self._remember(record)
+                valid_bytes += len(line)
+            f.truncate(valid_bytes)
+    
+    def _remember(self, record: Any):
+        self.count += 1
+        if self.keep_ids:
+            self.ids.append(record)
+        elif len(self.reservoir) < self.reservoir_size:
+            self.reservoir.append(record)
+        else:
+            slot = self._random.randrange(self.count)
+            if slot < self.reservoir_size:
+                self.reservoir[slot] = record
+    
+    def append(self, record: Any) -> bool:
+        """Write a record unless one with the same key is already in the file"""
+        key = record_key(self.collection, record)
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            if key in self.keys:
+                return False
+            self.keys.add(key)
+            self._file.write(line)
+            self._remember(record)
+        return True
+    
+    def due(self) -> bool:
+        return time.monotonic() - self._last_sync >= self.fsync_interval
+    
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+    
+    def flush(self):
+        with self._lock:
+            self._sync()
+    
+    def records(self) -> Iterable[Any]:
+        """Every record in the file, read back one line at a time"""
+        self.flush()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+    
+    def close(self):
+        with self._lock:
+            self._sync()
+            self._file.close()
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def __contains__(self, key: Any) -> bool:
+        return key in self.keys
+    
+    def __getitem__(self, index):
+        if not self.keep_ids:
+            raise TypeError(f"{os.path.basename(self.path)} keeps only a sample; use .reservoir")
+        return self.ids[index]
+    
+    def __iter__(self):
+        return iter(self.ids if self.keep_ids else self.reservoir)
+
+class StreamingDataStore:
+    """
+    Writes each generated record to <directory>/<collection>.ndjson as it is
+    created, fsyncing at most every fsync_interval seconds, so a crashed run
+    keeps what it generated. Existing files are read back on start. The
+    first run in an empty directory imports an existing data.json.
+    
+    The streams are synced together, and the checkpoint is saved right after
+    them, so the checkpoint never claims a record that is not on disk.
+    
+    A worker process opens only the collections its module uses; the legacy
+    import only happens when every collection is open.
+    """
+    
+    def __init__(self, directory: str, fsync_interval: float = 1.0, reservoir_size: int = 1000,
+                 collections: Optional[List[str]] = None):
+        self.directory = directory
+        self.collections = [key for key in DATA_KEYS if collections is None or key in collections]
+        self.checkpoint: Optional['Checkpoint'] = None
+        os.makedirs(directory, exist_ok=True)
+        fresh = not any(os.path.exists(self._path(key)) for key in DATA_KEYS)
+        for key in self.collections:
+            setattr(self, key, RecordStream(self._path(key), key, reservoir_size, fsync_interval))
+        if fresh and collections is None and os.path.exists('data.json'):
+            self._import_legacy('data.json')
+        logger.info("Streaming data to %s: %s", directory,
+                    ", ".join(f"{key}={len(getattr(self, key))}" for key in self.collections))
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.ndjson")
+    
+    def _import_legacy(self, path: str):
+        try:
+            with open(path, 'r') as f:
+                legacy = json.load(f)
+            for key in DATA_KEYS:
+                for record in legacy.get(key, []):
+                    getattr(self, key).append(record)
+            logger.info("Imported existing data from %s", path)
+        except Exception as e:
+            logger.error("Error importing %s: %s", path, e)
+    
+    def add(self, collection: str, record: Any) -> bool:
+        stream = getattr(self, collection)
+        added = stream.append(record)
+        if stream.due():
+            self.sync()
+        return added
+    
+    def has(self, collection: str, key: Any) -> bool:
+        return key in getattr(self, collection)
+    
+    def sync(self):
+        for key in self.collections:
+            getattr(self, key).flush()
+        if self.checkpoint is not None:
+            self.checkpoint.save()
+    
+    def save(self):
+        """Flush and fsync every stream; the records are already on disk"""
+        self.sync()
+        logger.info("Saved data to %s", self.directory)
+    
+    def export_json(self, path: str):
+        """
+        Write the legacy data.json layout (json.dump with indent=2) from the
+        NDJSON files, one record at a time, replacing path atomically.
+        """
+        temporary = f"{path}.tmp"
+        with open(temporary, 'w') as f:
+            f.write('{')
+            for position, key in enumerate(DATA_KEYS):
+                f.write(',' if position else '')
+                f.write(f'\n  {json.dumps(key)}: ')
+                empty = True
+                for record in getattr(self, key).records():
+                    f.write('[\n    ' if empty else ',\n    ')
+                    f.write(json.dumps(record, indent=2).replace('\n', '\n    '))
+                    empty = False
+                f.write('[]' if empty else '\n  ]')
+            f.write('\n}')
+        os.replace(temporary, path)
+        logger.info("Exported data to %s", path)
+    
+    def close(self):
+        for key in self.collections:
+            getattr(self, key).close()
+        if self.checkpoint is not None:
+            self.checkpoint.save()
+
+class Checkpoint:
+    """
+    Progress of every numbered generation step, saved as JSON so the next run
+    continues where this one stopped.
+    
+    Each step keeps the range being generated (`next` to `end`) and the
+    indices whose call failed. A run resumes an unfinished range, or else
+    starts a new one after it, and retries failed indices first.
+    
+    A worker process generating one module saves its steps to a part file
+    (checkpoint.<module>.json) beside the main one. Loading merges every
+    part file over the main file, and saving the main file removes them.
+    """
+    
+    def __init__(self, path: str, part: Optional[str] = None):
+        base, extension = os.path.splitext(path)
+        self.part_pattern = f"{base}.*{extension}"
+        self.path = f"{base}.{part}{extension}" if part else path
+        self.part = part
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self._runs: Dict[str, 'StepRun'] = {}
+        self._merged_parts: List[str] = []
+        self._lock = threading.Lock()
+        for source in [path] + sorted(glob.glob(self.part_pattern)):
+            if not os.path.exists(source):
+                continue
+            try:
+                with open(source, 'r') as f:
+                    self.steps.update(json.load(f).get('steps', {}))
+                if source != path:
+                    self._merged_parts.append(source)
+                logger.info("Loaded checkpoint from %s", source)
+            except Exception as e:
+                logger.error("Error loading checkpoint %s: %s", source, e)
+    
+    def step(self, name: str, count: int, first: int = 1, limit: Optional[int] = None) -> 'StepRun':
+        """
+        The indices to generate for a step: an unfinished range, or `count`
+        new ones (never beyond `limit`). A step without a checkpoint starts at
+        `first`.
+        """
+        with self._lock:
+            state = self.steps.get(name)
+            if state and state['next'] <= state['end']:
+                logger.info("Resuming %s at %s of %s", name, state["next"], state["end"])
+            else:
+                start = state['end'] + 1 if state else first
+                end = start + count - 1 if limit is None else min(start + count - 1, limit)
+                state = {'next': start, 'end': end, 'failed': state['failed'] if state else []}
+                self.steps[name] = state
+            if state['failed']:
+                logger.info("Retrying %s failed %s", len(state["failed"]), name)
+            run = self._runs[name] = StepRun(self, name, state)
+            return run
+    
+    def save(self):
+        with self._lock:
+            # A part file holds only the steps this process ran
+            steps = {name: self.steps[name] for name in self._runs} if self.part else self.steps
+            document = json.dumps({'steps': steps}, indent=2)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w') as f:
+            f.write(document)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+        if not self.part:
+            for merged in self._merged_parts:
+                os.remove(merged)
+            self._merged_parts = []
+
+class StepRun:
+    """
+    One run of a numbered step.
+    
+    Results are applied in index order as the contiguous `next` watermark
+    advances, whatever order the calls complete in. Collections therefore
+    fill in the same order on every run, and the checkpoint only ever covers
+    indices whose records are stored.
+    """
+    
+    def __init__(self, checkpoint: Checkpoint, name: str, state: Dict[str, Any]):
+        self.checkpoint = checkpoint
+        self.name = name
+        self.state = state
+        self._completed: Dict[int, Optional[Callable[[], None]]] = {}
+        self._order_lock = threading.Lock()
+    
+    def indices(self) -> Iterable[int]:
+        with self.checkpoint._lock:
+            retry, self.state['failed'] = self.state['failed'], []
+            start, end = self.state['next'], self.state['end']
+        yield from retry
+        yield from range(start, end + 1)
+    
+    def skip(self, i: int):
+        """Mark an index whose record is already held, without calling the API"""
+        # Completing may apply earlier results, which must not race the executor's callbacks
+        with executor._lock:
+            self._complete(i, None)
+    
+    def submit(self, i: int, endpoint: str, json_data: Dict[str, Any],
+               on_success: Optional[Callable[[Dict[str, Any]], None]] = None) -> Future:
+        def succeeded(result):
+            self._complete(i, partial(on_success, result) if on_success is not None else None)
         
-        if response.status_code >= 400:
-            logger.error(f"API Error: {method} {url} - Status {response.status_code}: {response.text}")
-            return {"success": False, "error": response.text, "status_code": response.status_code}
+        def failed(result):
+            self._complete(i, partial(self._record_failure, i))
         
-        data = response.json()
-        logger.info(f"API Success: {method} {url}")
-        return data
-    except Exception as e:
-        logger.error(f"API Exception: {method} {url} - {str(e)}")
-        return {"success": False, "error": str(e)}
+        return executor.submit(endpoint, 'POST', json_data, succeeded, failed)
+    
+    def _record_failure(self, i: int):
+        with self.checkpoint._lock:
+            self.state['failed'].append(i)
+    
+    def _complete(self, i: int, apply: Optional[Callable[[], None]]):
+        with self._order_lock:
+            if i < self.state['next']:
+                # A retried index: the watermark is already past it
+                if apply is not None:
+                    apply()
+                return
+            self._completed[i] = apply
+            while self.state['next'] in self._completed:
+                apply = self._completed.pop(self.state['next'])
+                # The record is stored before the checkpoint can claim it
+                if apply is not None:
+                    apply()
+                with self.checkpoint._lock:
+                    self.state['next'] += 1
+
+# Collections written by each module; a worker process opens only these and
+# the collections of the modules it depends on
+MODULE_COLLECTIONS = {
+    'nodeinfo': ['nodes'],
+    'eduid': ['dids'],
+    'educert': ['certificates', 'course_completions', 'degrees'],
+    'edupay': ['wallets'],
+    'edumarket': ['nfts'],
+    'eduadmission': ['seats', 'scores'],
+    'researchledger': ['research_papers'],
+}
+
+# The data store is opened by main(), once it knows which collections it needs
+data: Any = None
+checkpoint: Optional[Checkpoint] = None
+
+def open_store(collections: Optional[List[str]] = None, part: Optional[str] = None):
+    """Open the data store and checkpoint, for all collections or the given ones"""
+    global data, checkpoint
+    if args.store == 'ndjson':
+        data = StreamingDataStore(OUTPUT_DIR, args.fsync_interval, args.reservoir_size, collections)
+        checkpoint = Checkpoint(os.path.join(OUTPUT_DIR, 'checkpoint.json'), part)
+    else:
+        data = DataStore(JSON_PATH)
+        checkpoint = Checkpoint(dry_run_path('data.checkpoint.json') if DRY_RUN else 'data.checkpoint.json')
+    data.checkpoint = checkpoint
+
+def prepare_dry_run():
+    """Start a dry run from a fresh copy of the real output and checkpoint"""
+    if args.store == 'ndjson':
+        shutil.rmtree(OUTPUT_DIR, ignore_errors=True)
+        if os.path.isdir(args.output_dir):
+            shutil.copytree(args.output_dir, OUTPUT_DIR)
+        logger.info("Dry run: writing to %s, leaving %s untouched", OUTPUT_DIR, args.output_dir)
+    else:
+        dry_checkpoint = dry_run_path('data.checkpoint.json')
+        if os.path.exists(dry_checkpoint):
+            os.remove(dry_checkpoint)
+        if os.path.exists('data.checkpoint.json'):
+            shutil.copyfile('data.checkpoint.json', dry_checkpoint)
+        logger.info("Dry run: writing to %s, leaving data.json untouched", JSON_PATH)
+
+# Runs API calls on a pool of worker threads with pooled connections
+class ApiExecutor:
+    """
+    Each worker thread keeps its own requests.Session, so calls reuse
+    keep-alive connections instead of opening one per record. At most twice
+    `concurrency` calls are queued or running at once: submit() blocks when
+    the pool is full, which keeps memory flat on large runs.
+    """
+
+    def __init__(self, concurrency: int = 16, progress_interval: float = 5.0):
+        self.concurrency = concurrency
+        self.progress_interval = progress_interval
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="api")
+        self._slots = threading.BoundedSemaphore(concurrency * 2)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._succeeded: Counter = Counter()
+        self._existing: Counter = Counter()
+        self._failed: Counter = Counter()
+        self._in_flight = 0
+        self._started = time.monotonic()
+        self._last_report = (self._started, 0)
+        self._stopped = threading.Event()
+        self._reporter: Optional[threading.Thread] = None
+
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def call(self, endpoint: str, method: str = 'GET', json_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        url = f"{API_BASE}/{endpoint}"
+        if DRY_RUN:
+            logger.info("DRY RUN: %s %s - %s", method, url, json.dumps(json_data) if json_data else "")
+            return {"success": True, "dry_run": True}
+        
+        try:
+            if method.upper() == 'GET':
+                response = self.session().get(url)
+            else:  # POST
+                response = self.session().post(url, json=json_data)
+            
+            if response.status_code >= 400:
+                logger.error("API Error: %s %s - Status %s: %s", method, url, response.status_code, response.text)
+                return {"success": False, "error": response.text, "status_code": response.status_code}
+            
+            data = response.json()
+            logger.debug("API Success: %s %s", method, url)
+            return data
+        except Exception as e:
+            logger.error("API Exception: %s %s - %s", method, url, e)
+            return {"success": False, "error": str(e)}
+
+    def submit(self, endpoint: str, method: str = 'POST', json_data: Optional[Dict[str, Any]] = None,
+               on_success: Optional[Callable[[Dict[str, Any]], None]] = None,
+               on_failure: Optional[Callable[[Dict[str, Any]], None]] = None) -> Future:
+        """
+        Queue an API call. on_success runs with the response once the call
+        succeeds, or when the API reports that it already holds the record;
+        on_failure runs otherwise. Callbacks run one at a time, so they may
+        update the data store without further locking.
+        """
+        self._slots.acquire()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return self._pool.submit(self._run, endpoint, method, json_data, on_success, on_failure)
+        except Exception:
+            self._release()
+            raise
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _run(self, endpoint: str, method: str, json_data: Optional[Dict[str, Any]],
+             on_success: Optional[Callable[[Dict[str, Any]], None]],
+             on_failure: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+        # Nothing is returned, so finished futures do not keep response bodies alive
+        try:
+            result = self.call(endpoint, method, json_data)
+            succeeded = result.get("success", False) or DRY_RUN
+            existing = not succeeded and already_exists(result)
+            module = endpoint.split("/", 1)[0]
+            with self._lock:
+                if existing:
+                    self._existing[module] += 1
+                else:
+                    (self._succeeded if succeeded else self._failed)[module] += 1
+                if (succeeded or existing) and on_success is not None:
+                    on_success(result)
+                elif not (succeeded or existing) and on_failure is not None:
+                    on_failure(result)
+        finally:
+            self._release()
+
+    def wait(self, futures: Iterable[Future]):
+        """Wait for the calls, re-raising the first callback error"""
+        for future in futures:
+            future.result()
+
+    def start(self):
+        if self.progress_interval > 0:
+            self._reporter = threading.Thread(target=self._report, name="progress", daemon=True)
+            self._reporter.start()
+
+    def _report(self):
+        while not self._stopped.wait(self.progress_interval):
+            self.log_progress()
+
+    def log_progress(self):
+        with self._lock:
+            succeeded, failed = sum(self._succeeded.values()), sum(self._failed.values())
+            existing = sum(self._existing.values())
+            in_flight = self._in_flight
+            per_module = ", ".join(f"{module}={count}" for module, count in sorted(self._succeeded.items()))
+        now = time.monotonic()
+        last_time, last_total = self._last_report
+        total = succeeded + existing + failed
+        self._last_report = (now, total)
+        current_rate = (total - last_total) / max(now - last_time, 1e-9)
+        overall_rate = total / max(now - self._started, 1e-9)
+        logger.info(
+            "Progress: %s calls succeeded, %s already held, %s failed, %s in flight - "
+            "%.1f calls/s now, %.1f calls/s overall (%s)",
+            succeeded, existing, failed, in_flight, current_rate, overall_rate, per_module or "none yet"
+        )
+
+    def close(self):
+        self._stopped.set()
+        if self._reporter is not None:
+            self._reporter.join()
+        self._pool.shutdown(wait=True)
+        self.log_progress()
+
+def already_exists(result: Dict[str, Any]) -> bool:
+    """Whether a failed call was rejected because the API already holds the record"""
+    return result.get("status_code") == 409 or "already" in str(result.get("error", "")).lower()
+
+executor = ApiExecutor(CONCURRENCY, args.progress_interval)
+
+# Helper to make API calls with logging and error handling
+def api_call(endpoint: str, method: str = 'GET', json_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return executor.call(endpoint, method, json_data)
+
+# Helper to draw the random values of one record. Each record has its own
+# stream, so its values depend only on the seed, step and index, not on
+# which records were generated before it or on which thread or process
+def record_random(step: str, index: int) -> random.Random:
+    return random.Random(f"{SEED}:{step}:{index}")
 
 # Helper to generate random dates
-def random_date(start_date, end_date):
+def random_date(rng, start_date, end_date):
     time_between_dates = end_date - start_date
     days_between_dates = time_between_dates.days
-    random_number_of_days = random.randrange(days_between_dates)
+    random_number_of_days = rng.randrange(days_between_dates)
     return start_date + timedelta(days=random_number_of_days)
 
 # Helper to format dates for API
@@ -146,43 +723,58 @@ def generate_nodes():
         "Đại học Xây dựng"
     ]
     
-    for i, univ in enumerate(universities[:DATA_COUNT], 1):
+    def added(node, result):
+        data.add('nodes', node)
+        logger.info("Added node: %s - %s", node["id"], node["name"])
+    
+    futures = []
+    run = checkpoint.step('nodes', DATA_COUNT, first=len(data.nodes) + 1, limit=len(universities))
+    for i in run.indices():
+        univ = universities[i - 1]
         node_id = f"node{i}"
-        node_address = "0x" + ''.join(random.choices(string.hexdigits, k=40)).lower()
+        if data.has('nodes', node_id):
+            run.skip(i)
+            continue
+        rng = record_random('nodes', i)
+        node_address = "0x" + ''.join(rng.choices(string.hexdigits, k=40)).lower()
         node = {"id": node_id, "name": univ, "address": node_address}
         
         # Add node to nodeinfo
-        result = api_call("nodeinfo/register", "POST", {
+        futures.append(run.submit(i, "nodeinfo/register", {
             "id": node_id,
             "name": univ,
             "address": node_address
-        })
-        
-        if result.get("success", False) or DRY_RUN:
-            data.nodes.append(node)
-            logger.info(f"Added node: {node_id} - {univ}")
+        }, partial(added, node)))
     
+    executor.wait(futures)
     return data.nodes
 
 # 2. EduID Generation
 def generate_dids():
     logger.info("Generating DIDs...")
     
-    for i in range(1, DATA_COUNT + 1):
+    def created(did, result):
+        data.add('dids', did)
+        logger.info("Created DID: %s", did)
+    
+    futures = []
+    run = checkpoint.step('dids', DATA_COUNT, first=len(data.dids) + 1)
+    for i in run.indices():
         did = f"did:viedu:{i:04d}"
-        public_key = ''.join(random.choices(string.hexdigits, k=64)).lower()
+        if data.has('dids', did):
+            run.skip(i)
+            continue
+        rng = record_random('dids', i)
+        public_key = ''.join(rng.choices(string.hexdigits, k=64)).lower()
         service_endpoint = f"https://service{i}.viedu.edu.vn"
         
-        result = api_call("edu-id/register", "POST", {
+        futures.append(run.submit(i, "edu-id/register", {
             "did": did,
             "public_key": public_key,
             "service_endpoint": service_endpoint
-        })
-        
-        if result.get("success", False) or DRY_RUN:
-            data.dids.append(did)
-            logger.info(f"Created DID: {did}")
+        }, partial(created, did)))
     
+    executor.wait(futures)
     return data.dids
 
 # 3. Certificate Generation
@@ -207,35 +799,40 @@ def generate_certificates():
         "Certificate in Business Management"
     ]
     
-    for i in range(1, DATA_COUNT + 1):
-        student_did = random.choice(data.dids)
-        certificate_type = random.choice(cert_types)
-        certificate_name = random.choice(cert_names)
-        issue_date = format_date(random_date(datetime(2020, 1, 1), datetime(2025, 6, 1)))
-        issuer_did = random.choice(data.dids)  # Using DIDs as issuer DIDs
+    def created(certificate, result):
+        certificate["id"] = result.get("id", certificate["id"])
+        data.add('certificates', certificate)
+        logger.info("Created certificate: %s for %s", certificate["certificate_name"], certificate["student_did"])
+    
+    futures = []
+    run = checkpoint.step('certificates', DATA_COUNT, first=len(data.certificates) + 1)
+    for i in run.indices():
+        rng = record_random('certificates', i)
+        student_did = rng.choice(data.dids)
+        certificate_type = rng.choice(cert_types)
+        certificate_name = rng.choice(cert_names)
+        issue_date = format_date(random_date(rng, datetime(2020, 1, 1), datetime(2025, 6, 1)))
+        issuer_did = rng.choice(data.dids)  # Using DIDs as issuer DIDs
         metadata = json.dumps({"description": f"Certificate {i}", "additionalInfo": "Generated by script"})
         
-        result = api_call("educert/create_certificate", "POST", {
+        certificate = {
+            "id": f"cert-{i}",
+            "student_did": student_did,
+            "certificate_type": certificate_type,
+            "certificate_name": certificate_name,
+            "issue_date": issue_date,
+            "issuer_did": issuer_did
+        }
+        futures.append(run.submit(i, "educert/create_certificate", {
             "student_did": student_did,
             "certificate_type": certificate_type,
             "certificate_name": certificate_name,
             "issue_date": issue_date,
             "issuer_did": issuer_did,
             "metadata": metadata
-        })
-        
-        if result.get("success", False) or DRY_RUN:
-            certificate = {
-                "id": result.get("id", f"cert-{i}"),
-                "student_did": student_did,
-                "certificate_type": certificate_type,
-                "certificate_name": certificate_name,
-                "issue_date": issue_date,
-                "issuer_did": issuer_did
-            }
-            data.certificates.append(certificate)
-            logger.info(f"Created certificate: {certificate_name} for {student_did}")
+        }, partial(created, certificate)))
     
+    executor.wait(futures)
     return data.certificates
 
 # 4. Course Completion Records
@@ -261,19 +858,35 @@ def generate_course_completions():
     ]
     grades = ["A+", "A", "A-", "B+", "B", "B-", "C+", "C", "C-", "D"]
     
-    for i in range(1, DATA_COUNT + 1):
+    def created(completion, result):
+        completion["id"] = result.get("id", completion["id"])
+        data.add('course_completions', completion)
+        logger.info("Created course completion: %s for %s with grade %s", completion["course_name"], completion["student_did"], completion["grade"])
+    
+    futures = []
+    run = checkpoint.step('course_completions', DATA_COUNT, first=len(data.course_completions) + 1)
+    for i in run.indices():
+        rng = record_random('course_completions', i)
         idx = i % len(course_ids)
-        student_did = random.choice(data.dids)
+        student_did = rng.choice(data.dids)
         course_id = course_ids[idx]
         course_name = course_names[idx]
-        completion_date = format_date(random_date(datetime(2020, 1, 1), datetime(2025, 6, 1)))
-        grade = random.choice(grades)
-        credits = random.randint(1, 5)
-        instructor_did = random.choice(data.dids)
-        institution_did = random.choice(data.dids)
+        completion_date = format_date(random_date(rng, datetime(2020, 1, 1), datetime(2025, 6, 1)))
+        grade = rng.choice(grades)
+        credits = rng.randint(1, 5)
+        instructor_did = rng.choice(data.dids)
+        institution_did = rng.choice(data.dids)
         metadata = json.dumps({"notes": f"Course {i}", "semester": f"Fall 2024"})
         
-        result = api_call("educert/create_course_completion", "POST", {
+        completion = {
+            "id": f"completion-{i}",
+            "student_did": student_did,
+            "course_id": course_id,
+            "course_name": course_name,
+            "completion_date": completion_date,
+            "grade": grade
+        }
+        futures.append(run.submit(i, "educert/create_course_completion", {
             "student_did": student_did,
             "course_id": course_id,
             "course_name": course_name,
@@ -283,20 +896,9 @@ def generate_course_completions():
             "instructor_did": instructor_did,
             "institution_did": institution_did,
             "metadata": metadata
-        })
-        
-        if result.get("success", False) or DRY_RUN:
-            completion = {
-                "id": result.get("id", f"completion-{i}"),
-                "student_did": student_did,
-                "course_id": course_id,
-                "course_name": course_name,
-                "completion_date": completion_date,
-                "grade": grade
-            }
-            data.course_completions.append(completion)
-            logger.info(f"Created course completion: {course_name} for {student_did} with grade {grade}")
+        }, partial(created, completion)))
     
+    executor.wait(futures)
     return data.course_completions
 
 # 5. Degree Issuance
@@ -337,20 +939,37 @@ def generate_degrees():
     
     honors = ["cum_laude", "magna_cum_laude", "summa_cum_laude", "none"]
     
-    for i in range(1, DATA_COUNT + 1):
+    def created(degree, result):
+        degree["id"] = result.get("id", degree["id"])
+        data.add('degrees', degree)
+        logger.info("Created degree: %s in %s for %s", degree["degree_name"], degree["major"], degree["student_did"])
+    
+    futures = []
+    run = checkpoint.step('degrees', DATA_COUNT, first=len(data.degrees) + 1)
+    for i in run.indices():
+        rng = record_random('degrees', i)
         idx = i % len(degree_names)
-        student_did = random.choice(data.dids)
+        student_did = rng.choice(data.dids)
         degree_name = degree_names[idx]
         degree_type = degree_types[idx % len(degree_types)]
         major = majors[idx]
-        graduation_date = format_date(random_date(datetime(2020, 1, 1), datetime(2025, 6, 1)))
-        gpa = round(random.uniform(2.0, 4.0), 2)
-        honor = random.choice(honors)
-        institution_did = random.choice(data.dids)
+        graduation_date = format_date(random_date(rng, datetime(2020, 1, 1), datetime(2025, 6, 1)))
+        gpa = round(rng.uniform(2.0, 4.0), 2)
+        honor = rng.choice(honors)
+        institution_did = rng.choice(data.dids)
         signature_authority = "University Registrar"
         metadata = json.dumps({"thesis": f"Thesis for degree {i}", "additionalInfo": "Generated by script"})
         
-        result = api_call("educert/issue_degree", "POST", {
+        degree = {
+            "id": f"degree-{i}",
+            "student_did": student_did,
+            "degree_name": degree_name,
+            "degree_type": degree_type,
+            "major": major,
+            "graduation_date": graduation_date,
+            "gpa": gpa
+        }
+        futures.append(run.submit(i, "educert/issue_degree", {
             "student_did": student_did,
             "degree_name": degree_name,
             "degree_type": degree_type,
@@ -361,56 +980,55 @@ def generate_degrees():
             "institution_did": institution_did,
             "signature_authority": signature_authority,
             "metadata": metadata
-        })
-        
-        if result.get("success", False) or DRY_RUN:
-            degree = {
-                "id": result.get("id", f"degree-{i}"),
-                "student_did": student_did,
-                "degree_name": degree_name,
-                "degree_type": degree_type,
-                "major": major,
-                "graduation_date": graduation_date,
-                "gpa": gpa
-            }
-            data.degrees.append(degree)
-            logger.info(f"Created degree: {degree_name} in {major} for {student_did}")
+        }, partial(created, degree)))
     
+    executor.wait(futures)
     return data.degrees
 
 # 6. EduPay Wallet Generation
 def generate_wallets():
     logger.info("Generating wallets...")
     
-    for i in range(1, DATA_COUNT + 1):
-        address = "0x" + ''.join(random.choices(string.hexdigits, k=40)).lower()
-        initial_amount = random.randint(1000, 10000)
+    def created(address, initial_amount, result):
+        data.add('wallets', address)
+        logger.info("Created wallet: %s with %s tokens", address, initial_amount)
+    
+    futures = []
+    run = checkpoint.step('wallets', DATA_COUNT, first=len(data.wallets) + 1)
+    for i in run.indices():
+        rng = record_random('wallets', i)
+        address = "0x" + ''.join(rng.choices(string.hexdigits, k=40)).lower()
+        initial_amount = rng.randint(1000, 10000)
         
-        result = api_call("edupay/mint", "POST", {
+        futures.append(run.submit(i, "edupay/mint", {
             "address": address,
             "amount": initial_amount
-        })
-        
-        if result.get("success", False) or DRY_RUN:
-            data.wallets.append(address)
-            logger.info(f"Created wallet: {address} with {initial_amount} tokens")
+        }, partial(created, address, initial_amount)))
+    
+    # Transfers need the minted wallets
+    executor.wait(futures)
     
     # Generate some transfers
     if len(data.wallets) >= 2:
         logger.info("Generating transfers between wallets...")
         
-        for _ in range(DATA_COUNT):
-            from_addr = random.choice(data.wallets)
-            to_addr = random.choice([w for w in data.wallets if w != from_addr])
-            amount = random.randint(10, 100)
+        def transferred(amount, from_addr, to_addr, result):
+            logger.info("Transferred %s from %s to %s", amount, from_addr, to_addr)
+        
+        futures = []
+        run = checkpoint.step('transfers', DATA_COUNT)
+        for i in run.indices():
+            rng = record_random('transfers', i)
+            from_index, to_index = rng.sample(range(len(data.wallets)), 2)
+            from_addr, to_addr = data.wallets[from_index], data.wallets[to_index]
+            amount = rng.randint(10, 100)
             
-            api_call("edupay/transfer", "POST", {
+            futures.append(run.submit(i, "edupay/transfer", {
                 "from_address": from_addr,
                 "to_address": to_addr,
                 "amount": amount
-            })
-            
-            logger.info(f"Transferred {amount} from {from_addr} to {to_addr}")
+            }, partial(transferred, amount, from_addr, to_addr)))
+        executor.wait(futures)
     
     return data.wallets
 
@@ -435,39 +1053,53 @@ def generate_nfts():
         "Course: Blockchain for Enterprise"
     ]
     
-    for i in range(1, DATA_COUNT + 1):
+    def created(nft_id, metadata, price, result):
+        data.add('nfts', nft_id)
+        logger.info("Created NFT: %s - %s for %s tokens", nft_id, metadata, price)
+    
+    futures = []
+    run = checkpoint.step('nfts', DATA_COUNT, first=len(data.nfts) + 1)
+    for i in run.indices():
         nft_id = f"nft-{i:03d}"
-        creator = random.choice(data.wallets)
+        if data.has('nfts', nft_id):
+            run.skip(i)
+            continue
+        rng = record_random('nfts', i)
+        creator = rng.choice(data.wallets)
         metadata = nft_metadata[i % len(nft_metadata)]
-        price = random.randint(100, 1000)
+        price = rng.randint(100, 1000)
         
-        result = api_call("edumarket/mint", "POST", {
+        futures.append(run.submit(i, "edumarket/mint", {
             "id": nft_id,
             "creator": creator,
             "metadata": metadata,
             "price": price
-        })
-        
-        if result.get("success", False) or DRY_RUN:
-            data.nfts.append(nft_id)
-            logger.info(f"Created NFT: {nft_id} - {metadata} for {price} tokens")
+        }, partial(created, nft_id, metadata, price)))
+    
+    # Purchases need the minted NFTs
+    executor.wait(futures)
     
     # Generate some NFT purchases
     if data.nfts and len(data.wallets) >= 2:
         logger.info("Generating NFT purchases...")
         
-        for _ in range(min(DATA_COUNT, len(data.nfts))):
-            nft_id = random.choice(data.nfts)
-            buyer = random.choice(data.wallets)
-            price = random.randint(100, 1000)
+        def purchased(nft_id, buyer, price, result):
+            logger.info("NFT %s purchased by %s for %s tokens", nft_id, buyer, price)
+        
+        futures = []
+        run = checkpoint.step('purchases', min(DATA_COUNT, len(data.nfts)))
+        for i in run.indices():
+            rng = record_random('purchases', i)
+            nft_id = rng.choice(data.nfts)
+            buyer = rng.choice(data.wallets)
+            price = rng.randint(100, 1000)
             
-            api_call("edumarket/buy", "POST", {
+            futures.append(run.submit(i, "edumarket/buy", {
                 "id": nft_id,
                 "buyer": buyer,
                 "amount": price
-            })
-            
-            logger.info(f"NFT {nft_id} purchased by {buyer} for {price} tokens")
+            }, partial(purchased, nft_id, buyer, price)))
+        executor.wait(futures)
     
     return data.nfts
 
@@ -475,38 +1107,49 @@ def generate_nfts():
 def generate_admission_data():
     logger.info("Generating admission data...")
     
+    def created_seat(seat_id, result):
+        data.add('seats', seat_id)
+        logger.info("Created seat: %s", seat_id)
+    
+    def created_score(score, result):
+        data.add('scores', score)
+        logger.info("Created score: %s for candidate %s", score["score"], score["candidate_hash"])
+    
     # Generate seats
-    for i in range(1, DATA_COUNT + 1):
+    futures = []
+    run = checkpoint.step('seats', DATA_COUNT, first=len(data.seats) + 1)
+    for i in run.indices():
         seat_id = f"seat-{i:03d}"
+        if data.has('seats', seat_id):
+            run.skip(i)
+            continue
         
-        result = api_call("eduadmission/mint_seat", "POST", {
+        futures.append(run.submit(i, "eduadmission/mint_seat", {
             "seat_id": seat_id
-        })
-        
-        if result.get("success", False) or DRY_RUN:
-            data.seats.append(seat_id)
-            logger.info(f"Created seat: {seat_id}")
+        }, partial(created_seat, seat_id)))
     
     # Generate scores
     if not data.dids:
         logger.warning("No DIDs found. Skipping score generation.")
+        executor.wait(futures)
     else:
-        for i in range(1, DATA_COUNT + 1):
-            candidate_hash = random.choice(data.dids)
-            score = round(random.uniform(5.0, 10.0), 2)
+        run = checkpoint.step('scores', DATA_COUNT, first=len(data.scores) + 1)
+        for i in run.indices():
+            rng = record_random('scores', i)
+            candidate_hash = rng.choice(data.dids)
+            score = round(rng.uniform(5.0, 10.0), 2)
             
-            result = api_call("eduadmission/push_score", "POST", {
+            futures.append(run.submit(i, "eduadmission/push_score", {
                 "candidate_hash": candidate_hash,
                 "score": score
-            })
-            
-            if result.get("success", False) or DRY_RUN:
-                data.scores.append({
-                    "id": f"score-{i:03d}",
-                    "candidate_hash": candidate_hash,
-                    "score": score
-                })
-                logger.info(f"Created score: {score} for candidate {candidate_hash}")
+            }, partial(created_score, {
+                "id": f"score-{i:03d}",
+                "candidate_hash": candidate_hash,
+                "score": score
+            })))
+        
+        # Matching needs every seat and score
+        executor.wait(futures)
         
         # Run matching algorithm
         if data.seats and data.scores:
@@ -536,84 +1179,183 @@ def generate_research_data():
         "Interoperability Standards for Educational Blockchain Systems"
     ]
     
-    for i in range(1, DATA_COUNT + 1):
-        author = random.choice(data.dids)
+    def published(paper, result):
+        paper["id"] = result.get("id", paper["id"])
+        data.add('research_papers', paper)
+        logger.info("Published research: %s by %s", paper["title"], paper["author"])
+    
+    futures = []
+    run = checkpoint.step('research_papers', DATA_COUNT, first=len(data.research_papers) + 1)
+    for i in run.indices():
+        rng = record_random('research_papers', i)
+        author = rng.choice(data.dids)
         title = research_titles[i % len(research_titles)]
         abstract = f"Abstract for research paper #{i}: This paper explores {title.lower()}."
         hash_value = hashlib.sha256(f"{title}:{author}:{abstract}".encode()).hexdigest()
         
-        result = api_call("researchledger/publish", "POST", {
+        paper = {
+            "id": f"paper-{i}",
+            "author": author,
+            "title": title,
+            "hash": hash_value
+        }
+        futures.append(run.submit(i, "researchledger/publish", {
             "author": author,
             "title": title,
             "abstract": abstract,
             "hash": hash_value
-        })
-        
-        if result.get("success", False) or DRY_RUN:
-            paper = {
-                "id": result.get("id", f"paper-{i}"),
-                "author": author,
-                "title": title,
-                "hash": hash_value
-            }
-            data.research_papers.append(paper)
-            logger.info(f"Published research: {title} by {author}")
+        }, partial(published, paper)))
     
+    executor.wait(futures)
     return data.research_papers
 
 # --- Main Execution ---
 
+# Generation steps of each module, in the order they run
+MODULE_STEPS = {
+    'nodeinfo': [generate_nodes],
+    'eduid': [generate_dids],
+    'educert': [generate_certificates, generate_course_completions, generate_degrees],
+    'edupay': [generate_wallets],
+    'edumarket': [generate_nfts],
+    'eduadmission': [generate_admission_data],
+    'researchledger': [generate_research_data],
+}
+
+# Modules that reference records of another module: DIDs before certificates,
+# scores and papers, wallets before NFTs
+MODULE_DEPENDENCIES = {
+    'educert': ['eduid'],
+    'edumarket': ['edupay'],
+    'eduadmission': ['eduid'],
+    'researchledger': ['eduid'],
+}
+
+def run_modules(modules: List[str]):
+    """Run the modules concurrently, each one after the selected modules it depends on"""
+    started: Dict[str, Future] = {}
+    
+    def run(module):
+        for dependency in MODULE_DEPENDENCIES.get(module, []):
+            if dependency in started:
+                started[dependency].result()
+        for step in MODULE_STEPS[module]:
+            step()
+    
+    # MODULE_STEPS lists dependencies first, so they are submitted before their dependents
+    with ThreadPoolExecutor(max_workers=len(modules), thread_name_prefix="module") as pool:
+        for module in modules:
+            started[module] = pool.submit(run, module)
+    for module in modules:
+        started[module].result()
+
+def module_waves(modules: List[str]) -> List[List[str]]:
+    """Group the modules so each group only depends on modules of earlier groups"""
+    waves: List[List[str]] = []
+    placed: Dict[str, int] = {}
+    for module in modules:
+        wave = max((placed[dependency] + 1 for dependency in MODULE_DEPENDENCIES.get(module, []) if dependency in placed), default=0)
+        placed[module] = wave
+        if wave == len(waves):
+            waves.append([])
+        waves[wave].append(module)
+    return waves
+
+def run_module_processes(modules: List[str], workers: int) -> bool:
+    """
+    Run each module in its own process, at most `workers` at a time, each
+    wave after the one it depends on. Modules write disjoint NDJSON files and
+    checkpoint parts, which the parent merges when it reopens the store.
+    """
+    command = [
+        sys.executable, os.path.abspath(__file__),
+        '--api-base', API_BASE, '--count', str(DATA_COUNT), '--seed', str(SEED),
+        '--concurrency', str(CONCURRENCY), '--progress-interval', str(args.progress_interval),
+        '--store', args.store, '--output-dir', args.output_dir, '--fsync-interval', str(args.fsync_interval),
+        '--reservoir-size', str(args.reservoir_size), '--workers', '1'
+    ] + (['--dry-run'] if DRY_RUN else [])
+    succeeded = True
+    for wave in module_waves(modules):
+        pending = list(wave)
+        running: Dict[str, subprocess.Popen] = {}
+        while pending or running:
+            while pending and len(running) < workers:
+                module = pending.pop(0)
+                logger.info("Starting worker process for %s", module)
+                running[module] = subprocess.Popen(command + ['--module', module, '--checkpoint-part', module])
+            finished = [module for module, process in running.items() if process.poll() is not None]
+            for module in finished:
+                returncode = running.pop(module).returncode
+                if returncode != 0:
+                    logger.error("Worker process for %s exited with code %s", module, returncode)
+                    succeeded = False
+            if not finished:
+                time.sleep(0.1)
+        if not succeeded:
+            # Later waves depend on this one
+            break
+    return succeeded
+
 def main():
-    logger.info(f"Starting data generation for ViEduChain-Hino - Count: {DATA_COUNT}, API: {API_BASE}")
-      # Check API health before proceeding
-    try:
-        health_result = api_call("health", "GET")
-        if not health_result.get("success", False) and not DRY_RUN:
-            logger.error("API health check failed. Please ensure the API is running.")
+    logger.info("Starting data generation for ViEduChain-Hino - Count: %s, API: %s, Seed: %s", DATA_COUNT, API_BASE, SEED)
+    
+    # Generate data based on module selection
+    module = args.module.lower()
+    
+    modules = [name for name in MODULE_STEPS if module in ['all', name]]
+    
+    # Worker processes rely on the parent's health check
+    if modules and not args.checkpoint_part:
+        # Check API health before proceeding
+        try:
+            health_result = api_call("health", "GET")
+            if not health_result.get("success", False) and not DRY_RUN:
+                logger.error("API health check failed. Please ensure the API is running.")
+                if DRY_RUN:
+                    logger.info("Continuing with dry run despite health check failure")
+                else:
+                    return
+        except Exception as e:
+            logger.error("API health check error: %s", e)
             if DRY_RUN:
-                logger.info("Continuing with dry run despite health check failure")
+                logger.info("Continuing with dry run despite health check error")
             else:
                 return
-    except Exception as e:
-        logger.error(f"API health check error: {str(e)}")
-        if DRY_RUN:
-            logger.info("Continuing with dry run despite health check error")
-        else:
-            return
     
-    # Generate data based on module selection
-    module = args.module.lower()
+    # Worker processes share the copy their parent prepared
+    if DRY_RUN and not args.checkpoint_part:
+        prepare_dry_run()
+    
+    if args.workers > 1 and len(modules) > 1:
+        # Import a legacy data.json once, before the workers open their files
+        open_store()
+        data.close()
+        if not run_module_processes(modules, args.workers):
+            logger.error("Data generation failed in a worker process; re-run to resume")
+        modules = []
     
+    if args.checkpoint_part:
+        collections = [key for name in modules + MODULE_DEPENDENCIES.get(module, []) for key in MODULE_COLLECTIONS[name]]
+        open_store(collections, args.checkpoint_part)
+    else:
+        open_store()
+    
+    executor.start()
     try:
-        if module in ['all', 'nodeinfo']:
-            generate_nodes()
-            
-        if module in ['all', 'eduid']:
-            generate_dids()
-            
-        if module in ['all', 'educert']:
-            generate_certificates()
-            generate_course_completions()
-            generate_degrees()
-            
-        if module in ['all', 'edupay']:
-            generate_wallets()
-            
-        if module in ['all', 'edumarket']:
-            generate_nfts()
-            
-        if module in ['all', 'eduadmission']:
-            generate_admission_data()
-            
-        if module in ['all', 'researchledger']:
-            generate_research_data()
+        if modules:
+            run_modules(modules)
             
         # Save all generated data
         data.save()
+        if EXPORT_PATH:
+            data.export_json(EXPORT_PATH)
         
         logger.info("Data generation completed successfully!")
     except Exception as e:
-        logger.error(f"Error during data generation: {str(e)}")
+        logger.error("Error during data generation: %s", e)
+    finally:
+        executor.close()
+        data.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,168 @@
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_generator.py")
+
+
+@pytest.fixture(scope="module")
+def dg(tmp_path_factory):
+    # The script parses its arguments and opens its log file on import
+    directory = tmp_path_factory.mktemp("generator")
+    cwd, argv = os.getcwd(), sys.argv
+    os.chdir(directory)
+    sys.argv = ["data_generator.py", "--dry-run", "--progress-interval", "0"]
+    try:
+        return importlib.import_module("data_generator")
+    finally:
+        os.chdir(cwd)
+        sys.argv = argv
+
+
+class FakeExecutor:
+    """Completes calls synchronously, failing the given indices"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self._lock = threading.Lock()
+
+    def submit(self, endpoint, method, json_data, on_success=None, on_failure=None):
+        with self._lock:
+            if json_data["i"] in self.failing:
+                on_failure({"success": False})
+            elif on_success is not None:
+                on_success({"success": True})
+
+
+class EndpointExecutor(FakeExecutor):
+    """Completes calls synchronously, failing every call to the given endpoints"""
+
+    def submit(self, endpoint, method, json_data, on_success=None, on_failure=None):
+        with self._lock:
+            if endpoint in self.failing:
+                on_failure({"success": False})
+            elif on_success is not None:
+                on_success({"success": True})
+        future = Future()
+        future.set_result(None)
+        return future
+
+    def wait(self, futures):
+        for future in futures:
+            future.result()
+
+
+def run_step(dg, checkpoint, store, count, failing=()):
+    dg.executor = FakeExecutor(failing)
+    run = checkpoint.step("dids", count, first=len(store.dids) + 1)
+    for i in run.indices():
+        did = f"did:viedu:{i:04d}"
+        if store.has("dids", did):
+            run.skip(i)
+            continue
+        run.submit(i, "edu-id/register", {"i": i}, lambda result, did=did: store.add("dids", did))
+    checkpoint.save()
+    return run
+
+
+def test_record_stream_drops_partial_last_line(dg, tmp_path):
+    path = tmp_path / "dids.ndjson"
+    path.write_bytes(b'"did:viedu:0001"\n"did:viedu:0002"\n"did:vie')
+
+    stream = dg.RecordStream(str(path), "dids", 10, 1.0)
+    assert len(stream) == 2
+    assert stream.append("did:viedu:0003")
+    assert not stream.append("did:viedu:0002")
+    stream.close()
+
+    lines = path.read_text().splitlines()
+    assert [json.loads(line) for line in lines] == ["did:viedu:0001", "did:viedu:0002", "did:viedu:0003"]
+
+
+def test_failed_indices_are_retried_first(dg, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(dg, "executor", None)
+    store = dg.StreamingDataStore(str(tmp_path / "data"))
+    checkpoint = dg.Checkpoint(str(tmp_path / "data" / "checkpoint.json"))
+
+    run_step(dg, checkpoint, store, 5, failing={2, 4})
+    assert list(store.dids) == ["did:viedu:0001", "did:viedu:0003", "did:viedu:0005"]
+    assert checkpoint.steps["dids"] == {"next": 6, "end": 5, "failed": [2, 4]}
+
+    # A new run retries the failures, then continues after the finished range
+    resumed = dg.Checkpoint(str(tmp_path / "data" / "checkpoint.json"))
+    run_step(dg, resumed, store, 2)
+    assert list(store.dids)[3:] == ["did:viedu:0002", "did:viedu:0004", "did:viedu:0006", "did:viedu:0007"]
+    assert resumed.steps["dids"] == {"next": 8, "end": 7, "failed": []}
+    store.close()
+
+
+def test_rerun_behind_the_checkpoint_writes_no_duplicates(dg, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(dg, "executor", None)
+    checkpoint_path = tmp_path / "data" / "checkpoint.json"
+    store = dg.StreamingDataStore(str(tmp_path / "data"))
+    run_step(dg, dg.Checkpoint(str(checkpoint_path)), store, 4)
+    store.close()
+    # As if the run died after writing records 2-4 but before saving the checkpoint
+    checkpoint_path.write_text(json.dumps({"steps": {"dids": {"next": 2, "end": 6, "failed": []}}}))
+
+    store = dg.StreamingDataStore(str(tmp_path / "data"))
+    run = run_step(dg, dg.Checkpoint(str(checkpoint_path)), store, 6)
+    store.close()
+    lines = (tmp_path / "data" / "dids.ndjson").read_text().splitlines()
+    assert [json.loads(line) for line in lines] == [f"did:viedu:{i:04d}" for i in range(1, 7)]
+    assert run.state == {"next": 7, "end": 6, "failed": []}
+
+
+def test_transfers_and_purchases_are_logged_once_they_succeed(dg, tmp_path, monkeypatch, caplog):
+    monkeypatch.chdir(tmp_path)
+    store = dg.StreamingDataStore(str(tmp_path / "data"))
+    monkeypatch.setattr(dg, "data", store)
+    monkeypatch.setattr(dg, "checkpoint", dg.Checkpoint(str(tmp_path / "data" / "checkpoint.json")))
+    monkeypatch.setattr(dg, "DATA_COUNT", 3)
+
+    def generate_with(failing):
+        monkeypatch.setattr(dg, "executor", EndpointExecutor(failing))
+        caplog.clear()
+        with caplog.at_level("INFO", logger="DataGenerator"):
+            dg.generate_wallets()
+            dg.generate_nfts()
+        return [record.getMessage().split()[0] for record in caplog.records]
+
+    failed = generate_with({"edupay/transfer", "edumarket/buy"})
+    assert failed.count("Created") == 6
+    assert "Transferred" not in failed and "NFT" not in failed
+    assert dg.checkpoint.steps["transfers"]["failed"] == [1, 2, 3]
+
+    # The next run retries the failed calls before a fresh batch; all of them succeed and are reported
+    retried = generate_with(set())
+    assert retried.count("Retrying") == 2
+    assert retried.count("Transferred") == 6 and retried.count("NFT") == 6
+    store.close()
+
+
+def generate(directory, *extra):
+    directory.mkdir()
+    subprocess.run(
+        [sys.executable, SCRIPT, "--dry-run", "--seed", "11", "--count", "25", "--progress-interval", "0", *extra],
+        cwd=directory, check=True, capture_output=True
+    )
+    output = directory / "data.dry-run"
+    return {name: (output / name).read_bytes() for name in sorted(os.listdir(output)) if name.endswith(".ndjson")}
+
+
+def test_same_seed_gives_identical_output_serially_and_in_workers(tmp_path):
+    serial = generate(tmp_path / "serial", "--workers", "1")
+    again = generate(tmp_path / "again", "--workers", "1", "--concurrency", "3")
+    parallel = generate(tmp_path / "parallel", "--workers", "4")
+    assert len(serial) == 10
+    assert serial["dids.ndjson"].count(b"\n") == 25
+    assert serial == again == parallel
+    assert generate(tmp_path / "other", "--seed", "12") != serial